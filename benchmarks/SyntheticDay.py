@@ -0,0 +1,116 @@
+from datetime import date, datetime, time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+class SyntheticDay:
+    """
+    Market data of one synthetic trading day, sized like SBER in MOEX main session 10:00 - 18:40:
+    about 100k quotes, 50k level2 snapshots of 20 price levels each side and 1 minute candles.
+    Price is a random walk of 1 kopeck ticks. The same seed gives the same data.
+    """
+
+    session_start, session_end = time(10, 0), time(18, 40)
+    quotes_per_day = 100000
+    level2_per_day = 50000
+
+    def __init__(self, scale: float = 1.0, depth: int = 20, seed: int = 0, day: date = date(2021, 11, 8),
+                 ticker: str = "QJSIM/SBER"):
+        """
+        :param scale: fraction of real day data sizes, the session time is the same
+        :param depth: price levels of each side in level2 snapshot
+        """
+        self.depth = depth
+        self.ticker = ticker
+        self.seed = seed
+        rnd = self._rnd_of(0)
+        start = np.datetime64(datetime.combine(day, self.session_start), 'ns')
+        session_ns = (datetime.combine(day, self.session_end) - datetime.combine(day, self.session_start)) \
+            // pd.Timedelta(1, 'ns')
+        # Random walk of mid price in kopecks, one step per quote
+        self.quote_times = start + np.sort(rnd.integers(0, session_ns, max(int(self.quotes_per_day * scale), 2)))
+        self.mid = 30000 + np.cumsum(rnd.integers(-1, 2, len(self.quote_times)))
+        self.level2_times = np.unique(start + rnd.integers(0, session_ns, max(int(self.level2_per_day * scale), 2)))
+        self.candle_times = start + np.arange(0, session_ns, 60 * 10 ** 9).astype('timedelta64[ns]')
+
+    def _rnd_of(self, stream: int) -> np.random.Generator:
+        """
+        Random generator of one kind of data, so each kind is the same regardless of the order of calls
+        """
+        return np.random.default_rng([self.seed, stream])
+
+    def quotes(self) -> pd.DataFrame:
+        """
+        Quotes indexed by datetime with ticker, bid, ask, last, last_change columns
+        """
+        spread = self._rnd_of(1).integers(1, 4, len(self.mid))
+        return pd.DataFrame({'ticker': self.ticker,
+                             'bid': (self.mid - spread // 2) / 100,
+                             'ask': (self.mid + spread - spread // 2) / 100,
+                             'last': self.mid / 100,
+                             'last_change': np.round((self.mid - self.mid[0]) / self.mid[0] * 100, 2)},
+                            index=pd.DatetimeIndex(self.quote_times, name='datetime'))
+
+    def candles(self) -> pd.DataFrame:
+        """
+        1 minute candles of mid price indexed by datetime with ticker, open, high, low, close, volume columns
+        """
+        minutes = np.searchsorted(self.quote_times, self.candle_times)
+        bounds = np.append(minutes, len(self.mid))
+        rows = [(self.mid[max(start - 1, 0)], self.mid[start:end].max(initial=self.mid[max(start - 1, 0)]),
+                 self.mid[start:end].min(initial=self.mid[max(start - 1, 0)]), self.mid[max(end - 1, 0)])
+                for start, end in zip(bounds[:-1], bounds[1:])]
+        df = pd.DataFrame(np.array(rows) / 100, columns=['open', 'high', 'low', 'close'],
+                          index=pd.DatetimeIndex(self.candle_times, name='datetime'))
+        df.insert(0, 'ticker', self.ticker)
+        df['volume'] = self._rnd_of(2).integers(100, 5000, len(df))
+        return df
+
+    def level2(self) -> pd.DataFrame:
+        """
+        Level2 rows with datetime, ticker, price, bid_vol, ask_vol columns, a snapshot per time.
+        Bids are below mid price, asks are at and above it, the other side volume is nan.
+        """
+        mid = self.mid[np.clip(np.searchsorted(self.quote_times, self.level2_times) - 1, 0, None)]
+        offsets = np.arange(-self.depth, self.depth)
+        prices = mid[:, None] + offsets[None, :]
+        volumes = self._rnd_of(3).integers(1, 1000, prices.shape).astype(np.float64)
+        is_bid = np.broadcast_to(offsets < 0, prices.shape)
+        return pd.DataFrame({'datetime': np.repeat(self.level2_times, len(offsets)),
+                             'ticker': self.ticker,
+                             'price': prices.ravel() / 100,
+                             'bid_vol': np.where(is_bid, volumes, np.nan).ravel(),
+                             'ask_vol': np.where(is_bid, np.nan, volumes).ravel()})
+
+    def quik_level2(self) -> List[dict]:
+        """
+        Level2 snapshots as decoded web quik 21014 messages
+        """
+        quik_ticker = self.ticker.replace('/', '¦')
+        level2 = self.level2()
+        size = 2 * self.depth
+        prices = level2['price'].to_numpy().reshape(-1, size)
+        bid_vols = np.nan_to_num(level2['bid_vol'].to_numpy()).astype(int).reshape(-1, size).tolist()
+        ask_vols = np.nan_to_num(level2['ask_vol'].to_numpy()).astype(int).reshape(-1, size).tolist()
+        return [{'msgid': 21014, 'quotes': {quik_ticker: {'lines': {
+            f"{price:g}": {'b': bid, 's': ask, 'by': 0, 'sy': 0} for price, bid, ask in zip(row, bids, asks)}}}}
+            for row, bids, asks in zip(prices.tolist(), bid_vols, ask_vols)]
+
+    def quik_orders(self, n: int = 10000) -> List[dict]:
+        """
+        Decoded web quik 21001 order messages
+        """
+        class_code, sec_code = self.ticker.split('/')
+        times = self.quote_times[np.linspace(0, len(self.quote_times) - 1, n).astype(int)]
+        qtimes = (pd.DatetimeIndex(times).strftime('%H%M%S').astype(int)).tolist()
+        prices = (self.mid[np.linspace(0, len(self.mid) - 1, n).astype(int)] / 100).tolist()
+        quantities = self._rnd_of(4).integers(1, 10, n).tolist()
+        qdate = int(pd.Timestamp(times[0]).strftime('%Y%m%d'))
+        return [{'msgid': 21001, 'qdate': qdate, 'qtime': qtime, 'ccode': class_code, 'scode': sec_code,
+                 'sell': i % 2, 'account': 'NL0011100043', 'price': price, 'qty': qty, 'volume': price * qty,
+                 'balance': qty, 'yield': 0, 'accr': 0, 'refer': '10815//', 'type': 25, 'firm': 'NC0011100000',
+                 'ucode': '10815', 'number': str(6059372033 + i), 'status': 1, 'price_currency': '',
+                 'settle_currency': ''}
+                for i, (qtime, price, qty) in enumerate(zip(qtimes, prices, quantities))]
@@ -0,0 +1,264 @@
+import base64
+import hashlib
+import json
+import logging
+import re
+import socket
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from pytrade.connector.quik.MsgId import MsgId
+
+
+class WebQuikStandIn:
+    """
+    Local web quik server for load tests, speaks the protocol as WebQuikConnector expects it.
+    Client auth 10000 is answered by auth and status, client 10008 by trade session open, then feed frames are
+    replayed at a multiple of their real time. Orders 12000 get transaction reply and active order.
+    Every probe interval the server pings the client: pong delay shows how far behind the client reads the socket,
+    sending behind schedule shows that the client does not read at all.
+    Plain sockets and RFC 6455 framing, no server dependencies.
+    """
+
+    _GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    _KEY_PATTERN = re.compile(rb"Sec-WebSocket-Key:\s*(\S+)", re.IGNORECASE)
+
+    class Opcode:
+        CONTINUATION = 0x0
+        TEXT = 0x1
+        BINARY = 0x2
+        CLOSE = 0x8
+        PING = 0x9
+        PONG = 0xA
+
+    def __init__(self, frames: List[Tuple[float, bytes]], speed: float = 1.0, host: str = "127.0.0.1",
+                 port: int = 0, probe_seconds: float = 0.1):
+        """
+        :param frames: (seconds from replay start, raw frame), sorted by time
+        :param speed: multiple of real time, 0 to send as fast as possible
+        :param port: listen port, any free port if 0
+        :param probe_seconds: interval of ping probes of client lag, 0 to disable
+        """
+        self._logger = logging.getLogger(__name__)
+        self.frames = frames
+        self.speed = speed
+        self.probe_seconds = probe_seconds
+        self._server = socket.create_server((host, port))
+        self.host, self.port = self._server.getsockname()[:2]
+        self._send_lock = threading.Lock()
+        self._order_number = 0
+        # Monotonic time each frame was sent, how late it was against the schedule, pong delays
+        self.sent_at: List[float] = []
+        self.send_lags: List[float] = []
+        self.pong_lags: List[float] = []
+        self.orders: List[dict] = []
+        self.is_replayed = threading.Event()
+        self._is_stopped = False
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/quik"
+
+    @staticmethod
+    def timed(frames: List[bytes], rate: float) -> List[Tuple[float, bytes]]:
+        """
+        Frames evenly spread in time at given rate, frames per second
+        """
+        return [(i / rate, frame) for i, frame in enumerate(frames)]
+
+    @staticmethod
+    def read_frames(path: str, rate: float = 1000) -> List[Tuple[float, bytes]]:
+        """
+        Frames from file, one per line: raw frame or seconds from start, tab and raw frame.
+        Frames without time are spread at given rate after the previous frame.
+        """
+        frames, last = [], 0.0
+        with open(path, 'rb') as f:
+            for line in f:
+                line = line.rstrip(b'\r\n')
+                if not line.strip():
+                    continue
+                offset, sep, frame = line.partition(b'\t')
+                last = float(offset) if sep else (last + 1 / rate if frames else 0.0)
+                frames.append((last, frame if sep else line))
+        return frames
+
+    def start(self) -> 'WebQuikStandIn':
+        """
+        Accept clients in background thread
+        """
+        threading.Thread(target=self._accept_loop, name="standin-accept", daemon=True).start()
+        self._logger.info("Web quik stand-in listens on %s", self.url)
+        return self
+
+    def stop(self):
+        self._is_stopped = True
+        self._server.close()
+
+    def report(self) -> dict:
+        """
+        Replay throughput, lag of sending behind the schedule and client pong delays in milliseconds
+        """
+        seconds = self.sent_at[-1] - self.sent_at[0] if len(self.sent_at) > 1 else 0.0
+        report = {'frames': len(self.sent_at), 'seconds': seconds,
+                  'frames_per_second': (len(self.sent_at) - 1) / seconds if seconds else 0.0}
+        for name, lags in [('send_lag', self.send_lags), ('pong_lag', self.pong_lags)]:
+            lags = np.array(lags or [0.0]) * 1000
+            report.update({f'{name}_p50_ms': float(np.percentile(lags, 50)),
+                           f'{name}_p99_ms': float(np.percentile(lags, 99)),
+                           f'{name}_max_ms': float(lags.max())})
+        return report
+
+    def _accept_loop(self):
+        while not self._is_stopped:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), name="standin-client", daemon=True).start()
+
+    def _serve(self, client: socket.socket):
+        """
+        Handshake and process client messages until close
+        """
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = client.makefile('rb')
+        try:
+            self._handshake(client, reader)
+            message = b''
+            while True:
+                opcode, payload = self._read_frame(reader)
+                if opcode == self.Opcode.CLOSE:
+                    self._send(client, payload[:2], self.Opcode.CLOSE)
+                    return
+                elif opcode == self.Opcode.PING:
+                    self._send(client, payload, self.Opcode.PONG)
+                elif opcode == self.Opcode.PONG:
+                    if len(payload) == 8:
+                        self.pong_lags.append(time.perf_counter() - struct.unpack('>d', payload)[0])
+                elif opcode is not None:
+                    message += payload
+                    if opcode >= 0:
+                        self._on_message(client, json.loads(message))
+                        message = b''
+        except (ConnectionError, OSError, EOFError) as e:
+            self._logger.info("Client disconnected: %s", e)
+        finally:
+            client.close()
+
+    def _handshake(self, client: socket.socket, reader):
+        request = b''
+        while not request.endswith(b'\r\n\r\n'):
+            line = reader.readline()
+            if not line:
+                raise EOFError("Closed during handshake")
+            request += line
+        key = self._KEY_PATTERN.search(request).group(1)
+        accept = base64.b64encode(hashlib.sha1(key + self._GUID).digest())
+        client.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                       b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+    def _read_frame(self, reader) -> (Optional[int], bytes):
+        """
+        Opcode and unmasked payload of the next client frame.
+        Opcode is negative for not final fragment of a message, None for empty frame.
+        """
+        header = self._read_exactly(reader, 2)
+        is_final, opcode = header[0] & 0x80, header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', self._read_exactly(reader, 2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', self._read_exactly(reader, 8))[0]
+        mask = self._read_exactly(reader, 4) if header[1] & 0x80 else None
+        payload = self._read_exactly(reader, length)
+        if mask and length:
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        if opcode in (self.Opcode.TEXT, self.Opcode.BINARY, self.Opcode.CONTINUATION):
+            return (opcode if is_final else -1) if length or is_final else None, payload
+        return opcode, payload
+
+    @staticmethod
+    def _read_exactly(reader, n: int) -> bytes:
+        data = reader.read(n)
+        if len(data) < n:
+            raise EOFError("Socket closed")
+        return data
+
+    def _send(self, client: socket.socket, payload: bytes, opcode: int = Opcode.TEXT):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('>BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack('>BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('>BBQ', 0x80 | opcode, 127, length)
+        with self._send_lock:
+            client.sendall(header + payload)
+
+    def _send_json(self, client: socket.socket, msg: dict):
+        self._send(client, json.dumps(msg).encode())
+
+    def _on_message(self, client: socket.socket, msg: dict):
+        """
+        Answer client message like web quik does
+        """
+        msgid = msg.get('msgid')
+        if msgid == 10000:
+            self._send_json(client, {'msgid': MsgId.AUTH, 'resultCode': 0})
+            self._send_json(client, {'msgid': MsgId.STATUS, 'connected': 1})
+        elif msgid == 10008:
+            self._send_json(client, {'msgid': MsgId.TRADE_SESSION_OPEN, 'resultCode': 0})
+            threading.Thread(target=self._replay, args=(client,), name="standin-replay", daemon=True).start()
+        elif msgid == MsgId.ORDER:
+            self._on_order(client, msg)
+
+    def _on_order(self, client: socket.socket, msg: dict):
+        """
+        Register the order: transaction reply and active order
+        """
+        self.orders.append(msg)
+        self._order_number += 1
+        now = datetime.now()
+        self._send_json(client, {'msgid': MsgId.TRANS_REPLY, 'request': msg.get('transid', 1), 'status': 3,
+                                 'ordernum': self._order_number, 'datetime': now.strftime('%Y-%m-%d %H:%M:%S'),
+                                 'text': f"Order N {self._order_number} registered"})
+        self._send_json(client, {'msgid': MsgId.ORDERS, 'qdate': int(now.strftime('%Y%m%d')),
+                                 'qtime': int(now.strftime('%H%M%S')), 'ccode': msg['ccode'], 'scode': msg['scode'],
+                                 'sell': msg['sell'], 'account': msg.get('account'), 'price': msg['price'],
+                                 'qty': msg['quantity'], 'volume': msg['price'] * msg['quantity'],
+                                 'balance': msg['quantity'], 'number': str(self._order_number), 'status': 1})
+
+    def _replay(self, client: socket.socket):
+        """
+        Send frames on schedule, probe client lag with pings in between
+        """
+        self._logger.info("Replaying %d frames at %sx speed", len(self.frames), self.speed or "max")
+        start = time.perf_counter()
+        next_probe = start
+        try:
+            for offset, frame in self.frames:
+                due = start + offset / self.speed if self.speed else time.perf_counter()
+                now = time.perf_counter()
+                if due > now:
+                    time.sleep(due - now)
+                    now = time.perf_counter()
+                if self.probe_seconds and now >= next_probe:
+                    self._send(client, struct.pack('>d', now), self.Opcode.PING)
+                    next_probe = now + self.probe_seconds
+                self._send(client, frame)
+                self.sent_at.append(now)
+                self.send_lags.append(now - due)
+            if self.probe_seconds:
+                self._send(client, struct.pack('>d', time.perf_counter()), self.Opcode.PING)
+        except OSError as e:
+            self._logger.info("Replay stopped: %s", e)
+        finally:
+            self._logger.info("Replay completed. %s", self.report())
+            self.is_replayed.set()
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.SyntheticDay import SyntheticDay
+from connector.CsvFeedConnector import CsvFeedConnector
+from feed.Feed import Feed
+from model.feed.ArrayLevel2 import ArrayLevel2
+from model.feed.Asset import Asset
+from model.feed.Quote import Quote
+from pytrade.connector.quik.MsgConverter import MsgConverter
+from pytrade.connector.quik.WebQuikFeed import WebQuikFeed
+from pytrade.model.feed.Asset import Asset as QuikAsset
+from strategy.features.Level2Features import Level2Features
+from strategy.features.TargetFeatures import TargetFeatures
+
+
+class HotPathsBenchmark:
+    """
+    Throughput of feed, replay and feature hot paths on a synthetic SBER like trading day.
+    Results, items per second, are compared with stored baseline, a case slower than baseline by more than
+    the threshold is a regression. Each run also measures reference case, plain python work independent of pytrade.
+    Results are compared relative to the reference of their run, so the baseline of another machine can be used.
+    Run from project root: PYTHONPATH=pytrade python -m benchmarks.bench_HotPaths [--save] [--scale 0.1]
+    """
+
+    default_baseline_path = os.path.join(os.path.dirname(__file__), "baseline.json")
+    # Machine speed case, results are normalized by it
+    REFERENCE = 'reference'
+
+    class Subscriber:
+        def __init__(self):
+            self.events = 0
+
+        def on_quote(self, quote):
+            self.events += 1
+
+        def on_candle(self, candle):
+            self.events += 1
+
+        def on_level2(self, level2):
+            self.events += 1
+
+    def __init__(self, scale: float = 1.0, seed: int = 0):
+        """
+        :param scale: fraction of real day data sizes
+        """
+        self.scale = scale
+        self.day = SyntheticDay(scale, seed=seed)
+        self.asset = Asset.of(self.day.ticker)
+        self.quotes = self.day.quotes()
+        self.candles = self.day.candles()
+        self.level2 = self.day.level2()
+        # Case name -> function, preparing the data and returning timed function and number of items it processes
+        self.cases: Dict[str, Callable[[], Tuple[Callable[[], object], int]]] = {
+            self.REFERENCE: self.reference,
+            'feed_on_quote': self.feed_on_quote,
+            'feed_on_level2': self.feed_on_level2,
+            'csv_feed_run': self.csv_feed_run,
+            'level2_buckets': self.level2_buckets,
+            'min_max_future': self.min_max_future,
+            'webquik_on_level2': self.webquik_on_level2,
+            'msg2order': self.msg2order}
+
+    def run(self, cases: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, float]:
+        """
+        Best items per second of each case and of reference case
+        """
+        names = [name for name in cases or self.cases if name != self.REFERENCE]
+        # Reference is measured before and after the cases, machine load can change during the run
+        results = {self.REFERENCE: 0.0}
+        for name in [self.REFERENCE] + names + [self.REFERENCE]:
+            best = results.get(name, 0.0)
+            for _ in range(repeat):
+                func, items = self.cases[name]()
+                start = time.perf_counter()
+                func()
+                best = max(best, items / (time.perf_counter() - start))
+            results[name] = best
+        return results
+
+    @staticmethod
+    def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> Dict[str, tuple]:
+        """
+        Result, baseline, ratio and regression flag of each case. Cases without baseline are not regressions.
+        Ratio is relative to reference cases of both runs, if they have it. Reference case is not a regression.
+        :param threshold: allowed slowdown, fraction of baseline
+        """
+        reference, base_reference = results.get(HotPathsBenchmark.REFERENCE), baseline.get(HotPathsBenchmark.REFERENCE)
+        speed = base_reference / reference if reference and base_reference else 1.0
+        comparison = {}
+        for name, value in results.items():
+            base = baseline.get(name)
+            ratio = value * speed / base if base else None
+            is_regression = name != HotPathsBenchmark.REFERENCE and ratio is not None and ratio < 1 - threshold
+            comparison[name] = (value, base, ratio, is_regression)
+        return comparison
+
+    @staticmethod
+    def load_baseline(path: str) -> dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_baseline(self, path: str, results: Dict[str, float]):
+        with open(path, 'w') as f:
+            json.dump({'scale': self.scale, 'results': {name: round(value, 1) for name, value in results.items()}},
+                      f, indent=2)
+            f.write('\n')
+
+    @staticmethod
+    def reference():
+        """
+        Dict and float work of plain python, like the hot paths do, but independent of pytrade code
+        """
+        items = [(i % 97, float(i)) for i in range(1000000)]
+
+        def run():
+            totals = {}
+            for key, value in items:
+                totals[key] = totals.get(key, 0.0) + value * 1.0001
+            return totals
+
+        return run, len(items)
+
+    def feed_on_quote(self):
+        feed = Feed(None)
+        quotes = [Quote(dt, self.asset, bid, ask, last, last_change) for dt, bid, ask, last, last_change in
+                  zip(self.quotes.index, self.quotes['bid'], self.quotes['ask'], self.quotes['last'],
+                      self.quotes['last_change'])]
+
+        def run():
+            for quote in quotes:
+                feed.on_quote(quote)
+
+        return run, len(quotes)
+
+    def feed_on_level2(self):
+        feed = Feed(None)
+        offsets = list(range(0, len(self.level2) + 1, 2 * self.day.depth))
+        rows = self.level2[['price', 'bid_vol', 'ask_vol']].to_numpy()
+        snapshots = [ArrayLevel2.of_rows(dt, self.asset, rows[start:end])
+                     for dt, start, end in zip(self.day.level2_times, offsets[:-1], offsets[1:])]
+
+        def run():
+            for level2 in snapshots:
+                feed.on_level2(level2)
+
+        return run, len(snapshots)
+
+    def csv_feed_run(self):
+        connector = CsvFeedConnector({})
+        connector.candles, connector.quotes, connector.level2 = self.candles, self.quotes, self.level2
+        connector.subscribe_feed(Asset.any_asset(), self.Subscriber())
+        return connector.run, len(self.quotes) + len(self.candles) + len(self.day.level2_times)
+
+    def level2_buckets(self):
+        return lambda: Level2Features().level2_buckets(self.level2), len(self.day.level2_times)
+
+    def min_max_future(self):
+        quotes = self.quotes.set_index('ticker', append=True)
+        return lambda: TargetFeatures().min_max_future(quotes, 5, 'min'), len(quotes)
+
+    def webquik_on_level2(self):
+        config = {"connector.webquik.url": "ws://127.0.0.1:1/quik", "connector.webquik.account": "bench",
+                  "connector.webquik.passwd": "bench"}
+        web_quik_feed = WebQuikFeed(config)
+        web_quik_feed.subscribe_feed(QuikAsset.of(self.day.ticker), self.Subscriber())
+        msgs = self.day.quik_level2()
+
+        def run():
+            for msg in msgs:
+                web_quik_feed._on_level2(msg)
+
+        return run, len(msgs)
+
+    def msg2order(self):
+        msgs = self.day.quik_orders()
+        return lambda: [MsgConverter.msg2order(msg) for msg in msgs], len(msgs)
+
+    @staticmethod
+    def main(argv: List[str]) -> int:
+        parser = argparse.ArgumentParser(description="Hot paths benchmark")
+        parser.add_argument("--scale", type=float, help="fraction of real day data, baseline scale by default")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown against baseline")
+        parser.add_argument("--baseline", default=HotPathsBenchmark.default_baseline_path)
+        parser.add_argument("--save", action="store_true", help="save results as new baseline")
+        parser.add_argument("cases", nargs="*", help="cases to run, all by default")
+        args = parser.parse_args(argv)
+
+        baseline = HotPathsBenchmark.load_baseline(args.baseline)
+        scale = args.scale or baseline.get('scale', 1.0)
+        if baseline and scale != baseline.get('scale'):
+            print(f"Warning: scale {scale} differs from baseline scale {baseline.get('scale')}")
+        if baseline and HotPathsBenchmark.REFERENCE not in baseline.get('results', {}):
+            print("Warning: baseline has no reference case, absolute results are compared. "
+                  "Save the baseline on this machine with --save.")
+        benchmark = HotPathsBenchmark(scale)
+        results = benchmark.run(args.cases or None, args.repeat)
+        if args.save:
+            benchmark.save_baseline(args.baseline, results)
+            print(f"Saved baseline to {args.baseline}")
+
+        comparison = HotPathsBenchmark.compare(results, baseline.get('results', {}), args.threshold)
+        print(f"{'case':>18} {'items/s':>12} {'baseline':>12} {'ratio':>7}")
+        for name, (value, base, ratio, is_regression) in comparison.items():
+            print(f"{name:>18} {value:12.0f} {base or 0:12.0f} {ratio or 0:7.2f}{'  REGRESSION' if is_regression else ''}")
+        return 1 if any(is_regression for *_, is_regression in comparison.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(HotPathsBenchmark.main(sys.argv[1:]))
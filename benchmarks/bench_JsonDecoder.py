@@ -0,0 +1,73 @@
+import json
+import random
+import sys
+import timeit
+from typing import List
+
+from pytrade.connector.quik.JsonDecoder import JsonDecoder
+
+
+class JsonDecoderBenchmark:
+    """
+    Micro-benchmark of json decoder backends over web quik frames.
+    Frames are read from file with one raw frame per line or generated like web quik quotes, candles and level2.
+    Run from project root: PYTHONPATH=pytrade python -m benchmarks.bench_JsonDecoder [frames file]
+    """
+
+    def __init__(self, frames: List[bytes]):
+        self.frames = frames
+
+    @staticmethod
+    def read_frames(path: str) -> List[bytes]:
+        """
+        Raw frames from file, one frame per line
+        """
+        with open(path, 'rb') as f:
+            return [line.rstrip(b'\r\n') for line in f if line.strip()]
+
+    @staticmethod
+    def generate_frames(n: int = 1000, depth: int = 30, seed: int = 0) -> List[bytes]:
+        """
+        Web quik like frames: mostly level2 snapshots of given depth, quotes and candles
+        """
+        rnd = random.Random(seed)
+        frames = []
+        price = 22800
+        for i in range(n):
+            price += rnd.randint(-2, 2)
+            kind = i % 10
+            if kind < 7:
+                lines = {str(price - depth + p): {'b': rnd.randint(1, 500) if p < depth else 0,
+                                                  's': rnd.randint(1, 500) if p >= depth else 0, 'by': 0, 'sy': 0}
+                         for p in range(depth * 2)}
+                msg = {'msgid': 21014, 'quotes': {'QJSIM¦SBER': {'lines': lines}}}
+            elif kind < 9:
+                msg = {'msgid': 21011, 'dataResult': {'QJSIM¦SBER': {
+                    'bid': price - 1, 'offer': price + 1, 'last': price, 'lastchange': rnd.random()}}}
+            else:
+                msg = {'msgid': 21016, 'graph': {'QJSIM¦SBER¦0': [{
+                    'd': '2021-11-07 10:02:00', 'o': price, 'h': price + 3, 'l': price - 3, 'c': price,
+                    'v': rnd.randint(100, 3000)}]}}
+            frames.append(json.dumps(msg).encode())
+        return frames
+
+    def run(self, repeat: int = 5) -> dict:
+        """
+        Best frames per second of each installed backend and of the former bytes.decode() + json.loads path
+        """
+        decoders = {name: JsonDecoder(name).decode for name in JsonDecoder.available()}
+        decoders['json from str'] = lambda raw: json.loads(raw.decode())
+        results = {}
+        for name, decode in decoders.items():
+            seconds = min(timeit.repeat(lambda: [decode(frame) for frame in self.frames], number=1, repeat=repeat))
+            results[name] = len(self.frames) / seconds
+        return results
+
+
+if __name__ == "__main__":
+    frames = JsonDecoderBenchmark.read_frames(sys.argv[1]) if len(sys.argv) > 1 \
+        else JsonDecoderBenchmark.generate_frames()
+    size = sum(map(len, frames))
+    print(f"{len(frames)} frames, {size / len(frames):.0f} bytes per frame")
+    for backend, fps in JsonDecoderBenchmark(frames).run().items():
+        print(f"{backend:>15}: {fps:12.0f} frames/s, {fps * size / len(frames) / 2 ** 20:8.1f} MB/s")
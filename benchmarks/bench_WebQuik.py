@@ -0,0 +1,112 @@
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.WebQuikStandIn import WebQuikStandIn
+from benchmarks.bench_JsonDecoder import JsonDecoderBenchmark
+from broker.Broker import Broker
+from feed.Feed import Feed
+from pytrade.connector.quik.MsgId import MsgId
+from pytrade.connector.quik.MsgPipeline import MsgPipeline
+from pytrade.connector.quik.WebQuikBroker import WebQuikBroker
+from pytrade.connector.quik.WebQuikConnector import WebQuikConnector
+from pytrade.connector.quik.WebQuikFeed import WebQuikFeed
+from pytrade.model.feed.Asset import Asset
+
+
+class WebQuikBenchmark:
+    """
+    Load test of WebQuikConnector, WebQuikFeed and Feed against local web quik stand-in server.
+    Frames are replayed at a multiple of real time, client lag is the time from sending a frame
+    to the end of its processing by Feed subscribers. The subscriber buys on every n-th quote through Broker
+    and WebQuikBroker, tick to order is the time from receiving the quote frame to sending the order.
+    Run from project root: PYTHONPATH=pytrade python -m benchmarks.bench_WebQuik [speed] [frames file]
+    Speed 0 replays as fast as possible and shows the throughput ceiling.
+    """
+
+    _FEED_MSGIDS = {str(MsgId.QUOTES), str(MsgId.GRAPH), str(MsgId.LEVEL2)}
+
+    class Subscriber:
+        def __init__(self, broker: Broker = None, order_every: int = 0):
+            self._broker = broker
+            self._order_every = order_every
+            self._quotes = 0
+
+        def on_quote(self, quote):
+            self._quotes += 1
+            if self._order_every and self._quotes % self._order_every == 0:
+                self._broker.buy(quote.asset.class_code, quote.asset.sec_code, quote.bid, 1)
+
+        def on_candle(self, candle):
+            pass
+
+        def on_level2(self, level2):
+            pass
+
+        def on_heartbeat(self):
+            pass
+
+    def __init__(self, frames: List[Tuple[float, bytes]], speed: float = 1.0, asset: Asset = Asset("QJSIM", "SBER"),
+                 order_every: int = 100):
+        """
+        :param order_every: buy on every n-th quote, 0 to not send orders
+        """
+        self.stand_in = WebQuikStandIn(frames, speed)
+        self.asset = asset
+        self.order_every = order_every
+        # Only feed frames are counted, they are processed in order in the feed lane
+        self._feed_frames = [i for i, (_, frame) in enumerate(frames)
+                             if MsgPipeline.msgid_of(frame) in self._FEED_MSGIDS]
+        self._processed_at = []
+        self._is_processed = threading.Event()
+
+    def run(self, timeout: float = 600) -> dict:
+        """
+        Replay all frames to the client and report server stats, client lag and throughput
+        """
+        self.stand_in.start()
+        config = {"connector.webquik.url": self.stand_in.url, "connector.webquik.account": "bench",
+                  "connector.webquik.passwd": "bench", "connector.webquik.client_code": "bench",
+                  "connector.webquik.trade_account": "bench"}
+        web_quik_feed = WebQuikFeed(config)
+        feed = Feed.of(web_quik_feed, config)
+        broker = Broker(WebQuikBroker(config))
+        feed.subscribe_feed(self.asset, self.Subscriber(broker, self.order_every))
+        connector = WebQuikConnector(config)
+        # Called after feed subscribers, in the same feed lane
+        connector.subscribe({msgid: self._on_processed for msgid in (MsgId.QUOTES, MsgId.GRAPH, MsgId.LEVEL2)})
+        threading.Thread(target=web_quik_feed.run, name="bench-client", daemon=True).start()
+
+        self._is_processed.wait(timeout)
+        connector.close()
+        self.stand_in.stop()
+        report = self.stand_in.report()
+        sent_at = np.array(self.stand_in.sent_at)[self._feed_frames[:len(self._processed_at)]]
+        lags = (np.array(self._processed_at) - sent_at) * 1000 if len(sent_at) else np.zeros(1)
+        seconds = self._processed_at[-1] - self.stand_in.sent_at[0] if self._processed_at else 0.0
+        report.update({'processed': len(self._processed_at),
+                       'processed_per_second': len(self._processed_at) / seconds if seconds else 0.0,
+                       'client_lag_p50_ms': float(np.percentile(lags, 50)),
+                       'client_lag_p99_ms': float(np.percentile(lags, 99)),
+                       'client_lag_max_ms': float(lags.max())})
+        tick_to_order = connector.metrics.tracer.summary()
+        report.update({'orders': tick_to_order['orders'],
+                       **{f'tick_to_order_{key}': tick_to_order[key] for key in ('p50_us', 'p90_us', 'p99_us', 'max_us')}})
+        return report
+
+    def _on_processed(self, msg: dict):
+        self._processed_at.append(time.perf_counter())
+        if len(self._processed_at) >= len(self._feed_frames):
+            self._is_processed.set()
+
+
+if __name__ == "__main__":
+    speed = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    frames = WebQuikStandIn.read_frames(sys.argv[2]) if len(sys.argv) > 2 \
+        else WebQuikStandIn.timed(JsonDecoderBenchmark.generate_frames(20000), rate=1000)
+    print(f"{len(frames)} frames over {frames[-1][0]:.1f}s at {speed or 'max'}x speed")
+    for name, value in WebQuikBenchmark(frames, speed).run().items():
+        print(f"{name:>22}: {value:12.2f}")
@@ -1,6 +1,7 @@
 import logging.config
 import os
 import sys
+
 import yaml
 
 from broker.Broker import Broker
@@ -9,14 +10,17 @@ from connector.quik.WebQuikConnector import WebQuikConnector
 from connector.quik.WebQuikFeed import WebQuikFeed
 from connector.quik.WebQuikBroker import WebQuikBroker
 from connector.CsvFeedConnector import CsvFeedConnector
+from connector.StreamingFeedConnector import StreamingFeedConnector
 from connector.EmptyBrokerConnector import EmptyBrokerConnector
 from connector.MemoryBrokerConnector import MemoryBrokerConnector
 from bunch import bunchify
 
 from feed.Feed import Feed
 from feed.Feed2Csv import Feed2Csv
+from feed.Storage import Storage
 from interop.BrokerInterop import BrokerInterop
 from interop.FeedInterop import FeedInterop
+from interop.RabbitPublisher import RabbitPublisher
 
 
 class App:
@@ -33,13 +37,15 @@ class App:
 
         # Feed and broker
         self._init_connectors(config)
-        feed = Feed(self._feed_connector)
+        feed = self._feed = Feed.of(self._feed_connector, config)
         broker = Broker(self._broker_connector)
 
+        self._publisher = None
         if config["interop.is_interop"]:
             self._init_interop(config, feed, broker)
+        self._feed2csv = None
         if config["is_feed2csv"]:
-            self._feed2csv = Feed2Csv(feed)
+            self._feed2csv = Feed2Csv(feed, storage=Storage.of(config))
 
         # Dynamically create the strategy by the name from config
         self._init_strategy(config, feed, broker)
@@ -52,6 +58,10 @@ class App:
         self._logger.info("Init broker and feed connectors")
         self._broker_connector = globals()[config["broker.connector"]](config)
         self._feed_connector = globals()[config["feed.connector"]](config)
+        # Live connectors share pipeline metrics, log and serve their snapshots
+        metrics = getattr(self._feed_connector, 'metrics', None) or getattr(self._broker_connector, 'metrics', None)
+        if metrics:
+            metrics.start()
 
     def _init_strategy(self, config, feed, broker):
         name = config['strategy']
@@ -61,8 +71,12 @@ class App:
     def _init_interop(self, config, feed, broker):
         self._logger.info("Configuring interop mode")
         rabbit_host = config["interop.rabbit.host"]
-        self._feed_interop = FeedInterop(feed=feed, rabbit_host=rabbit_host)
-        self._broker_interop = BrokerInterop(broker=broker, rabbit_host=rabbit_host)
+        # One publisher thread sends feed and broker events to rabbit
+        publisher = self._publisher = RabbitPublisher.of(config)
+        is_binary = bool(config.get("interop.binary", False))
+        self._feed_interop = FeedInterop(feed=feed, rabbit_host=rabbit_host, publisher=publisher, is_binary=is_binary)
+        self._broker_interop = BrokerInterop(broker=broker, rabbit_host=rabbit_host, publisher=publisher,
+                                             is_binary=is_binary)
 
     def _load_config(self):
         """
@@ -101,8 +115,18 @@ class App:
         Run and trade, maybe using simulators
         """
         self._logger.info("Running")
-        self._feed_connector.run()
-        self._broker_connector.run()
+        try:
+            self._feed_connector.run()
+            self._broker_connector.run()
+        finally:
+            if self._feed2csv:
+                # Feed is over, write the rest
+                self._feed2csv.close()
+            # Remove spilled feed data and stop it's writers
+            self._feed.close()
+            if self._publisher:
+                # Send events, waiting for rabbit
+                self._publisher.stop()
 
     def learn(self):
         """
@@ -1,121 +1,174 @@
-import backtrader as bt
-import pandas as pd
-
-
-class TestStrategy(bt.Strategy):
-
-    def log(self, txt, dt=None):
-        ''' Logging function fot this strategy'''
-        dt = dt or self.datas[0].datetime.date(0)
-        print('%s, %s' % (dt.isoformat(), txt))
-
-    def __init__(self):
-        # Keep a reference to the "close" line in the data[0] dataseries
-        self.dataclose = self.datas[0].close
-
-        # To keep track of pending orders and buy price/commission
-        self.order = None
-        self.buyprice = None
-        self.buycomm = None
-
-    def notify_order(self, order):
-        if order.status in [order.Submitted, order.Accepted]:
-            # Buy/Sell order submitted/accepted to/by broker - Nothing to do
-            return
-
-        # Check if an order has been completed
-        # Attention: broker could reject order if not enough cash
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.log(
-                    'BUY EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f' %
-                    (order.executed.price,
-                     order.executed.value,
-                     order.executed.comm))
-
-                self.buyprice = order.executed.price
-                self.buycomm = order.executed.comm
-            else:  # Sell
-                self.log('SELL EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f' %
-                         (order.executed.price,
-                          order.executed.value,
-                          order.executed.comm))
-
-            self.bar_executed = len(self)
-
-        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log('Order Canceled/Margin/Rejected')
-
-        self.order = None
-
-    def notify_trade(self, trade):
-        if not trade.isclosed:
-            return
-
-        self.log('OPERATION PROFIT, GROSS %.2f, NET %.2f' %
-                 (trade.pnl, trade.pnlcomm))
+import importlib
+import logging.config
+import os
+import time
+from datetime import timedelta
+from typing import Dict, Optional
 
-    def next(self):
-        # Simply log the closing price of the series from the reference
-        self.log('Close, %.2f' % self.dataclose[0])
-
-        # Check if an order is pending ... if yes, we cannot send a 2nd one
-        if self.order:
+import pandas as pd
+import yaml
+
+from backtest.BacktestResult import BacktestResult
+from broker.Broker import Broker
+from connector.CsvFeedConnector import CsvFeedConnector
+from connector.MemoryBrokerConnector import MemoryBrokerConnector
+from connector.StreamingFeedConnector import StreamingFeedConnector
+from feed.Feed import Feed
+from model.broker.Trade import Trade
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class Backtest:
+    """
+    Replays recorded feed through real Feed, Broker and the strategy from config against simulated broker.
+    Runs as fast as possible, feed connector sends heartbeats in simulated time.
+    Tracks cash and positions by trades and samples equity on each heartbeat.
+    """
+
+    def __init__(self, config, strategy_class=None, feed_connector=None, broker_connector=None):
+        """
+        :param strategy_class: strategy to test, class from config "strategy" by default
+        :param feed_connector: recorded feed, streaming feed connector if feed.stream.paths is set,
+        csv feed connector otherwise
+        :param broker_connector: simulated broker, memory broker by default
+        """
+        self._logger = logging.getLogger(__name__)
+        self._initial_cash = float(config.get("backtest.cash", 0))
+        self._commission = float(config.get("backtest.commission", 0))
+        heartbeat = timedelta(seconds=float(config.get("backtest.heartbeat.seconds", 1)))
+        feed_connector_class = StreamingFeedConnector if config.get("feed.stream.paths") else CsvFeedConnector
+        self._feed_connector = feed_connector or feed_connector_class(config, heartbeat_interval=heartbeat)
+        self._broker_connector = broker_connector or MemoryBrokerConnector(config)
+
+        # Simulated broker sees market data of the traded asset before the feed and the strategy
+        self.asset = Asset(config['trade.asset.sec_class'], config['trade.asset.sec_code'])
+        self._feed_connector.subscribe_feed(self.asset, self._broker_connector)
+        self.feed = Feed.of(self._feed_connector, config)
+        self.broker = Broker(self._broker_connector)
+        self.feed.subscribe_feed(Asset.any_asset(), self)
+        self.broker.subscribe_broker(self)
+
+        # Accounting
+        self.cash = self._initial_cash
+        self.positions: Dict[Asset, float] = {}
+        self._prices: Dict[Asset, float] = {}
+        self._now = None
+        self._events = 0
+        self._equity = []
+        self._trades = []
+
+        strategy_class = strategy_class or self.strategy_of(config["strategy"])
+        self._logger.info("Creating strategy %s", strategy_class.__name__)
+        self.strategy = strategy_class(self.feed, self.broker, config)
+
+    @staticmethod
+    def strategy_of(name: str):
+        """
+        Strategy class by name, the class lives in the strategy module of the same name
+        """
+        return getattr(importlib.import_module(f"strategy.{name}"), name)
+
+    def run(self) -> BacktestResult:
+        """
+        Replay all the feed and report the results
+        """
+        self._logger.info("Starting backtest")
+        start = time.perf_counter()
+        self._feed_connector.run()
+        self._broker_connector.run()
+        seconds = time.perf_counter() - start
+        self._sample()
+        result = BacktestResult(
+            equity=pd.DataFrame(self._equity, columns=['datetime', 'cash', 'position', 'equity'])
+                .set_index('datetime'),
+            trades=pd.DataFrame(self._trades, columns=['datetime', 'ticker', 'is_sell', 'price', 'quantity']),
+            events=self._events,
+            seconds=seconds,
+            initial_cash=self._initial_cash)
+        self._logger.info("Completed backtest. %s", result)
+        return result
+
+    def on_quote(self, quote: Quote):
+        self._on_event(quote.dt)
+        # Absent value is None or nan
+        if self._is_set(quote.bid) and self._is_set(quote.ask):
+            self._prices[quote.asset] = (quote.bid + quote.ask) / 2
+        elif self._is_set(quote.last):
+            self._prices[quote.asset] = quote.last
+
+    def on_candle(self, ohlcv: Ohlcv):
+        self._on_event(ohlcv.dt)
+        self._prices.setdefault(ohlcv.asset, ohlcv.c)
+
+    def on_level2(self, level2: Level2):
+        self._on_event(level2.dt)
+
+    def on_heartbeat(self):
+        self._sample()
+
+    def on_trades(self, trade: Trade):
+        """
+        Update cash and position by new trade
+        """
+        asset = Asset(trade.class_code, trade.sec_code)
+        quantity = -trade.quantity if trade.is_sell else trade.quantity
+        value = trade.price * trade.quantity
+        self.cash -= value if quantity > 0 else -value
+        self.cash -= value * self._commission
+        self.positions[asset] = self.positions.get(asset, 0) + quantity
+        self._trades.append((trade.dt, str(asset), trade.is_sell, trade.price, trade.quantity))
+
+    def _on_event(self, dt):
+        self._events += 1
+        is_first = self._now is None
+        self._now = dt
+        if is_first:
+            self._sample()
+
+    def _sample(self):
+        """
+        Add equity curve point at current simulated time, one point per time
+        """
+        if self._now is None:
             return
-
-        # Check if we are in the market
-        if not self.position:
-
-            # Not yet ... we MIGHT BUY if ...
-            if self.dataclose[0] < self.dataclose[-1]:
-                # current close less than previous close
-
-                if self.dataclose[-1] < self.dataclose[-2]:
-                    # previous close less than the previous close
-
-                    # BUY, BUY, BUY!!! (with default parameters)
-                    self.log('BUY CREATE, %.2f' % self.dataclose[0])
-
-                    # Keep track of the created order to avoid a 2nd order
-                    self.order = self.buy()
-
-        else:
-
-            # Already in the market ... we might sell
-            if len(self) >= (self.bar_executed + 5):
-                # SELL, SELL, SELL!!! (with all possible default parameters)
-                self.log('SELL CREATE, %.2f' % self.dataclose[0])
-
-                # Keep track of the created order to avoid a 2nd order
-                self.order = self.sell()
-
-
-# Read csv data into dataframe
-df = pd.read_csv('./data/RI.RTSI_180101_180313.csv', parse_dates={'time': ['<DATE>', '<TIME>']}, index_col=['time'],
-                 usecols=['<DATE>', '<TIME>', 'open', 'high', 'low', 'close', 'volume'],
-                 names=['<TICKER>', '<PER>', '<DATE>', '<TIME>', 'open', 'high', 'low', 'close', 'volume'], header=0)
-df = df['2018-01-01':'2018-01-05']
-print(df.tail())
-
-data = bt.feeds.PandasData(dataname=df)
-#bt.feeds.IBData
-cerebro = bt.Cerebro()
-cerebro.adddata(data)
-bt.brokers.VCBroker
-
-cerebro.broker.setcash(100000.0)
-cerebro.broker.setcommission(commission=0.001)  # 0.1% ... divide by 100 to remove the %
-#cerebro.addstrategy(TestStrategy)
-cerebro.addstrategy(bt.MetaSigStrategy)
-cerebro.addanalyzer(bt.analyzers.PyFolio)
-
-# Print out the starting conditions
-print('Starting Portfolio Value: %.2f' % cerebro.broker.getvalue())
-results = cerebro.start()
-result = results[0]
-pyfoliozer = result.analyzers.getbyname('pyfolio')
-returns, positions, transactions, gross_lev = pyfoliozer.get_pf_items()
-# Print out the final result
-print('Final Portfolio Value: %.2f' % cerebro.broker.getvalue())
-
-cerebro.plot()
+        position_value = sum(quantity * self._prices.get(asset, 0) for asset, quantity in self.positions.items())
+        if self._equity and self._equity[-1][0] == self._now:
+            self._equity.pop()
+        self._equity.append((self._now, self.cash, position_value, self.cash + position_value))
+
+    @staticmethod
+    def _is_set(value) -> bool:
+        return value is not None and value == value
+
+    @staticmethod
+    def load_config(cfg_dir: str = "cfg") -> dict:
+        """
+        Config of the app: defaults, app.yaml if exists, environment vars
+        """
+        with open(os.path.join(cfg_dir, "app-defaults.yaml")) as defaults:
+            config = yaml.safe_load(defaults)
+        cfg_path = os.path.join(cfg_dir, "app.yaml")
+        if os.path.exists(cfg_path):
+            with open(cfg_path) as app:
+                config.update(yaml.safe_load(app))
+        config.update(os.environ)
+        return config
+
+    @staticmethod
+    def main(cfg_dir: str = "cfg") -> Optional[BacktestResult]:
+        """
+        Backtest entry point. Run from pytrade directory: python -m backtest.Backtest
+        """
+        if os.path.exists(os.path.join(cfg_dir, "log-defaults.cfg")):
+            logging.config.fileConfig(os.path.join(cfg_dir, "log-defaults.cfg"))
+        result = Backtest(Backtest.load_config(cfg_dir)).run()
+        print(result)
+        print(result.equity.tail())
+        return result
+
+
+if __name__ == "__main__":
+    Backtest.main()
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass
+class BacktestResult:
+    """
+    Backtest report: equity curve, trades and replay throughput
+    """
+    # cash, position value and equity, indexed by simulated datetime
+    equity: pd.DataFrame
+    # Trades with datetime, ticker, is_sell, price, quantity columns
+    trades: pd.DataFrame
+    # Number of candles, quotes and level2 snapshots replayed
+    events: int
+    # Wall clock duration of the replay
+    seconds: float
+    # Cash before the first trade
+    initial_cash: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds else 0.0
+
+    @property
+    def pnl(self) -> float:
+        """
+        Equity change from the initial cash to the last sample
+        """
+        return float(self.equity['equity'].iloc[-1] - self.initial_cash) if len(self.equity) else 0.0
+
+    @property
+    def max_drawdown(self) -> float:
+        """
+        The largest fall of equity from its previous maximum
+        """
+        equity = self.equity['equity']
+        return float((equity.cummax() - equity).max()) if len(equity) else 0.0
+
+    def __str__(self):
+        return f"Events: {self.events}, seconds: {self.seconds:.3f}, events/sec: {self.events_per_second:.0f}, " \
+               f"trades: {len(self.trades)}, pnl: {self.pnl}"
@@ -0,0 +1,164 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from backtest.Backtest import Backtest
+from connector.CsvFeedConnector import CsvFeedConnector
+
+
+class Sweep:
+    """
+    Backtests each combination of strategy parameters on each recorded day in a process pool.
+    Market data is read once in the main process and shared with workers: forked workers see it without copying,
+    spawned workers receive it once at start. Metrics of all runs are collected to one table.
+    """
+
+    # Config, market data and strategy class of the worker process
+    _config = None
+    _data = None
+    _strategy_class = None
+
+    def __init__(self, config, grid: Dict[str, list], days: Optional[List[date]] = None, strategy_class=None,
+                 processes: Optional[int] = None):
+        """
+        :param config: base config, grid values override it
+        :param grid: config key -> values to try, for example {"strategy.level2.buckets": [10, 20]}
+        :param days: recorded days to backtest on, all days of the data if None
+        :param strategy_class: strategy to test, class from config "strategy" by default
+        :param processes: size of process pool, number of cpus by default
+        """
+        self._logger = logging.getLogger(__name__)
+        self._config = config
+        self._grid = grid
+        self._days = days
+        self._strategy_class = strategy_class
+        self._processes = processes or os.cpu_count()
+
+    @staticmethod
+    def combinations(grid: Dict[str, list]) -> List[dict]:
+        """
+        All combinations of grid values
+        """
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+    def run(self) -> pd.DataFrame:
+        """
+        Backtest all combinations on all days
+        :return: table with parameters, day and metrics of each run
+        """
+        data = self.read_data()
+        days = self._days or sorted(set(data[1].index.date))
+        tasks = [(params, day) for params in self.combinations(self._grid) for day in days]
+        self._logger.info("Running %d backtests of %d combinations on %d days in %d processes",
+                          len(tasks), len(tasks) // max(len(days), 1), len(days), self._processes)
+        if self._processes == 1:
+            self._init_worker(self._config, data, self._strategy_class)
+            rows = list(map(self._run_one, tasks))
+        else:
+            # Fork shares the data with workers, other start methods pickle it once per worker
+            context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods()
+                                                  else None)
+            with context.Pool(self._processes, initializer=self._init_worker,
+                              initargs=(self._config, data, self._strategy_class)) as pool:
+                rows = list(pool.imap_unordered(self._run_one, tasks))
+        return pd.DataFrame(rows).sort_values(['day'] + list(self._grid), kind='mergesort').reset_index(drop=True)
+
+    def read_data(self) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        """
+        Candles, quotes and level2 of all days, sorted by time
+        """
+        start = pd.Timestamp(min(self._days)) if self._days else None
+        end = pd.Timestamp(max(self._days)) + pd.Timedelta(days=1) if self._days else None
+        candles, quotes, level2 = CsvFeedConnector(self._config).read_csvs(start, end)
+        return candles.sort_index(kind='mergesort'), quotes.sort_index(kind='mergesort'), \
+            level2.sort_values('datetime', kind='mergesort').reset_index(drop=True)
+
+    @staticmethod
+    def _init_worker(config, data, strategy_class):
+        Sweep._config = config
+        Sweep._data = data
+        Sweep._strategy_class = strategy_class
+
+    @staticmethod
+    def _run_one(task) -> dict:
+        """
+        Backtest one combination of parameters on one day in worker process
+        """
+        params, day = task
+        row = {**params, 'day': day}
+        try:
+            config = {**Sweep._config, **params}
+            connector = CsvFeedConnector(config, heartbeat_interval=timedelta(
+                seconds=float(config.get("backtest.heartbeat.seconds", 1))))
+            connector.candles, connector.quotes, connector.level2 = Sweep._day_of(Sweep._data, day)
+            result = Backtest(config, Sweep._strategy_class, feed_connector=connector).run()
+            row.update(pnl=result.pnl, max_drawdown=result.max_drawdown, trades=len(result.trades),
+                       events=result.events, events_per_second=result.events_per_second, seconds=result.seconds)
+        except Exception as e:
+            # One failed run should not stop the sweep
+            logging.getLogger(__name__).exception("Backtest of %s on %s failed: %s", params, day, e)
+            row['error'] = str(e)
+        return row
+
+    @staticmethod
+    def _day_of(data, day: date) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        """
+        Candles, quotes and level2 of one day, found by binary search in time sorted data
+        """
+        start = np.datetime64(day, 'ns')
+        end = start + np.timedelta64(1, 'D')
+        candles, quotes, level2 = data
+        return candles.iloc[candles.index.searchsorted(start):candles.index.searchsorted(end)], \
+            quotes.iloc[quotes.index.searchsorted(start):quotes.index.searchsorted(end)], \
+            level2.iloc[level2['datetime'].searchsorted(start):level2['datetime'].searchsorted(end)]
+
+    @staticmethod
+    def walk_forward(table: pd.DataFrame, params: List[str], train_days: int, metric: str = 'pnl') \
+            -> pd.DataFrame:
+        """
+        Walk forward: for each day choose parameters with the best mean metric on previous train days
+        and take their metric on this day.
+        :param table: result of run()
+        :param params: names of parameter columns
+        :return: day, chosen parameters, their train and test metric
+        """
+        pivot = table.pivot_table(index=params, columns='day', values=metric)
+        days = list(pivot.columns)
+        rows = []
+        for i in range(train_days, len(days)):
+            train = pivot[days[i - train_days:i]].mean(axis=1)
+            best = train.idxmax()
+            rows.append({'day': days[i],
+                         **dict(zip(params, best if isinstance(best, tuple) else (best,))),
+                         f'train_{metric}': train[best],
+                         f'test_{metric}': pivot.at[best, days[i]]})
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def main(grid_path: str, out_path: str = "sweep.csv", cfg_dir: str = "cfg"):
+        """
+        Sweep entry point. Run from pytrade directory: python -m backtest.Sweep <grid.yaml> [out.csv]
+        Grid yaml has config key -> values to try in "grid", optional "days" and "train_days".
+        """
+        with open(grid_path) as f:
+            spec = yaml.safe_load(f)
+        logging.basicConfig(level=logging.INFO)
+        grid = spec["grid"]
+        table = Sweep(Backtest.load_config(cfg_dir), grid, spec.get("days")).run()
+        table.to_csv(out_path, index=False)
+        print(table)
+        if spec.get("train_days"):
+            print(Sweep.walk_forward(table, list(grid), int(spec["train_days"])))
+
+
+if __name__ == "__main__":
+    Sweep.main(*sys.argv[1:])
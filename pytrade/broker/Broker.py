@@ -1,6 +1,8 @@
 import logging
+import threading
 
 from connector.quik.WebQuikBroker import WebQuikBroker
+from feed.SubscriberRegistry import SubscriberRegistry
 from model.broker.Order import Order
 
 
@@ -8,6 +10,9 @@ class Broker:
     """
     Broker holds account info and can  make orders.
     Supports only simple buy/sell at the moment
+    Broker events can come from several connector threads: web quik sends orders and trades in reply lane,
+    accounts and limits in main lane, while strategies buy and sell from feed lane. Own state is locked,
+    subscribers are called without the lock and lock their shared state themselves.
     Todo: add different types of orders: stop, market ...
     """
 
@@ -19,16 +24,27 @@ class Broker:
         self._broker_connector = broker_connector
         self._broker_connector.subscribe_broker(self)
         self._logger.info("Initialized")
-        self._subscribers = set()
+        self._subscribers = SubscriberRegistry(
+            ['on_order_answer', 'on_trades_fx', 'on_trade_accounts', 'on_orders', 'on_trades', 'on_money_limits',
+             'on_limits', 'on_stock_limits', 'on_limit_received', 'on_reply', 'on_heartbeat'])
 
-        # Domain entities
-        self.orders = set()
+        # Domain entities, changed from broker connector threads
+        self._lock = threading.Lock()
+        self._orders = set()
+
+    @property
+    def orders(self) -> set:
+        """
+        Copy of orders, received so far
+        """
+        with self._lock:
+            return set(self._orders)
 
     def on_order_answer(self, msg):
         self._logger.info(f"Got msg: {msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_order_answer', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_order_answer'):
             # todo: refactor to data classes instead of quik msg
-            s.on_order_answer(msg)
+            callback(msg)
 
     def buy(self, class_code, sec_code, price, quantity):
         self._logger.info(f"Got buy command. class_code:{class_code}, sec_code: {sec_code}, "
@@ -49,17 +65,17 @@ class Broker:
 
     def on_trades_fx(self, msg):
         self._logger.debug(f"On trades fx. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_trades_fx', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_trades_fx'):
             # todo: refactor to data classes instead of quik msg
-            s.on_trades_fx(msg)
+            callback(msg)
 
     def on_trade_accounts(self, msg):
         # Information about my account. Usually one for stocks, one for futures.
         # {"msgid":21022,"trdacc":"NL0011100043","firmid":"NC0011100000","classList":["QJSIM"],"mainMarginClasses":["QJSIM"],"limitsInLots":0,"limitKinds":["0","1","2"]}
         self._logger.debug(f"On trade accounts. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_trade_accounts', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_trade_accounts'):
             # todo: refactor to data classes instead of quik msg
-            s.on_trade_accounts(msg)
+            callback(msg)
 
     def on_orders(self, order: Order):
         # Information about my orders
@@ -68,40 +84,41 @@ class Broker:
         # 'balance': 0, 'yield': 0, 'accr': 0, 'refer': '10058//', 'type': 24, 'firm': 'NC0011100000',
         # 'ucode': '10058', 'number': '5830057748', 'status': 2, 'price_currency': '', 'settle_currency': ''}
         self._logger.debug(f"On orders. order={order}")
-        self.orders.add(order)
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_orders', None)), self._subscribers)):
+        with self._lock:
+            self._orders.add(order)
+        for callback in self._subscribers.callbacks('on_orders'):
             # todo: refactor to data classes instead of quik msg
-            s.on_orders(order)
+            callback(order)
 
     def on_trades(self, msg):
         self._logger.debug(f"On trades. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_trades', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_trades'):
             # todo: refactor to data classes instead of quik msg
-            s.on_trades(msg)
+            callback(msg)
 
     def on_money_limits(self, msg):
         self._logger.debug(f"On money limits. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_money_limits', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_money_limits'):
             # todo: refactor to data classes instead of quik msg
-            s.on_money_limits(msg)
+            callback(msg)
 
     def on_limits(self, msg):
         self._logger.debug(f"On limits. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_limits', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_limits'):
             # todo: refactor to data classes instead of quik msg
-            s.on_limits(msg)
+            callback(msg)
 
     def on_stock_limits(self, msg):
         self._logger.debug(f"On stock limits. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_stock_limits', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_stock_limits'):
             # todo: refactor to data classes instead of quik msg
-            s.on_stock_limits(msg)
+            callback(msg)
 
     def on_limit_received(self, msg):
         self._logger.debug(f"Limit has received. msg={msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_limit_received', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_limit_received'):
             # todo: refactor to data classes instead of quik msg
-            s.on_limit_received(msg)
+            callback(msg)
 
     def subscribe_broker(self, subscriber):
         """
@@ -109,7 +126,7 @@ class Broker:
         :param subscriber broker class, inherited from broker'
         """
         # Register given feed callback
-        self._subscribers.add(subscriber)
+        self._subscribers.subscribe(subscriber)
 
     def on_reply(self, msg: str):
         """
@@ -117,15 +134,15 @@ class Broker:
         ToDo: add order to history if successful
         """
         self._logger.info(f"Got reply msg: {msg}")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_reply', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_reply'):
             # todo: refactor to data classes instead of quik msg
-            s.on_reply(msg)
+            callback(msg)
 
     def on_heartbeat(self):
         """
         Heartbeating reaction
         """
         self._logger.debug("Got heart beat")
-        for s in set(filter(lambda ss: callable(getattr(ss, 'on_heartbeat', None)), self._subscribers)):
+        for callback in self._subscribers.callbacks('on_heartbeat'):
             # todo: refactor to data classes instead of quik msg
-            s.on_heartbeat()
+            callback()
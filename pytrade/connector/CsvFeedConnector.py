@@ -1,39 +1,55 @@
 import collections
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+from feed.Storage import Storage
 from model.feed.Asset import Asset
+from model.feed.ArrayLevel2 import ArrayLevel2
 from model.feed.Level2 import Level2
-from model.feed.Level2Item import Level2Item
 from model.feed.Ohlcv import Ohlcv
 from model.feed.Quote import Quote
 
 
 class CsvFeedConnector:
     """
-    Reads the data from csv
+    Reads the data from csv files or, if csv paths are not set, from partitioned feed storage.
+    Produces the data as fast as possible, heartbeats are sent in simulated time of the data.
     """
 
-    def __init__(self, config, candles_path=None, quotes_path=None, level2_path=None):
+    def __init__(self, config, candles_path=None, quotes_path=None, level2_path=None, storage: Storage = None,
+                 heartbeat_interval: Optional[timedelta] = None):
+        """
+        :param heartbeat_interval: send heartbeat before the first event of each interval of data time
+        """
         self._logger = logging.getLogger(__name__)
         self._logger.info("Init " + __name__)
-        self.candles_path = candles_path or config["feed.csv.candles"]
-        self.quotes_path = quotes_path or config["feed.csv.quotes"]
-        self.level2_path = level2_path or config["feed.csv.level2"]
+        self.candles_path = candles_path or config.get("feed.csv.candles")
+        self.quotes_path = quotes_path or config.get("feed.csv.quotes")
+        self.level2_path = level2_path or config.get("feed.csv.level2")
+        self._storage = storage or Storage.of(config)
+        if heartbeat_interval is None and config.get("feed.csv.heartbeat.seconds"):
+            heartbeat_interval = timedelta(seconds=float(config["feed.csv.heartbeat.seconds"]))
+        self.heartbeat_interval = heartbeat_interval
 
         # Subscribers for data feed. {(class_code, sec_code): callback_func}
         self._feed_subscribers = collections.defaultdict(list)
+        self._subscribers_cache = {}
         self.candles, self.quotes, self.level2 = None, None, None
 
         # self.level2 = self.level2[~self.level2.index.duplicated(keep='first')].sort_index()
 
     def subscribe_feed(self, asset, subscriber):
         self._feed_subscribers[asset].append(subscriber)
+        self._subscribers_cache.clear()
 
-    def read_csvs(self) -> (
+    def read_csvs(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> (
             pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        if not (self.candles_path and self.quotes_path and self.level2_path):
+            return self.read_storage(start, end)
         # Read candles
         self._logger.info(f"Read candles from {self.candles_path}")
         self.candles = pd.read_csv(self.candles_path, parse_dates=True,
@@ -54,42 +70,141 @@ class CsvFeedConnector:
                                   names=['datetime', 'ticker', 'price', 'bid_vol', 'ask_vol'])
         return self.candles, self.quotes, self.level2
 
+    def read_storage(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> (
+            pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        """
+        Read candles, quotes and level2 from feed storage. Only partitions and rows inside time range are read.
+        """
+        self._logger.info(f"Read candles, quotes and level2 from storage, start: {start}, end: {end}")
+        # Rows of different tickers can have the same time, only repeated rows of one ticker are dropped
+        self.candles = self._storage.read('candles', start=start, end=end) \
+            .drop_duplicates(['datetime', 'ticker'], keep='first').set_index('datetime')
+        self.quotes = self._storage.read('quotes', start=start, end=end) \
+            .drop_duplicates(['datetime', 'ticker'], keep='first').set_index('datetime')
+        self.level2 = self._storage.read('level2', start=start, end=end)
+        return self.candles, self.quotes, self.level2
+
     def run(self):
-        # Read csvs to dataframes
-        self.read_csvs()
+        """
+        Produce candles, quotes and level2 in time order. Data, already read or set, is not read again.
+        """
+        if self.candles is None or self.quotes is None or self.level2 is None:
+            self.read_csvs()
         self._logger.info("Producing the data from csvs")
-        # Merge all datetimes
-        ticks = pd.concat([self.quotes.index.to_series(),
-                           self.candles.index.to_series(),
-                           self.level2['datetime']]).sort_values()
-        # Process each time tick and produce candle, level2 or quote
-        for dt, tick in ticks.iteritems():
-            # Produce next quote
-            if tick in self.quotes.index:
-                quote_dict = self.quotes.iloc[self.quotes.index.get_loc(dt)].to_dict()
-                quote = self._quote_of(dt, quote_dict)
-                for subscriber in self._feed_subscribers[quote.asset] + self._feed_subscribers[Asset.any_asset()]:
+        # Level2 snapshot is a group of rows with the same datetime and ticker
+        level2 = self.level2.sort_values(['datetime', 'ticker'], kind='mergesort')
+        level2_offsets = self._group_offsets(level2['datetime'].values, level2['ticker'].values)
+        level2_items = level2.to_numpy()
+        quotes_dt, quotes = self.quotes.index.tolist(), self.quotes.to_dict('records')
+        candles_dt, candles = self.candles.index.tolist(), self.candles.to_dict('records')
+
+        # Merge all sources into one time ordered stream: quote, candle, level2 for the same time
+        times = (self.quotes.index.values, self.candles.index.values, level2['datetime'].values[level2_offsets[:-1]])
+        sources, positions = self._merge_events(*times)
+        heartbeats = self._heartbeats_of(self._event_times(times, sources, positions), self.heartbeat_interval)
+        heartbeat_callbacks = self._heartbeat_callbacks()
+        for source, pos, is_heartbeat in zip(sources.tolist(), positions.tolist(), heartbeats.tolist()):
+            if is_heartbeat:
+                for callback in heartbeat_callbacks:
+                    callback()
+            if source == 0:
+                # Produce next quote
+                quote = self._quote_of(quotes_dt[pos], quotes[pos])
+                for subscriber in self._subscribers_of(quote.asset):
                     subscriber.on_quote(quote)
-            # Produce next candle
-            if tick in self.candles.index:
-                candle_dict = self.candles.iloc[self.candles.index.get_loc(dt)].to_dict()
-                candle = self._ohlcv_of(dt, candle_dict)
-                for subscriber in self._feed_subscribers[candle.asset] + self._feed_subscribers[Asset.any_asset()]:
+            elif source == 1:
+                # Produce next candle
+                candle = self._ohlcv_of(candles_dt[pos], candles[pos])
+                for subscriber in self._subscribers_of(candle.asset):
                     subscriber.on_candle(candle)
-            # Produce next level2
-            level2_items = self.level2[self.level2['datetime'] == tick].to_numpy()
-            if level2_items.size > 0:
-                level2 = CsvFeedConnector._level2_of(level2_items)
-                for subscriber in self._feed_subscribers[level2.asset] + self._feed_subscribers[Asset.any_asset()]:
+            else:
+                # Produce next level2
+                level2 = self._level2_of(level2_items[level2_offsets[pos]:level2_offsets[pos + 1]])
+                for subscriber in self._subscribers_of(level2.asset):
                     subscriber.on_level2(level2)
 
+    def _subscribers_of(self, asset: Asset) -> list:
+        """
+        Unique subscribers of the asset and of any asset
+        """
+        subscribers = self._subscribers_cache.get(asset)
+        if subscribers is None:
+            subscribers = []
+            for subscriber in self._feed_subscribers[asset] + self._feed_subscribers[Asset.any_asset()]:
+                if not any(subscriber is s for s in subscribers):
+                    subscribers.append(subscriber)
+            self._subscribers_cache[asset] = subscribers
+        return subscribers
+
+    def _heartbeat_callbacks(self) -> list:
+        """
+        Heartbeat callbacks of unique subscribers of all assets
+        """
+        callbacks, seen = [], set()
+        for subscribers in self._feed_subscribers.values():
+            for subscriber in subscribers:
+                callback = getattr(subscriber, 'on_heartbeat', None)
+                if id(subscriber) not in seen and callable(callback):
+                    seen.add(id(subscriber))
+                    callbacks.append(callback)
+        return callbacks
+
+    @staticmethod
+    def _event_times(times, sources: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """
+        Time of each merged event
+        """
+        event_times = np.empty(len(sources), dtype='datetime64[ns]')
+        for source, source_times in enumerate(times):
+            is_source = sources == source
+            event_times[is_source] = source_times[positions[is_source]]
+        return event_times
+
+    @staticmethod
+    def _heartbeats_of(event_times: np.ndarray, interval: Optional[timedelta]) -> np.ndarray:
+        """
+        True for events, starting a new heartbeat interval of data time. All False if interval is not set.
+        """
+        heartbeats = np.zeros(len(event_times), dtype=bool)
+        if interval and len(event_times):
+            periods = event_times.astype('datetime64[ns]').astype(np.int64) // int(interval.total_seconds() * 1e9)
+            heartbeats[1:] = periods[1:] != periods[:-1]
+        return heartbeats
+
+    @staticmethod
+    def _group_offsets(*keys) -> np.ndarray:
+        """
+        Start positions of groups of equal consecutive keys and the end position as the last element
+        """
+        size = len(keys[0])
+        if not size:
+            return np.zeros(1, dtype=int)
+        changed = np.zeros(size, dtype=bool)
+        changed[0] = True
+        for key in keys:
+            changed[1:] |= key[1:] != key[:-1]
+        return np.append(np.flatnonzero(changed), size)
+
+    @staticmethod
+    def _merge_events(*times) -> (np.ndarray, np.ndarray):
+        """
+        Merge time sorted sources into one event stream in O(n).
+        Returns source number and position inside the source for each event.
+        Events with equal time are ordered by source number.
+        """
+        all_times = np.concatenate(times)
+        sources = np.concatenate([np.full(len(t), i) for i, t in enumerate(times)])
+        positions = np.concatenate([np.arange(len(t)) for t in times])
+        # Stable sort finds sorted runs and merges them
+        order = np.argsort(all_times, kind='mergesort')
+        return sources[order], positions[order]
+
     @staticmethod
     def _level2_of(data) -> Level2:
         dt = pd.to_datetime(data[0][0])
         asset = Asset.of(data[0][1])
         # Price, bid, ask
-        level2_items = [Level2Item(data_item[2], data_item[3], data_item[4]) for data_item in data]
-        return Level2(dt, asset, level2_items)
+        return ArrayLevel2.of_rows(dt, asset, data[:, 2:5].astype(np.float64))
 
     @staticmethod
     def _ohlcv_of(dt: datetime, data: dict) -> Ohlcv:
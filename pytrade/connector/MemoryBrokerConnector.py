@@ -1,10 +1,58 @@
+import heapq
+import itertools
 import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedDict
+
+from model.broker.Order import Order
+from model.broker.Trade import Trade
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Quote import Quote
 
 
 class MemoryBrokerConnector:
     """
-    Broker emulator, keeps all trades in memory
+    Broker emulator, matches orders in memory against replayed level2 and quotes with price-time priority.
+    New order reaches the simulated exchange after latency. Crossing part of the order is filled at once by visible
+    depth of the opposite side, or by the last quote if it is newer than level2. The rest of the order rests
+    at its price behind the volume, visible at this price. Resting order is filled when the volume ahead of it
+    is gone and the level keeps decreasing, or when the market trades through its price.
+    Queue positions are offsets in the traded volume of the price level, so level2 update costs the number
+    of filled orders, not the number of resting ones.
+    Subscribe it to the feed before the strategy to receive quotes and level2.
     """
+    # Order statuses as in quik
+    ACTIVE, CANCELLED, FILLED = 1, 2, 3
+
+    class Resting:
+        """
+        Order inside simulated exchange
+        """
+        __slots__ = ('order', 'asset', 'remaining', 'position', 'is_cancelled')
+
+        def __init__(self, order: Order, asset: Asset):
+            self.order = order
+            self.asset = asset
+            self.remaining = order.quantity
+            # Traded volume of the level, when market volume ahead of the order is gone
+            self.position = 0.0
+            self.is_cancelled = False
+
+    class Level:
+        """
+        Resting orders at one price
+        """
+        __slots__ = ('orders', 'traded')
+
+        def __init__(self):
+            # Order number -> order, in time order
+            self.orders: Dict[str, 'MemoryBrokerConnector.Resting'] = {}
+            # Market volume, gone from the level since it was created
+            self.traded = 0.0
 
     def __init__(self, config):
         self._logger = logging.getLogger(__name__)
@@ -13,19 +61,311 @@ class MemoryBrokerConnector:
         self.trade_account = None
         self._broker_subscribers = []
 
+        # Latency of order delivery: constant plus uniform random jitter
+        self._latency = timedelta(milliseconds=float(config.get("broker.memory.latency.ms", 0)))
+        self._jitter = float(config.get("broker.memory.latency.jitter.ms", 0))
+        self._random = random.Random(config.get("broker.memory.seed"))
+        # Part of visible volume at the price, which new order stands behind. 1 is the end of the queue.
+        self._queue_factor = float(config.get("broker.memory.queue.factor", 1))
+
+        # Simulated time of the last market event
+        self._now: Optional[datetime] = None
+        # Last quote, last level2 as time, (price, volume) of bids and of asks from the best one,
+        # price -> (bid volume, ask volume). Level2 volume taken by our orders from the last level2.
+        self._quotes: Dict[Asset, Quote] = {}
+        self._depths: Dict[Asset, Tuple[datetime, list, list, dict]] = {}
+        self._taken: Dict[Asset, Dict[Tuple[float, bool], float]] = {}
+        # Resting orders of each asset: price -> level, for buy and sell side
+        self._bids: Dict[Asset, SortedDict] = {}
+        self._asks: Dict[Asset, SortedDict] = {}
+        self._resting: Dict[str, 'MemoryBrokerConnector.Resting'] = {}
+        # Orders on their way to exchange: arrive time, sequence number, order. Also by order number.
+        self._pending: List[Tuple[datetime, int, 'MemoryBrokerConnector.Resting']] = []
+        self._sent: Dict[str, 'MemoryBrokerConnector.Resting'] = {}
+        self._sequence = itertools.count()
+        self._is_matching = False
+        self._numbers = itertools.count(1)
+
+        # All orders in their last state and all trades
+        self.orders: Dict[str, Order] = {}
+        self.trades: List[Trade] = []
+
     def subscribe_broker(self, subscriber):
         self._broker_subscribers.append(subscriber)
 
     def run(self):
         return
 
-    def buy(self, class_code, sec_code, price, quantity):
-        self._logger.info(f"Got buy command. class_code:{class_code}, sec_code: {sec_code}, "
-                          f"price: {price}, quantity: {quantity}")
-        #self._broker_connector.buy(class_code, sec_code, price, quantity)
+    def buy(self, class_code, sec_code, price, quantity) -> Order:
+        self._logger.debug("Got buy command. class_code: %s, sec_code: %s, price: %s, quantity: %s",
+                           class_code, sec_code, price, quantity)
+        return self._new_order(Asset(class_code, sec_code), False, price, quantity)
+
+    def sell(self, class_code, sec_code, price, quantity) -> Order:
+        self._logger.debug("Got sell command. class_code: %s, sec_code: %s, price: %s, quantity: %s",
+                           class_code, sec_code, price, quantity)
+        return self._new_order(Asset(class_code, sec_code), True, price, quantity)
+
+    def cancel(self, number: str):
+        """
+        Cancel not filled part of the order
+        """
+        resting = self._resting.pop(number, None)
+        if resting is None:
+            # Maybe still on the way to exchange
+            resting = self._sent.pop(number, None)
+            if resting is None:
+                return
+        else:
+            side = (self._asks if resting.order.is_sell else self._bids)[resting.asset]
+            # The level can be taken out of the side by trade through now
+            level = side.get(resting.order.price)
+            if level is not None:
+                del level.orders[number]
+                if not level.orders:
+                    del side[resting.order.price]
+        resting.is_cancelled = True
+        self._on_order(self._order_of(resting.order, self._now or resting.order.dt, self.CANCELLED))
+
+    def on_quote(self, quote: Quote):
+        """
+        New quote from feed. Resting orders, crossed by the quote, are traded through.
+        """
+        self._arrive(quote.dt)
+        self._quotes[quote.asset] = quote
+        self._is_matching = True
+        if self._is_set(quote.ask):
+            self._trade_through(quote.asset, False, quote.ask)
+        if self._is_set(quote.bid):
+            self._trade_through(quote.asset, True, quote.bid)
+        self._is_matching = False
+        self._arrive(quote.dt)
+
+    def on_level2(self, level2: Level2):
+        """
+        New level2 from feed. Resting orders are traded through or move forward in their queues.
+        """
+        self._arrive(level2.dt)
+        asset = level2.asset
+        old = self._depths.get(asset)
+        self._depths[asset] = self._depth_of(level2)
+        self._taken[asset] = {}
+        self._is_matching = True
+        for is_sell in (False, True):
+            best = self._best(asset, not is_sell)
+            if best is not None:
+                self._trade_through(asset, is_sell, best)
+            if old:
+                self._on_decrease(asset, is_sell, old)
+        self._is_matching = False
+        self._arrive(level2.dt)
+
+    def on_candle(self, ohlcv):
+        return
+
+    def on_heartbeat(self):
+        for subscriber in self._broker_subscribers:
+            subscriber.on_heartbeat()
+
+    def _new_order(self, asset: Asset, is_sell: bool, price: float, quantity: int) -> Order:
+        """
+        Send new order to simulated exchange
+        """
+        now = self._now or datetime.now()
+        order = Order(number=str(next(self._numbers)), dt=now, class_code=asset.class_code,
+                      sec_code=asset.sec_code, is_sell=is_sell, account=self.trade_account, price=float(price),
+                      quantity=quantity, volume=price * quantity, status=self.ACTIVE)
+        arrive = now + self._latency
+        if self._jitter:
+            arrive += timedelta(milliseconds=self._random.uniform(0, self._jitter))
+        resting = self._sent[order.number] = self.Resting(order, asset)
+        heapq.heappush(self._pending, (arrive, next(self._sequence), resting))
+        if self._now is not None:
+            self._arrive(self._now)
+        return order
+
+    def _arrive(self, dt: datetime):
+        """
+        Put orders, arrived by the time, to exchange: fill crossing part and rest the remainder
+        """
+        self._now = dt
+        if self._is_matching:
+            # Orders from subscribers' callbacks arrive after current event is matched
+            return
+        self._is_matching = True
+        while self._pending and self._pending[0][0] <= dt:
+            arrive, _, resting = heapq.heappop(self._pending)
+            if resting.is_cancelled:
+                continue
+            del self._sent[resting.order.number]
+            resting.order = self._order_of(resting.order, arrive, self.ACTIVE)
+            self._on_order(resting.order)
+            self._take(resting, arrive)
+            if resting.remaining > 0 and not resting.is_cancelled:
+                self._rest(resting)
+        self._is_matching = False
+
+    def _take(self, resting: 'MemoryBrokerConnector.Resting', dt: datetime):
+        """
+        Fill crossing part of new order by visible depth, or by the last quote if level2 is older
+        """
+        order, asset = resting.order, resting.asset
+        depth, quote = self._depths.get(asset), self._quotes.get(asset)
+        if depth and (quote is None or depth[0] >= quote.dt):
+            # Opposite side from the best price
+            taken = self._taken[asset]
+            for price, volume in (depth[1] if order.is_sell else depth[2]):
+                if price < order.price if order.is_sell else price > order.price:
+                    break
+                key = (price, not order.is_sell)
+                quantity = min(resting.remaining, volume - taken.get(key, 0))
+                if quantity > 0:
+                    taken[key] = taken.get(key, 0) + quantity
+                    self._fill(resting, price, quantity, dt)
+                if not resting.remaining:
+                    break
+        elif quote:
+            price = quote.bid if order.is_sell else quote.ask
+            if self._is_set(price) and (price >= order.price if order.is_sell else price <= order.price):
+                self._fill(resting, price, resting.remaining, dt)
+
+    def _rest(self, resting: 'MemoryBrokerConnector.Resting'):
+        """
+        Put the order to the end of its price level
+        """
+        order = resting.order
+        sides = self._asks if order.is_sell else self._bids
+        side = sides.get(resting.asset)
+        if side is None:
+            side = sides[resting.asset] = SortedDict()
+        level = side.get(order.price)
+        if level is None:
+            level = side[order.price] = self.Level()
+        resting.position = level.traded + self._visible(resting.asset, order.is_sell, order.price) * self._queue_factor
+        level.orders[order.number] = resting
+        self._resting[order.number] = resting
+
+    def _trade_through(self, asset: Asset, is_sell: bool, price: float):
+        """
+        Fill all resting orders of the side, crossed by the opposite market price
+        """
+        side = (self._asks if is_sell else self._bids).get(asset)
+        if not side:
+            return
+        crossed = list(side.irange(maximum=price) if is_sell else side.irange(minimum=price))
+        for level_price in crossed:
+            for resting in list(side.pop(level_price).orders.values()):
+                self._fill(resting, level_price, resting.remaining, self._now)
+
+    def _on_decrease(self, asset: Asset, is_sell: bool, old: tuple):
+        """
+        Move resting orders forward in their queues by decrease of visible volume at their prices.
+        Volume, gone beyond the queue ahead of the order, is traded with the order.
+        Only orders from the head of the level are visited: the first one, not filled completely, blocks the rest.
+        """
+        side = (self._asks if is_sell else self._bids).get(asset)
+        if not side:
+            return
+        depth = self._depths[asset]
+        best = self._best(asset, is_sell)
+        for price in list(side.keys()):
+            old_volume, volume = self._volume_at(old, is_sell, price), self._volume_at(depth, is_sell, price)
+            if old_volume and not volume and best is not None and (price < best if is_sell else price > best):
+                # The level is gone and the market moved away behind it, all the level is traded
+                decrease = float('inf')
+            else:
+                decrease = old_volume - volume
+            if decrease <= 0:
+                continue
+            level = side[price]
+            traded = level.traded
+            if decrease < float('inf'):
+                level.traded += decrease
+            used = 0.0
+            while level.orders:
+                number, resting = next(iter(level.orders.items()))
+                passed = decrease - max(0.0, resting.position - traded) - used
+                if passed <= 0:
+                    break
+                quantity = min(resting.remaining, passed)
+                used += quantity
+                self._fill(resting, price, quantity, self._now)
+                # Time priority: next orders wait until this one is filled. Cancel removes the order itself.
+                if resting.remaining > 0 and not resting.is_cancelled:
+                    break
+                level.orders.pop(number, None)
+            if not level.orders and side.get(price) is level:
+                del side[price]
+
+    def _fill(self, resting: 'MemoryBrokerConnector.Resting', price: float, quantity: float, dt: datetime):
+        """
+        Trade the order by given price and quantity, emit the trade and the order if it is filled
+        """
+        order = resting.order
+        quantity = type(order.quantity)(quantity)
+        if quantity <= 0 or resting.is_cancelled:
+            return
+        resting.remaining -= quantity
+        self._on_trade(Trade(number=str(next(self._numbers)), order_number=order.number, dt=dt,
+                             class_code=order.class_code, sec_code=order.sec_code, is_sell=order.is_sell,
+                             account=order.account, price=price, quantity=quantity))
+        if not resting.remaining:
+            self._resting.pop(order.number, None)
+            self._on_order(self._order_of(order, dt, self.FILLED))
+
+    def _best(self, asset: Asset, is_sell: bool) -> Optional[float]:
+        """
+        Best market price of the side in the last level2: the lowest ask or the highest bid
+        """
+        depth = self._depths.get(asset)
+        levels = depth[2 if is_sell else 1] if depth else None
+        return levels[0][0] if levels else None
+
+    def _visible(self, asset: Asset, is_sell: bool, price: float) -> float:
+        depth = self._depths.get(asset)
+        return self._volume_at(depth, is_sell, price) if depth else 0.0
+
+    @staticmethod
+    def _volume_at(depth: tuple, is_sell: bool, price: float) -> float:
+        """
+        Market volume of the side at the price
+        """
+        volumes = depth[3].get(price)
+        return volumes[is_sell] if volumes else 0.0
+
+    @staticmethod
+    def _depth_of(level2: Level2) -> Tuple[datetime, list, list, dict]:
+        """
+        Level2 as lists of bids and asks from the best price and volumes by price. Absent volume is 0.
+        """
+        prices, bid_vols, ask_vols = level2.to_numpy().T.tolist()
+        # nan > 0 is False
+        volumes = {price: (bid_vol if bid_vol > 0 else 0.0, ask_vol if ask_vol > 0 else 0.0)
+                   for price, bid_vol, ask_vol in zip(prices, bid_vols, ask_vols)}
+        bids = [(price, bid_vol) for price, (bid_vol, _) in volumes.items() if bid_vol]
+        bids.reverse()
+        asks = [(price, ask_vol) for price, (_, ask_vol) in volumes.items() if ask_vol]
+        return level2.dt, bids, asks, volumes
+
+    @staticmethod
+    def _order_of(order: Order, dt: datetime, status: int) -> Order:
+        """
+        Order in new status
+        """
+        return Order(order.number, dt, order.class_code, order.sec_code, order.is_sell, order.account, order.price,
+                     order.quantity, order.volume, status)
+
+    @staticmethod
+    def _is_set(value) -> bool:
+        # Absent value is None or nan
+        return value is not None and value == value
 
-    def sell(self, class_code, sec_code, price, quantity):
-        self._logger.info(f"Got sell command. class_code:{class_code}, sec_code: {sec_code}, "
-                          f"price: {price}, quantity: {quantity}")
-        #self._broker_connector.sell(class_code, sec_code, price, quantity)
+    def _on_order(self, order: Order):
+        self.orders[order.number] = order
+        for subscriber in self._broker_subscribers:
+            subscriber.on_orders(order)
 
+    def _on_trade(self, trade: Trade):
+        self.trades.append(trade)
+        for subscriber in self._broker_subscribers:
+            subscriber.on_trades(trade)
@@ -0,0 +1,173 @@
+import glob
+import os
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from connector.CsvFeedConnector import CsvFeedConnector
+from feed.Storage import Storage
+from model.feed.ArrayLevel2 import ArrayLevel2
+from model.feed.Asset import Asset
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class StreamingFeedConnector(CsvFeedConnector):
+    """
+    Replays daily <ticker>_<kind>_<date> partitions of many tickers and days with bounded memory.
+    Partitions are read lazily in chunks, days of each ticker and kind are chained into one stream.
+    Streams are k-way merged by time in vectorized batches: rows before the earliest chunk end among all streams
+    are produced, later rows wait for next chunks. Memory holds about one chunk of each ticker and kind.
+    """
+    # Events with equal time go in this order, as in CsvFeedConnector
+    kinds = ['quotes', 'candles', 'level2']
+
+    class Stream:
+        """
+        Chunks of one ticker and kind, current chunk rows not produced yet
+        """
+        __slots__ = ('kind', 'asset', 'times', 'values', 'chunks', 'is_exhausted')
+
+        def __init__(self, kind: str, chunks: Iterator[Tuple[np.ndarray, np.ndarray, str]]):
+            self.kind = kind
+            self.asset = None
+            self.times = np.empty(0, dtype='datetime64[ns]')
+            self.values = None
+            self.chunks = chunks
+            self.is_exhausted = False
+
+        def load(self):
+            """
+            Append next not empty chunk to not produced rows
+            """
+            for times, values, ticker in self.chunks:
+                if not len(times):
+                    continue
+                self.asset = self.asset or Asset.of(ticker)
+                self.times = np.concatenate((self.times, times))
+                self.values = values if self.values is None else np.concatenate((self.values, values))
+                return
+            self.is_exhausted = True
+
+    def __init__(self, config, paths: Optional[str] = None, chunk_rows: Optional[int] = None,
+                 storage: Storage = None, heartbeat_interval: Optional[timedelta] = None):
+        """
+        :param paths: directory or glob of partitions, feed storage directory by default
+        :param chunk_rows: max rows of a partition in memory at once
+        """
+        super().__init__(config, storage=storage, heartbeat_interval=heartbeat_interval)
+        self.paths = paths or config.get("feed.stream.paths") or config.get("feed.storage.dir", "data")
+        self._chunk_rows = int(chunk_rows or config.get("feed.stream.chunk_rows", 100000))
+        self._last_period = None
+
+    def partitions(self) -> Dict[Tuple[str, str], List[str]]:
+        """
+        Partition paths of each ticker and kind, sorted by day.
+        Only partitions of subscribed assets, unless somebody is subscribed to any asset.
+        """
+        paths = glob.glob(os.path.join(self.paths, '*')) if os.path.isdir(self.paths) else glob.glob(self.paths)
+        tickers = None if self._feed_subscribers.get(Asset.any_asset()) else \
+            {str(asset).replace('/', '_') for asset, subscribers in self._feed_subscribers.items() if subscribers}
+        days = defaultdict(list)
+        for path in paths:
+            partition = self._storage.partition_of(path)
+            if partition and (tickers is None or partition[0] in tickers):
+                ticker, kind, day = partition
+                days[(ticker, kind)].append((day, path))
+        return {stream: [path for _, path in sorted(paths)] for stream, paths in sorted(days.items())}
+
+    def run(self):
+        """
+        Produce candles, quotes and level2 of all partitions in time order
+        """
+        partitions = self.partitions()
+        self._logger.info("Producing the data from %d partitions of %d tickers and kinds in %s",
+                          sum(map(len, partitions.values())), len(partitions), self.paths)
+        streams = [self.Stream(kind, self._chunks_of(kind, paths))
+                   for kind in self.kinds for (_, stream_kind), paths in partitions.items() if stream_kind == kind]
+        for stream in streams:
+            stream.load()
+        heartbeat_callbacks = self._heartbeat_callbacks()
+        self._last_period = None
+        while any(len(stream.times) for stream in streams):
+            # Rows before the watermark can't be preceded by rows of next chunks
+            ends = [stream.times[-1] for stream in streams if not stream.is_exhausted]
+            watermark = min(ends) if ends else None
+            parts = []
+            for stream in streams:
+                end = np.searchsorted(stream.times, watermark, 'left') if watermark is not None else len(stream.times)
+                parts.append((stream.times[:end], stream.values[:end] if end else None))
+                stream.times, stream.values = stream.times[end:], stream.values[end:] if end else stream.values
+            self._produce(streams, parts, heartbeat_callbacks)
+            for stream in streams:
+                if not stream.is_exhausted and (not len(stream.times) or stream.times[-1] == watermark):
+                    stream.load()
+
+    def _chunks_of(self, kind: str, paths: List[str]) -> Iterator[Tuple[np.ndarray, np.ndarray, str]]:
+        """
+        Times, values and ticker of each chunk of partitions, one by one
+        """
+        columns = self._storage.columns[kind]
+        for path in paths:
+            for chunk in self._storage.read_chunks(path, kind, self._chunk_rows):
+                if len(chunk):
+                    yield chunk['datetime'].values.astype('datetime64[ns]'), \
+                          chunk[columns].to_numpy(dtype=np.float64), chunk['ticker'].iat[0]
+
+    def _produce(self, streams: List['StreamingFeedConnector.Stream'], parts: list, heartbeat_callbacks: list):
+        """
+        Merge parts of streams by time and send events to subscribers.
+        Level2 snapshot is a group of rows of one stream with the same time.
+        """
+        times = np.concatenate([part_times for part_times, _ in parts])
+        if not len(times):
+            return
+        sources = np.concatenate([np.full(len(part_times), i) for i, (part_times, _) in enumerate(parts)])
+        positions = np.concatenate([np.arange(len(part_times)) for part_times, _ in parts])
+        # Stable sort keeps kinds order for equal times
+        order = np.argsort(times, kind='mergesort')
+        times, sources, positions = times[order], sources[order], positions[order]
+        is_level2 = np.array([stream.kind == 'level2' for stream in streams])[sources]
+        starts = np.ones(len(times), dtype=bool)
+        starts[1:] = ~(is_level2[1:] & (sources[1:] == sources[:-1]) & (times[1:] == times[:-1]))
+        starts = np.flatnonzero(starts)
+        ends = np.append(starts[1:], len(times))
+        heartbeats = self._heartbeats_since(times[starts])
+
+        values = [part_values.tolist() if part_values is not None and streams[i].kind != 'level2' else part_values
+                  for i, (_, part_values) in enumerate(parts)]
+        dts = pd.DatetimeIndex(times[starts]).tolist()
+        for dt, start, end, is_heartbeat in zip(dts, starts.tolist(), ends.tolist(), heartbeats.tolist()):
+            if is_heartbeat:
+                for callback in heartbeat_callbacks:
+                    callback()
+            source, pos = int(sources[start]), int(positions[start])
+            stream = streams[source]
+            subscribers = self._subscribers_of(stream.asset)
+            if stream.kind == 'quotes':
+                quote = Quote(dt, stream.asset, *values[source][pos])
+                for subscriber in subscribers:
+                    subscriber.on_quote(quote)
+            elif stream.kind == 'candles':
+                candle = Ohlcv(dt, stream.asset, *values[source][pos])
+                for subscriber in subscribers:
+                    subscriber.on_candle(candle)
+            else:
+                level2 = ArrayLevel2.of_rows(dt, stream.asset, values[source][pos:pos + end - start])
+                for subscriber in subscribers:
+                    subscriber.on_level2(level2)
+
+    def _heartbeats_since(self, event_times: np.ndarray) -> np.ndarray:
+        """
+        True for events, starting a new heartbeat interval, continuing intervals of previous batches
+        """
+        heartbeats = np.zeros(len(event_times), dtype=bool)
+        if self.heartbeat_interval and len(event_times):
+            periods = event_times.astype(np.int64) // int(self.heartbeat_interval.total_seconds() * 1e9)
+            heartbeats[1:] = periods[1:] != periods[:-1]
+            heartbeats[0] = self._last_period is not None and periods[0] != self._last_period
+            self._last_period = periods[-1]
+        return heartbeats
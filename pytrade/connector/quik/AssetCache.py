@@ -0,0 +1,64 @@
+import re
+from typing import Dict, Optional
+
+from pytrade.model.feed.Asset import Asset
+
+
+class AssetCache:
+    """
+    Bounded cache of quik asset strings like "QJSIM¦SBER¦0" to shared Asset instances.
+    Different strings of the same asset give the same instance, so dict lookups downstream match by identity.
+    Pinned assets, like subscribed ones, are never evicted and keep their instance.
+    """
+
+    _PATTERN = re.compile('(?P<class_code>[\\w\\d]+(?=¦))?¦?(?P<sec_code>[\\w\\d]+)')
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        :param maxsize: max number of cached quik strings and of shared assets, the oldest are evicted first
+        """
+        self._maxsize = maxsize
+        # Quik string -> shared asset
+        self._assets: Dict[str, Asset] = {}
+        # Asset -> shared instance of this asset
+        self._interned: Dict[Asset, Asset] = {}
+        # Asset -> shared instance, not evicted
+        self._pinned: Dict[Asset, Asset] = {}
+
+    def asset_of(self, quik_str: str) -> Optional[Asset]:
+        """
+        Shared asset of quik string, None for empty string
+        """
+        if not quik_str:
+            return None
+        asset = self._assets.get(quik_str)
+        if asset is None:
+            groups = self._PATTERN.match(quik_str)
+            asset = self.intern(Asset(groups["class_code"], groups["sec_code"]))
+            self._put(self._assets, quik_str, asset)
+        return asset
+
+    def intern(self, asset: Asset) -> Asset:
+        """
+        Shared instance of the asset. The first interned instance becomes the shared one.
+        """
+        interned = self._pinned.get(asset) or self._interned.get(asset)
+        if interned is None:
+            interned = asset
+            self._put(self._interned, asset, asset)
+        return interned
+
+    def pin(self, asset: Asset) -> Asset:
+        """
+        Shared instance of the asset, which is never evicted
+        """
+        pinned = self._pinned.get(asset)
+        if pinned is None:
+            pinned = self._pinned[asset] = self._interned.pop(asset, asset)
+        return pinned
+
+    def _put(self, cache: dict, key, value):
+        if len(cache) >= self._maxsize:
+            # Dict keeps insertion order, the first key is the oldest
+            del cache[next(iter(cache))]
+        cache[key] = value
@@ -0,0 +1,54 @@
+import importlib
+import json
+import logging
+from typing import Callable, Optional, Tuple
+
+
+class JsonDecoder:
+    """
+    Json decoder of raw web quik messages. Uses the fastest installed json library: orjson, simdjson,
+    standard json otherwise. All of them parse bytes directly, raw socket message is not converted to str.
+    """
+
+    # Backend name: decoding function name in backend module
+    backends = {'orjson': 'loads', 'simdjson': 'loads', 'json': 'loads'}
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        :param backend: orjson, simdjson or json. The first installed one if None.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.backend, self.decode = self._load(backend)
+        self._logger.info(f"Using {self.backend} json decoder")
+
+    def decode(self, raw_msg) -> dict:
+        """
+        Decode raw message, bytes or str, to dictionary. Replaced by backend function in constructor.
+        """
+        return json.loads(raw_msg)
+
+    @staticmethod
+    def available() -> list:
+        """
+        Names of installed backends, the fastest first
+        """
+        return [name for name in JsonDecoder.backends if JsonDecoder._import(name)]
+
+    @staticmethod
+    def _load(backend: Optional[str]) -> Tuple[str, Callable]:
+        if backend:
+            module = JsonDecoder._import(backend)
+            if not module:
+                raise ValueError(f"Json decoder backend {backend} is not installed")
+            return backend, getattr(module, JsonDecoder.backends[backend])
+        name = JsonDecoder.available()[0]
+        return name, getattr(JsonDecoder._import(name), JsonDecoder.backends[name])
+
+    @staticmethod
+    def _import(name: str):
+        if name not in JsonDecoder.backends:
+            raise ValueError(f"Unknown json decoder backend {name}, expected one of {list(JsonDecoder.backends)}")
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            return None
@@ -0,0 +1,110 @@
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from pytrade.metrics.Metrics import Metrics
+
+
+class MsgPipeline:
+    """
+    Raw socket messages pipeline. Messages are decoded on a pool of decoder threads
+    and routed by msgid to lanes. Each lane has own queue and consumer thread,
+    so a burst of feed messages does not delay broker replies in another lane.
+    Lane consumer takes decoded messages in the order they were received, so order inside a lane is kept.
+    Monotonic perf_counter_ns of socket receive goes beside the message, decoded message is not changed.
+    """
+
+    # Quik puts msgid first in the message, so it can be read without decoding whole json
+    _MSGID_PATTERN = re.compile(rb'"msgid"\s*:\s*"?(\w+)')
+    _MSGID_PREFIX_LEN = 64
+
+    def __init__(self, on_message: Callable[[dict, int], None], lanes: Dict[str, Iterable], default_lane: str,
+                 decoders: int = 2, decode: Optional[Callable[[bytes], dict]] = None, metrics: Optional[Metrics] = None):
+        """
+        :param on_message: decoded message and it's receive time callback, called from lane consumer thread
+        :param lanes: {lane name: msgids of the lane}
+        :param default_lane: lane name for msgids not listed in lanes
+        :param decoders: number of decoder threads
+        :param decode: raw message to dictionary function, standard json.loads if None
+        :param metrics: metrics to record queue wait, decode time, msgid counts and queue depths to
+        """
+        self._logger = logging.getLogger(__name__)
+        self._on_message = on_message
+        self._default_lane = default_lane
+        self.decode = decode or json.loads
+        self._lane_of_msgid = {str(msgid): lane for lane, msgids in lanes.items() for msgid in msgids}
+        self._queues: Dict[str, queue.Queue] = {lane: queue.Queue() for lane in list(lanes) + [default_lane]}
+        self._decoder_pool = ThreadPoolExecutor(max_workers=decoders, thread_name_prefix="decoder")
+        self._metrics = metrics or Metrics(is_enabled=False)
+        self._queue_latency = self._metrics.histogram(Metrics.Stage.QUEUE)
+        self._decode_latency = self._metrics.histogram(Metrics.Stage.DECODE)
+        self._decode = self._timed_decode if self._metrics.is_enabled else self.decode
+        for lane, lane_queue in self._queues.items():
+            self._metrics.gauge(f"queue.{lane}", lane_queue.qsize)
+
+    def put(self, raw_msg, received: Optional[int] = None):
+        """
+        Put raw message to the pipeline. Called from socket thread.
+        :param received: perf_counter_ns of socket receive, now if None
+        """
+        received = received or time.perf_counter_ns()
+        msgid = self.msgid_of(raw_msg)
+        self._metrics.count(msgid)
+        lane = self._lane_of_msgid.get(msgid, self._default_lane)
+        self._queues[lane].put((raw_msg, self._decoder_pool.submit(self._decode, raw_msg), received))
+
+    def _timed_decode(self, raw_msg) -> dict:
+        start = time.perf_counter_ns()
+        msg = self.decode(raw_msg)
+        self._decode_latency.record(time.perf_counter_ns() - start)
+        return msg
+
+    def qsizes(self) -> Dict[str, int]:
+        """
+        Number of messages waiting in each lane
+        """
+        return {lane: q.qsize() for lane, q in self._queues.items()}
+
+    def run(self, main_lane: Optional[str] = None):
+        """
+        Start consumer threads of all lanes. Consumer of main lane, if given, runs in current thread.
+        """
+        for lane in self._queues:
+            if lane != main_lane:
+                threading.Thread(target=self.run_lane, args=(lane,), name=f"lane-{lane}", daemon=True).start()
+        if main_lane:
+            self.run_lane(main_lane)
+
+    def run_lane(self, lane: str):
+        """
+        Lane consumer loop
+        """
+        self._logger.info(f"Starting {lane} messages loop")
+        lane_queue = self._queues[lane]
+        while True:
+            # get() method waits for the item then retuns it, using thread.Lock inside.
+            raw_msg, future, received = lane_queue.get()
+            self._queue_latency.record(time.perf_counter_ns() - received)
+            try:
+                self._on_message(future.result(), received)
+            except Exception as e:
+                self._logger.exception("%s, lane: %s, msg: %s", e, lane, raw_msg[:200])
+
+    @staticmethod
+    def msgid_of(raw_msg) -> Optional[str]:
+        """
+        Read msgid from raw message without decoding it
+        """
+        prefix = raw_msg[:MsgPipeline._MSGID_PREFIX_LEN]
+        if isinstance(prefix, str):
+            prefix = prefix.encode()
+        match = MsgPipeline._MSGID_PATTERN.search(prefix)
+        if not match:
+            # Not in the beginning, look through the whole message
+            match = MsgPipeline._MSGID_PATTERN.search(raw_msg if isinstance(raw_msg, bytes) else raw_msg.encode())
+        return match.group(1).decode() if match else None
@@ -12,3 +12,7 @@ class QueueName(object):
     STOCK_LIMITS = "pytrade.broker.stock.limits"
     LIMIT = "pytrade.broker.stock.limit"
     CANDLES = "pytrade.feed.candles"
+    # Binary frames of candles, quotes and level2, see WireCodec
+    FEED_BIN = "pytrade.feed.bin"
+    # Binary frames of orders
+    ORDERS_BIN = "pytrade.broker.orders.bin"
@@ -1,10 +1,14 @@
 import json
 import logging
 import random
+import time
+from typing import Optional
 
-from connector.quik.MsgConverter import MsgConverter
-from connector.quik.MsgId import MsgId
-from connector.quik.WebQuikConnector import WebQuikConnector
+from pytrade.connector.quik.MsgConverter import MsgConverter
+from pytrade.connector.quik.MsgId import MsgId
+# The same module as in WebQuikFeed, so feed and broker share one connector instance
+from pytrade.connector.quik.WebQuikConnector import WebQuikConnector
+from pytrade.metrics.Metrics import Metrics
 
 
 class WebQuikBroker:
@@ -50,6 +54,10 @@ class WebQuikBroker:
         # Create web quik connector
         self._connector = WebQuikConnector(config)
         self._connector.subscribe(self.callbacks)
+        self.metrics = self._connector.metrics
+        self._send_latency = self.metrics.histogram(Metrics.Stage.BROKER_SEND)
+        # Links sent orders to feed events, which caused them
+        self.tracer = self.metrics.tracer
         self._broker_subscribers = []
         # accounts dictionary class_code -> account info
         # Usually different accounts for securities, futures, forex ??
@@ -124,12 +132,14 @@ class WebQuikBroker:
         for s in self._broker_subscribers:
             s.on_reply(msg)
 
-    def get_order_msg(self, class_code: str, sec_code: str, is_buy: bool, price: float, quantity: int) -> str:
+    def get_order_msg(self, class_code: str, sec_code: str, is_buy: bool, price: float, quantity: int,
+                      transid: Optional[int] = None) -> str:
         """
         Prepares buy or sell order json for quik
+        :param transid: transaction id, random if None
         """
         msgdict = {
-            "transid": random.randint(1, 2 ^ 64),
+            "transid": transid or random.randint(1, 2 ** 31 - 1),
             "msgid": MsgId.ORDER,
             "ccode": class_code,
             "scode": sec_code,
@@ -150,17 +160,27 @@ class WebQuikBroker:
         """
         Send buy order to broker
         """
-        msg = self.get_order_msg(class_code=class_code, sec_code=sec_code, is_buy=True, price=price, quantity=quantity)
+        start = time.perf_counter_ns()
+        transid = random.randint(1, 2 ** 31 - 1)
+        msg = self.get_order_msg(class_code=class_code, sec_code=sec_code, is_buy=True, price=price, quantity=quantity,
+                                 transid=transid)
         self._logger.info(f"Sending buy message {msg}")
         self._connector.send(msg)
+        self._send_latency.record(time.perf_counter_ns() - start)
+        self.tracer.on_order(transid, f"{class_code}/{sec_code}", True, price, quantity)
 
     def sell(self, class_code, sec_code, price, quantity):
         """
         Send sell order to broker
         """
-        msg = self.get_order_msg(class_code=class_code, sec_code=sec_code, is_buy=False, price=price, quantity=quantity)
+        start = time.perf_counter_ns()
+        transid = random.randint(1, 2 ** 31 - 1)
+        msg = self.get_order_msg(class_code=class_code, sec_code=sec_code, is_buy=False, price=price, quantity=quantity,
+                                 transid=transid)
         self._logger.info(f"Sending sell message {msg}")
         self._connector.send(msg)
+        self._send_latency.record(time.perf_counter_ns() - start)
+        self.tracer.on_order(transid, f"{class_code}/{sec_code}", False, price, quantity)
 
     def kill_all_orders(self):
         """
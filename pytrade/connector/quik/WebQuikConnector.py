@@ -1,14 +1,18 @@
 import json
 import logging
-import queue
 import threading
+import time
 from collections import defaultdict
 from enum import Enum
+from typing import Optional
 
 import websocket
 from websocket import WebSocketApp
 
+from pytrade.connector.quik.JsonDecoder import JsonDecoder
 from pytrade.connector.quik.MsgId import MsgId
+from pytrade.connector.quik.MsgPipeline import MsgPipeline
+from pytrade.metrics.Metrics import Metrics
 
 
 class WebQuikConnector:
@@ -16,6 +20,10 @@ class WebQuikConnector:
     Socket interactions with WebQuik server.
     Use web quik server, login and password, provided by broker.
     Demo account could be created chere: https://junior.webquik.ru
+    Threading: callbacks of one lane are called one by one in receive order, callbacks of different lanes
+    run at the same time. Quotes, candles, level2 and heartbeats come in feed lane, order replies, orders and trades
+    in reply lane, the rest like auth, accounts and limits in main lane. So feed subscribers and broker subscribers
+    are called concurrently, state shared between them should be locked.
     ToDo: process quotes 21016 and level2 21014 messages instead of general data 21011
     """
 
@@ -27,6 +35,12 @@ class WebQuikConnector:
         DISCONNECTING = 3
         DISCONNECTED = 4
 
+    # Message processing lanes, each one has own thread
+    class Lane:
+        REPLY = "reply"
+        FEED = "feed"
+        MAIN = "main"
+
     _HEARTBEAT_SECONDS = 10
     _TIMEOUT_SECONDS = 9
 
@@ -61,7 +75,7 @@ class WebQuikConnector:
         self.status = self.Status.DISCONNECTED
 
         # Callbacks for different messages msgid
-        # Socket callback self._on_message will call these
+        # Pipeline callback self._dispatch will call these
         self._callbacks = {
             MsgId.PIN_REQ: self._on_pin_req,
             MsgId.STATUS: self._on_status,
@@ -82,7 +96,31 @@ class WebQuikConnector:
         }
         # Broker and feed, subscribed to message id
         self._subscribers = defaultdict(list)
-        self._msgqueue: queue.Queue = queue.Queue()
+        # Pipeline latencies, queue depths and message rates, shared with feed and broker of this connector
+        self.metrics = Metrics.of(config)
+        # Broker replies and orders go to their own priority lane, market data and heartbeats to feed lane
+        self._msg_pipeline = MsgPipeline(on_message=self._dispatch,
+                                         lanes={self.Lane.REPLY: [MsgId.SERVER_MSG,
+                                                                  MsgId.ORDER_REPLY,
+                                                                  MsgId.STOP_ORDER_REPLY,
+                                                                  MsgId.LINKED_STOP_ORDER_REPLY,
+                                                                  MsgId.CONDITIONAL_STOP_ORDER_REPLY,
+                                                                  MsgId.FX_ORDER_REPLY,
+                                                                  MsgId.REMOVE_ORDER_REPLY,
+                                                                  MsgId.REMOVE_STOP_ORDER_REPLY,
+                                                                  MsgId.TRANS_REPLY,
+                                                                  MsgId.ORDERS,
+                                                                  MsgId.TRADES],
+                                                self.Lane.FEED: [MsgId.QUOTES,
+                                                                 MsgId.GRAPH,
+                                                                 MsgId.LEVEL2,
+                                                                 MsgId.HEARTBEAT]},
+                                         default_lane=self.Lane.MAIN,
+                                         decoders=int(config.get("connector.webquik.decoders", 2)),
+                                         decode=JsonDecoder(config.get("connector.webquik.json")).decode,
+                                         metrics=self.metrics)
+        # Receive time of the message, dispatched in current lane thread
+        self._dispatching = threading.local()
         self._heartbeat_cnt = 0
         self._last_heartbeat = 0
         self._is_run = False
@@ -112,7 +150,7 @@ class WebQuikConnector:
         """
         Send message to web quik server, for example trade order or info request.
         """
-        self._logger.debug("Sending message: " + msg)
+        self._logger.debug("Sending message: %s", msg)
         self.websocket_app.send(msg)
 
     def _on_socket_open(self, src):
@@ -169,10 +207,10 @@ class WebQuikConnector:
 
     def _on_socket_message(self, src, raw_msg):
         """
-        Get message from socket and put into the queue
+        Get message from socket and put into the pipeline, stamped with monotonic receive time
         """
-        # Queue is thread-safe already
-        self._msgqueue.put(raw_msg)
+        # Queues are thread-safe already
+        self._msg_pipeline.put(raw_msg, time.perf_counter_ns())
 
     def _on_socket_heartbeat(self, *args):
         """
@@ -180,44 +218,45 @@ class WebQuikConnector:
         """
 
         msg = json.dumps({"msgid": MsgId.HEARTBEAT})
-        self._msgqueue.put(msg.encode())
+        self._msg_pipeline.put(msg.encode())
         self._heartbeat_cnt += 1
 
     def run_msg_loop(self):
         """
         Main messages processing loop
-        Socket thread reads messages from socket and pushes to the queue
-        This msg_loop function runs in another thread, it pops messages from the queue and processes them
+        Socket thread reads messages from socket and pushes them to the pipeline
+        Pipeline decodes messages on decoder threads and passes them to lanes: reply, feed and main.
+        Feed lane runs in this thread, other lanes in their own threads.
         """
         self._logger.info("Starting messages loop")
-        while True:
-            # get() method waits for the item then retuns it, using thread.Lock inside.
-            msg = self._msgqueue.get()
-            self._on_message(msg)
+        self._msg_pipeline.run(main_lane=self.Lane.FEED)
         self._logger.info("End messages loop")
 
-    def _on_message(self, raw_msg):
+    @property
+    def received(self) -> Optional[int]:
         """
-        Entry for message processing. Call specific processors for different messages.
+        Monotonic perf_counter_ns of socket receive of the message, being dispatched in current thread
         """
-        try:
-            strmsg = raw_msg.decode()
-            self._logger.debug('Got message %s', strmsg[:200])
-            msg = json.loads(strmsg)
-            # Find and execute callback function for this message
-            msgid = msg['msgid']
-
-            # Call internal callback is set up
-            msg_callback = self._callbacks.get(msgid)
-            if msg_callback:
-                # Don't send msg to consumers, process it in this class
-                msg_callback(msg)
+        return getattr(self._dispatching, 'received', None)
 
-            # Call external callback: broker or feed subscriber
-            for func in self._subscribers[msgid]:
-                func(msg)
-        except Exception as e:
-            self._logger.exception(f"{e}, msg:{raw_msg.decode()}")
+    def _dispatch(self, msg: dict, received: Optional[int] = None):
+        """
+        Call internal and external callbacks for decoded message
+        """
+        self._logger.debug('Got message %s', msg)
+        self._dispatching.received = received
+        # Find and execute callback function for this message
+        msgid = msg['msgid']
+
+        # Call internal callback is set up
+        msg_callback = self._callbacks.get(msgid)
+        if msg_callback:
+            # Don't send msg to consumers, process it in this class
+            msg_callback(msg)
+
+        # Call external callback: broker or feed subscriber
+        for func in self._subscribers[msgid]:
+            func(msg)
 
     def _on_msg_reply(self, msg):
         for func in self._subscribers[msg['msgid']]:
@@ -253,7 +292,8 @@ class WebQuikConnector:
         """
         Pass heart beat event to subscribers
         """
-        self._logger.debug(f"Got heart beat. msg queue size: {self._msgqueue.qsize()}")
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("Got heart beat. msg queue sizes: %s", self._msg_pipeline.qsizes())
 
     def subscribe(self, callbacks: {}):
         """
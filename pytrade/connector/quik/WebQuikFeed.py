@@ -1,11 +1,14 @@
 import itertools
 import logging
-import re
+import time
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
+from pytrade.connector.quik.AssetCache import AssetCache
 from pytrade.connector.quik.MsgId import MsgId
 from pytrade.connector.quik.WebQuikConnector import WebQuikConnector
+from pytrade.feed.OrderBook import OrderBook
+from pytrade.metrics.Metrics import Metrics
 from pytrade.model.feed.Asset import Asset
 from pytrade.model.feed.Level2 import Level2
 from pytrade.model.feed.Level2Item import Level2Item
@@ -21,14 +24,24 @@ class WebQuikFeed:
     Parse feed messages from web quik.
     """
 
+    # Quik asset strings to shared assets, the same for all feed instances
+    _assets = AssetCache()
+
     #    def __init__(self, connector: WebQuikConnector):
     def __init__(self, config):
         self._logger = logging.getLogger(__name__)
         self._connector = WebQuikConnector(config)
         self._connector.feed = self
+        # Feed takes metrics of its adapter
+        self.metrics = self._connector.metrics
+        self._parse_latency = self.metrics.histogram(Metrics.Stage.PARSE)
+        # Event being dispatched is the cause of orders, sent by subscribers
+        self._tracer = self.metrics.tracer
 
         # Subscribers for data feed. {(class_code, sec_code): callback_func}
         self._feed_subscribers = defaultdict(list)
+        # Live level2 of each asset
+        self._order_books = {}
         self.callbacks = {MsgId.TRADE_SESSION_OPEN: self.on_trade_session_open,
                           MsgId.QUOTES: self._on_quotes,
                           MsgId.GRAPH: self._on_candle,
@@ -49,13 +62,7 @@ class WebQuikFeed:
     @staticmethod
     def _asset_of(quik_str: str) -> Optional[Asset]:
         # Example: "QJSIM¦SBER¦0", we need to streap trailing \0
-        if not quik_str:
-            return None
-        # groups = re.search('([\\w\\d]+(?=\\|))*\\|*([\\w\\d]+)?', quik_str)
-        # groups = re.match('(?P<class_code>[\\w\\d]+(?=\\|))?\\|?(?P<sec_code>[\\w\\d]+)', quik_str)
-        groups = re.match('(?P<class_code>[\\w\\d]+(?=¦))?¦?(?P<sec_code>[\\w\\d]+)', quik_str)
-        asset = Asset(groups["class_code"], groups["sec_code"])
-        return asset
+        return WebQuikFeed._assets.asset_of(quik_str)
 
     @staticmethod
     def _ohlcv_of(asset_str: str, quik_ohlcv: dict) -> Ohlcv:
@@ -69,9 +76,17 @@ class WebQuikFeed:
             quik_ohlcv['v'])
 
     @staticmethod
-    def _quote_of(ticker: str, quik_quote: dict) -> Quote:
+    def _datetime_of(received: Optional[int]) -> datetime:
+        """
+        Wall clock time of monotonic socket receive time, now if not known
+        """
+        now = datetime.now()
+        return now - timedelta(microseconds=(time.perf_counter_ns() - received) // 1000) if received else now
+
+    @staticmethod
+    def _quote_of(ticker: str, quik_quote: dict, dt: Optional[datetime] = None) -> Quote:
         return Quote(
-            dt=datetime.now(),
+            dt=dt or datetime.now(),
             asset=WebQuikFeed._asset_of(ticker),
             bid=quik_quote.get('bid'),
             ask=quik_quote.get('offer'),
@@ -125,7 +140,8 @@ class WebQuikFeed:
         Add subsciber for feed data
         """
 
-        # Register given feed callback
+        # Register given feed callback. Assets parsed from quik messages are the same shared instance.
+        asset = self._assets.pin(asset)
         self._feed_subscribers[asset].append(subscriber)
 
         # Request this feed from server
@@ -146,13 +162,23 @@ class WebQuikFeed:
         Msg sample: {"msgid":21011,"dataResult":{"CETS\u00A6BYNRUBTODTOM":{"bid":0, "ask":10, last":0,"lastchange":...
         """
         self._logger.debug('Got bid/ask quotes: %s', data)
+        received = self._connector.received
+        dt = None
         for quik_asset in data['dataResult'].keys():
             asset = WebQuikFeed._asset_of(quik_asset)
             if asset in self._feed_subscribers.keys():
-                quote = WebQuikFeed._quote_of(quik_asset, data['dataResult'][quik_asset])
+                start = time.perf_counter_ns()
+                dt = dt or self._datetime_of(received)
+                quote = WebQuikFeed._quote_of(quik_asset, data['dataResult'][quik_asset], dt)
+                quote.received = received
+                self._parse_latency.record(time.perf_counter_ns() - start)
                 # Send to subscriber
-                for subscriber in self._feed_subscribers[asset] + self._feed_subscribers[Asset.any_asset()]:
-                    subscriber.on_quote(quote)
+                self._tracer.cause = quote
+                try:
+                    for subscriber in self._feed_subscribers[asset] + self._feed_subscribers[Asset.any_asset()]:
+                        subscriber.on_quote(quote)
+                finally:
+                    self._tracer.cause = None
 
     def _on_candle(self, data: dict):
         """
@@ -161,6 +187,7 @@ class WebQuikFeed:
         10:02:00","o":22649,"c":22647,"h":22649,"l":22646,"v":1889}]}} :return:
         """
         self._logger.debug('Got candles: %s', data)
+        received = self._connector.received
 
         # Todo: get rid of nested check
         for asset_str in data['graph'].keys():
@@ -172,54 +199,64 @@ class WebQuikFeed:
             asset_data = data['graph'][asset_str]
             for quik_ohlcv in asset_data:
                 # Each ohlcv for this asset
+                start = time.perf_counter_ns()
                 ohlcv = WebQuikFeed._ohlcv_of(asset_str,quik_ohlcv)
+                ohlcv.received = received
+                self._parse_latency.record(time.perf_counter_ns() - start)
 
                 # Send the candle to rabbitmq
                 # self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.CANDLES, body=str(ohlcv))
 
                 # Send data to subscribers
-                subscribers = self._feed_subscribers[asset] + self._feed_subscribers[self.any_asset]
-                for subscriber in set(filter(lambda s: s.on_candle, subscribers)):
-                    subscriber.on_candle(ohlcv)
+                subscribers = self._feed_subscribers[asset] + self._feed_subscribers[Asset.any_asset()]
+                self._tracer.cause = ohlcv
+                try:
+                    for subscriber in set(filter(lambda s: s.on_candle, subscribers)):
+                        subscriber.on_candle(ohlcv)
+                finally:
+                    self._tracer.cause = None
 
     def _on_level2(self, data: dict):
         """
         Level 2 data handler. Quik sends us full level2 snapshot.
+        Snapshot is applied to the asset's order book, only changed price levels are processed.
         """
         # Sample of level2. {'msgid': 21014, 'quotes': {'QJSIM¦SBER': {'lines': {'22806':
         # {'b': 234, 's': 0, 'by': 0, 'sy': 0}, '22841': {'b': 437, 's': 0, 'by': 0, 'sy': 0},
         # '22853': {'b': 60, 's': 0, 'by': 0, 'sy': 0}, '22878': {'b': 82, 's': 0, 'by': 0, 'sy': 0},
         # '22886': {'b': 138, 's': 0, 'by': 0, 'sy': 0}, '22895': {'b': 1, 's': 0, 'by': 0, 'sy': 0},...
 
+        received = self._connector.received
+        dt = None
         # Go through all assets in level2 message
-        # Todo: get rid of nested check
         for asset_str in data['quotes']:
-            # asset_class, asset_code = self._connector.asset2tuple(asset_str)
             asset = WebQuikFeed._asset_of(asset_str)
             if asset not in self._feed_subscribers:
                 continue
-            # {'22806':  {'b': 234, 's': 0, 'by': 0, 'sy': 0}, ..}
+            start = time.perf_counter_ns()
+            book = self._order_books.get(asset)
+            if book is None:
+                book = self._order_books[asset] = OrderBook(asset)
+            # {'22806':  {'b': 234, 's': 0, 'by': 0, 'sy': 0}, ..}, zero volume means no volume
             level2_quik: dict = data['quotes'][asset_str]['lines']
-            # level2 = {}
-            # Level2(datetime.now())
-            # Fill in level2 items
-            items = []
-            for key in level2_quik.keys():
-                price = int(key)
-                bid = level2_quik[key]['b']
-                if bid == 0:
-                    bid = None
-                ask = level2_quik[key]['s']
-                if ask == 0:
-                    ask = None
-                items.append(Level2Item(price, bid, ask))
-
-            level2 = Level2.of(datetime.now(),asset, items)
+            dt = dt or self._datetime_of(received)
+            changes = book.update(dt, ((float(price), line['b'] or None, line['s'] or None)
+                                       for price, line in level2_quik.items()))
+            level2 = book.level2()
+            level2.received = received
+            self._parse_latency.record(time.perf_counter_ns() - start)
 
             # If somebody subscribed to level2 of this asset, send her this data.
             subscribers = self._feed_subscribers[asset] + self._feed_subscribers[Asset.any_asset()]
-            for subscriber in filter(lambda s: s.on_level2, subscribers):
-                subscriber.on_level2(level2)
+            self._tracer.cause = level2
+            try:
+                for subscriber in filter(lambda s: s.on_level2, subscribers):
+                    subscriber.on_level2(level2)
+                    on_order_book = getattr(subscriber, 'on_order_book', None)
+                    if on_order_book:
+                        on_order_book(book, changes)
+            finally:
+                self._tracer.cause = None
 
     def on_heartbeat(self, *args):
         """
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO
+
+import pandas as pd
+from pandas import DataFrame
+
+from feed.Storage import Storage
+
+
+class CsvStorage(Storage):
+    """
+    Storage of market data in text csv files without header, one file per ticker, kind and day.
+    Files stay open between writes with buffered output. When the day of ticker and kind changes,
+    previous day file is synced to disk and closed.
+    """
+
+    extension = '.csv'
+
+    def __init__(self, data_dir: str = './data', buffer_size: int = 1 << 20):
+        super().__init__(data_dir)
+        self._buffer_size = buffer_size
+        # Partition path -> open file
+        self._files: Dict[str, TextIO] = {}
+
+    def _write_partition(self, df: DataFrame, path: str):
+        df.to_csv(self._file_of(path), header=False)
+
+    def flush(self):
+        for file in self._files.values():
+            file.flush()
+
+    def close(self):
+        for path in list(self._files):
+            self._close(path)
+
+    def _file_of(self, path: str) -> TextIO:
+        """
+        Open file of the partition. Files of previous days of the same ticker and kind are closed.
+        """
+        file = self._files.get(path)
+        if file is None:
+            stream = self._stream_of(path)
+            for old_path in [old_path for old_path in self._files if self._stream_of(old_path) == stream]:
+                self._close(old_path)
+            file = self._files[path] = open(path, 'a', buffering=self._buffer_size)
+        return file
+
+    def _stream_of(self, path: str) -> (str, str):
+        match = self._name_pattern.match(os.path.basename(path))
+        return match['ticker'], match['kind']
+
+    def _close(self, path: str):
+        file = self._files.pop(path)
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+
+    def read_chunks(self, path: str, kind: str, chunk_rows: int = 100000) -> Iterator[DataFrame]:
+        if path in self._files:
+            self._files[path].flush()
+        columns = ['datetime', 'ticker'] + self.columns[kind]
+        for chunk in pd.read_csv(path, names=self._names_of(path, columns), parse_dates=['datetime'],
+                                 chunksize=chunk_rows):
+            yield chunk.reindex(columns=columns)
+
+    def _read_partition(self, path: str, kind: str, columns: List[str], start: Optional[datetime],
+                        end: Optional[datetime]) -> DataFrame:
+        if path in self._files:
+            self._files[path].flush()
+        # Csv has no statistics to skip rows or columns, parse the whole file and leave required columns.
+        # Missing trailing columns, like last_change of quotes from Feed, are read as nan.
+        return pd.read_csv(path, names=self._names_of(path, ['datetime', 'ticker'] + self.columns[kind]),
+                           parse_dates=['datetime']).reindex(columns=columns)
+
+    @staticmethod
+    def _names_of(path: str, columns: List[str]) -> List[str]:
+        """
+        Names of columns, present in csv file without header: as many first columns as the first line has
+        """
+        with open(path) as file:
+            line = file.readline()
+        return columns[:line.count(',') + 1] if line.strip() else columns
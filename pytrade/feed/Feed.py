@@ -1,11 +1,19 @@
-import itertools
 import logging
-from collections import defaultdict
 from datetime import *
+from time import perf_counter_ns
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
 
+from feed.OrderBook import OrderBook
+from feed.SpillStore import SpillStore
+from feed.SubscriberRegistry import SubscriberRegistry
+from feed.TickStore import TickStore
+from metrics.Metrics import Metrics
 from model.feed.Asset import Asset
 from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
 from model.feed.Ohlcv import Ohlcv
 from model.feed.Quote import Quote
 
@@ -14,38 +22,128 @@ pd.options.display.width = 0
 
 class Feed:
     """
-    Base class for any feed. Keeps quotes and level2 in pandas dataframes.
+    Base class for any feed. Keeps candles, quotes and level2 in columnar per asset stores,
+    provides them to strategies as pandas dataframes.
     """
 
-    def __init__(self, feed_adapter):
+    # Value columns of each kind of data
+    columns = {'candles': ['open', 'high', 'low', 'close', 'volume'],
+               'quotes': ['bid', 'ask', 'last'],
+               'level2': ['price', 'bid_vol', 'ask_vol']}
+
+    def __init__(self, feed_adapter, retention: Optional[timedelta] = None,
+                 retentions: Optional[Dict[str, Optional[timedelta]]] = None, spill_dir: Optional[str] = None,
+                 metrics: Optional[Metrics] = None):
+        """
+        :param retention: keep data for this last interval only. None to keep the whole session.
+        :param retentions: retention of candles, quotes or level2, overrides common retention
+        :param spill_dir: save data, dropped by retention, to this directory to read it back in history()
+        :param metrics: metrics to record store and subscriber callback durations to
+        """
         self._logger = logging.getLogger(__name__)
 
         # Connecting to feed
         self._feed_adapter = feed_adapter
 
-        self._subscribers = defaultdict(list)
+        self._subscribers = SubscriberRegistry(['on_quote', 'on_candle', 'on_level2', 'on_order_book', 'on_heartbeat'])
         # self._feed.subscribe_feed(self.sec_class, self.sec_code, self)
 
         self.last_tick_time = self.last_heartbeat = datetime.min
 
         # Main data with price etc.
-        self.candles: pd.DataFrame = pd.DataFrame(
-            columns=['datetime', 'ticker', 'open', 'high', 'low', 'close', 'volume'])
-        self.quotes: pd.DataFrame = pd.DataFrame(
-            columns=['datetime', 'ticker', 'bid', 'ask', 'last']
-        )
-        self.candles.set_index(['datetime', 'ticker'], inplace=True)
-        self.quotes.set_index(['datetime', 'ticker'], inplace=True)
-        self.level2: pd.DataFrame = pd.DataFrame(columns=['datetime', 'ticker', 'price', 'bid_vol', 'ask_vol'])
-        # self.level2: pd.DataFrame = pd.DataFrame(columns=['datetime', 'ticker', 'price', 'items'])
-        # self.level2.set_index(['datetime', 'ticker', 'price'], inplace=True)
+        retentions = {**{kind: retention for kind in self.columns}, **(retentions or {})}
+        self._stores = {kind: TickStore(columns, retentions[kind],
+                                        SpillStore(spill_dir, kind) if spill_dir and retentions[kind] else None)
+                        for kind, columns in self.columns.items()}
+        self.candles_store = self._stores['candles']
+        self.quotes_store = self._stores['quotes']
+        self.level2_store = self._stores['level2']
+        # Live order book of each asset, if feed connector provides it
+        self.order_books: Dict[Asset, OrderBook] = {}
+        metrics = metrics or Metrics(is_enabled=False)
+        self._store_latency = metrics.histogram(Metrics.Stage.FEED_STORE)
+        self._strategy_latency = metrics.histogram(Metrics.Stage.STRATEGY)
+
+    @staticmethod
+    def of(feed_adapter, config) -> 'Feed':
+        """
+        Feed with retention and spill directory from config and metrics of feed adapter if it has them
+        """
+        def minutes(key):
+            value = config.get(key)
+            return timedelta(minutes=float(value)) if value else None
+
+        return Feed(feed_adapter, minutes("feed.retention.minutes"),
+                    {kind: minutes(f"feed.retention.{kind}.minutes") for kind in Feed.columns
+                     if config.get(f"feed.retention.{kind}.minutes") is not None},
+                    config.get("feed.spill.dir") or None,
+                    getattr(feed_adapter, 'metrics', None))
+
+    @property
+    def candles(self) -> pd.DataFrame:
+        """
+        Candles of all assets in memory, indexed by datetime and ticker. See history() for dropped ones.
+        """
+        return self.candles_store.to_multiindex_df()
+
+    @property
+    def quotes(self) -> pd.DataFrame:
+        """
+        Quotes of all assets in memory, indexed by datetime and ticker. See history() for dropped ones.
+        """
+        return self.quotes_store.to_multiindex_df()
+
+    @property
+    def level2(self) -> pd.DataFrame:
+        """
+        Level2 items of all assets in memory with price, bid_vol, ask_vol columns, indexed by datetime and ticker.
+        Values of one asset are not copied, reset_index() copies them. See history() for dropped ones.
+        """
+        return self.level2_store.to_multiindex_df()
+
+    def window(self, asset: Asset, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               kind: str = 'quotes') -> pd.DataFrame:
+        """
+        Candles, quotes or level2 of the asset inside [start, end], indexed by datetime.
+        Found by binary search in the asset's time sorted store, values are not copied if they are in memory.
+        The part dropped by retention is read back from spill directory.
+        """
+        return self._stores[kind].window(asset, start, end)
+
+    def last_n(self, asset: Asset, n: int, kind: str = 'quotes') -> pd.DataFrame:
+        """
+        Last n candles, quotes or level2 items of the asset, indexed by datetime. Values are not copied.
+        """
+        return self._stores[kind].last_n(asset, n)
+
+    def asof(self, asset: Asset, dt: datetime, kind: str = 'quotes') -> pd.DataFrame:
+        """
+        Last candle or quote at or before dt, or all items of the last level2 snapshot, indexed by datetime.
+        Values are not copied.
+        """
+        return self._stores[kind].asof(asset, dt)
+
+    def history(self, kind: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Candles, quotes or level2 inside [start, end] including data dropped from memory to spill directory.
+        Dataframe has the same shape as candles, quotes or level2 property.
+        """
+        df = self._stores[kind].to_multiindex_df(start, end, is_history=True)
+        return df.reset_index() if kind == 'level2' else df
+
+    def close(self):
+        """
+        Remove spilled data
+        """
+        for store in self._stores.values():
+            store.close()
 
     def subscribe_feed(self, asset: Asset, subscriber):
         """
         Add subsciber for feed data
         """
         # Register given feed callback
-        self._subscribers[asset].append(subscriber)
+        self._subscribers.subscribe(subscriber, asset)
         self._feed_adapter.subscribe_feed(asset, self)
 
     @staticmethod
@@ -58,56 +156,64 @@ class Feed:
         """
         self.last_tick_time = datetime.now()
 
-        self._logger.debug(f"Received quote, asset: {quote.asset}, quote: {quote}")
-        # Set to quotes pandas dataframe
-        self.quotes.at[(quote.dt, str(quote.asset)), ['bid', 'ask', 'last']] = [quote.bid, quote.ask, quote.last]
+        self._logger.debug("Received quote, asset: %s, quote: %s", quote.asset, quote)
+        # Set to quotes store
+        start = perf_counter_ns()
+        self.quotes_store.buffer(quote.asset).upsert(quote.dt, [quote.bid, quote.ask, quote.last])
+        stored = perf_counter_ns()
+        self._store_latency.record(stored - start)
         # Push the quote up to subscribers
-        subscribers = self._subscribers[quote.asset] + self._subscribers[Asset("*", "*")]
-        push_list = set(filter(lambda s: callable(getattr(s, 'on_quote', None)), subscribers))
-        for subscriber in push_list:
-            subscriber.on_quote(quote)
+        for callback in self._subscribers.callbacks('on_quote', quote.asset):
+            callback(quote)
+        self._strategy_latency.record(perf_counter_ns() - stored)
 
     def on_candle(self, ohlcv: Ohlcv):
         """
         New ohlc data received
         """
         # Add ohlc to data
-        self.candles.at[(ohlcv.dt, str(ohlcv.asset)),
-                        ['open', 'high', 'low', 'close', 'volume']] = [ohlcv.o, ohlcv.h, ohlcv.l, ohlcv.c, ohlcv.v]
-        self._logger.debug(f"Received candle for asset {ohlcv.asset}, candle: {ohlcv}")
+        start = perf_counter_ns()
+        self.candles_store.buffer(ohlcv.asset).upsert(ohlcv.dt, [ohlcv.o, ohlcv.h, ohlcv.l, ohlcv.c, ohlcv.v])
+        stored = perf_counter_ns()
+        self._store_latency.record(stored - start)
+        self._logger.debug("Received candle for asset %s, candle: %s", ohlcv.asset, ohlcv)
 
         #  Push data to subscribers
-        subscribers = self._subscribers[ohlcv.asset] + self._subscribers[Asset("*", "*")]
-        push_list = set(filter(lambda s: callable(getattr(s, 'on_candle', None)), subscribers))
-        for subscriber in push_list:
-            subscriber.on_candle(ohlcv)
+        for callback in self._subscribers.callbacks('on_candle', ohlcv.asset):
+            callback(ohlcv)
+        self._strategy_latency.record(perf_counter_ns() - stored)
         self.last_tick_time = datetime.now()
 
     def on_level2(self, level2: Level2):
         """
         New level2 data received
         """
-        self._logger.debug(f"Received level2 {level2}")
-        asset_str = str(level2.asset)
-        # Add new level2 records to dataframe
-        for item in level2.items:
-            self.level2 = self.level2.append({'datetime': level2.dt, 'ticker': asset_str, 'price': item.price,
-                                              'ask_vol': item.ask_vol, 'bid_vol': item.bid_vol}, ignore_index=True)
-            # self.level2.at[(level2.dt, asset_str, item.price),['datetime','bid_vol', 'ask_vol','price']] = [level2.dt, item.price,item.bid_vol, item.ask_vol]
+        self._logger.debug("Received level2 %s", level2)
+        # Add new level2 records to the store in one block
+        start = perf_counter_ns()
+        self.level2_store.buffer(level2.asset).append_many(level2.dt, level2.to_numpy())
+        stored = perf_counter_ns()
+        self._store_latency.record(stored - start)
         # Push level2 event up
-        subscribers = self._subscribers[level2.asset] + self._subscribers[Asset("*", "*")]
-        push_list = set(filter(lambda s: callable(getattr(s, 'on_level2', None)), subscribers))
-        for subscriber in push_list:
-            subscriber.on_level2(level2)
+        for callback in self._subscribers.callbacks('on_level2', level2.asset):
+            callback(level2)
+        self._strategy_latency.record(perf_counter_ns() - stored)
+
+    def on_order_book(self, book: OrderBook, changes: List[Level2Item]):
+        """
+        Order book is updated by new level2 snapshot
+        :param changes: changed price levels, removed levels have None volumes
+        """
+        self.order_books[book.asset] = book
+        for callback in self._subscribers.callbacks('on_order_book', book.asset):
+            callback(book, changes)
 
     def on_heartbeat(self):
         """
         Heartbeat received
         """
         self._logger.debug("Got heartbeat event")
-        subscribers = set(itertools.chain.from_iterable(self._subscribers.values()))
-        push_list = set(filter(lambda s: callable(getattr(s, "on_heartbeat", None)), subscribers))
-        for subscriber in push_list:
-            subscriber.on_heartbeat()
+        for callback in self._subscribers.all_callbacks('on_heartbeat'):
+            callback()
 
         self.last_heartbeat = datetime.now()
@@ -1,88 +1,131 @@
-import datetime
 import logging
-import datetime as dt
-import os
-from collections import defaultdict
+import queue
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
+
+from feed.CsvStorage import CsvStorage
 from feed.Feed import Feed
+from feed.Storage import Storage
 from model.feed.Asset import Asset
 
 
 class Feed2Csv:
     """
-    Receive ticks and level 2 and persist to csv
+    Receive ticks and level 2 and persist to csv or another storage.
+    Keeps a cursor per kind and asset. Each write interval only rows after the cursors are copied to writer thread.
+    Writer thread makes dataframes and writes them to storage, the feed thread doesn't wait for it.
     """
-    def __init__(self, feed: Feed,  data_dir: str = './data'):
+
+    # Kinds, whose last row is replaced by feed until the next row comes
+    _upserted_kinds = {'candles', 'quotes'}
+
+    def __init__(self, feed: Feed, data_dir: str = './data', storage: Storage = None,
+                 write_interval: timedelta = timedelta(seconds=30)):
         self._logger = logging.getLogger(__name__)
         self._feed = feed
-        self._feed.subscribe_feed(Asset("*","*"), self)
+        self._stores = {'candles': feed.candles_store, 'quotes': feed.quotes_store, 'level2': feed.level2_store}
+        # (kind, asset) -> position of the first not written row in feed store
+        self._cursors: Dict[Tuple[str, Asset], int] = {}
 
         # Dump periodically
-        self._write_interval = dt.timedelta(seconds=30)
+        self._write_interval = write_interval.total_seconds()
         self._data_dir = data_dir
-        self._logger.info("Candles and level2 will be persisted each %s to %s", self._write_interval, self._data_dir)
-        self._last_write_time = dt.datetime.min
-        self._last_processed_times = defaultdict(lambda: pd.Timestamp.min)
-        self.is_writing = False
+        self._storage = storage or CsvStorage(data_dir)
+        self._logger.info("Candles and level2 will be persisted each %s to %s", write_interval, self._data_dir)
+        self._last_write_time = time.monotonic()
+
+        # New rows of (kind, asset, times, values), None to stop
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self.run_writer, name="feed-writer", daemon=True)
+        self._writer.start()
+        self._feed.subscribe_feed(Asset("*", "*"), self)
+
+    def on_candle(self, ohlcv):
+        self._on_tick()
+
+    def on_quote(self, quote):
+        self._on_tick()
 
-    def write(self, df, tag):
+    def on_level2(self, level2):
+        self._on_tick()
+
+    def on_heartbeat(self):
         """
-        Group dataframe by ticker and day. Write each group to separate file
-        :param df: dataframe to group and write
-        :param tag: text tag, will be appended to file name
+        Heartbeat received
         """
-        if self.is_writing:
-            self._logger.debug(f"Previous {tag} writing is still in progress, exiting.")
-            return
-        try:
-            self.is_writing = True
-            self._logger.debug(f"Writing {tag} to csv")
-
-            # Get the data, not saved previously
-            last_processed_time = self._last_processed_times[tag]
-            df = df[df.index.get_level_values(0) > last_processed_time]
-
-            # Append to csv if new data exists
-            if not df.empty:
-                df.groupby([df.index.get_level_values(0).dayofyear, df.index.get_level_values(1)]).apply(
-                    lambda df_daily: self._write_ticker_by_day(df_daily, tag))
-                self._last_processed_times[tag] = df.index.get_level_values(0).max()
-            else:
-                self._logger.debug(f"{tag} is empty, nothing to write")
-        except Exception as ex:
-            self._logger.error(ex)
-        finally:
-            self.is_writing = False
-
-    def _write_ticker_by_day(self, df: DataFrame, data_type):
+        self._logger.debug("Got heartbeat")
+        self._on_tick()
+
+    def _on_tick(self):
         """
-        Compose file name from ticker and
-        :param df: Dataframe, all rows have the same day and ticker in index
-        :param data_type: tag to use in file name
+        Hand off new rows if write interval elapsed. Csv feed has no heartbeats, so it's checked on each tick.
         """
-        # Form file name
-        date = df.first_valid_index()[0].date()
-        ticker = df.first_valid_index()[1].replace('/','_')
-        df.first_valid_index()[1].replace('/', '_')
-        file_name = '%s_%s_%s.csv' % (ticker, data_type, date.strftime('%Y-%m-%d'))
-        file_path = os.path.join(self._data_dir, file_name)
-        self._logger.debug("Writing %s to %s", data_type, os.path.abspath(file_path))
-        # Write to file
-        df.to_csv(file_path, mode='a', header=False)
+        now = time.monotonic()
+        if now - self._last_write_time >= self._write_interval:
+            self._last_write_time = now
+            self.write()
 
-    def on_heartbeat(self):
+    def write(self, is_final: bool = False):
         """
-        Heartbeat received
+        Pass rows added since previous write to writer thread. Called from the feed thread.
+        The last candle or quote can still be updated by feed, so it's held back until a newer row comes.
+        :param is_final: write all rows including the last ones, no more updates will come
         """
-        self._logger.debug("Got heartbeat")
-        # If time interval elapsed, write dataframe to csv
-        if (dt.datetime.now() - self._last_write_time) < self._write_interval:
-            return
-        self._logger.debug("Writing to csv")
-        self._last_write_time = dt.datetime.now()
-        self.write(self._feed.level2, 'level2')
-        self.write(self._feed.candles, 'candles')
-        self.write(self._feed.quotes, 'quotes')
-        self._last_write_time = dt.datetime.now()
+        for kind, store in self._stores.items():
+            for asset in store.assets:
+                buffer = store.buffer(asset)
+                cursor = self._cursors.get((kind, asset), 0)
+                end = buffer.end - (1 if kind in self._upserted_kinds and not is_final else 0)
+                if end <= cursor:
+                    continue
+                times, values = buffer.since(cursor)
+                if buffer.end - cursor > len(times):
+                    self._logger.warning("%d %s rows of %s left feed retention window before written",
+                                         buffer.end - cursor - len(times), kind, asset)
+                # Copy, feed thread keeps appending to the buffer while writer reads
+                rows = len(times) - (buffer.end - end)
+                self._queue.put((kind, asset, times[:rows].copy(), values[:rows].copy()))
+                self._cursors[(kind, asset)] = end
+
+    def close(self):
+        """
+        Write the rest of rows, wait for writer thread and close storage files
+        """
+        self.write(is_final=True)
+        self._queue.put(None)
+        self._writer.join()
+        self._storage.close()
+
+    def run_writer(self):
+        """
+        Writer thread loop: split new rows by day and append them to storage partitions
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, asset, times, values = item
+            try:
+                self._write_rows(kind, asset, times, values)
+            except Exception as e:
+                self._logger.exception("Writing %s of %s failed: %s", kind, asset, e)
+            if self._queue.empty():
+                self._storage.flush()
+
+    def _write_rows(self, kind: str, asset: Asset, times: np.ndarray, values: np.ndarray):
+        """
+        Write rows of one kind and asset, sorted by time
+        """
+        days = times.astype('datetime64[D]')
+        bounds = [0] + (np.flatnonzero(days[1:] != days[:-1]) + 1).tolist() + [len(times)]
+        ticker = str(asset)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            index = pd.MultiIndex.from_arrays([pd.DatetimeIndex(times[start:end]), [ticker] * (end - start)],
+                                              names=['datetime', 'ticker'])
+            self._storage.write(DataFrame(values[start:end], columns=self._stores[kind].columns, index=index), kind)
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+
+
+class OrderBook:
+    """
+    Live level2 of one asset. Each new full snapshot is applied as a diff against previous state:
+    only changed price levels are replaced, unchanged Level2Item objects are kept and reused.
+    """
+
+    def __init__(self, asset: Asset):
+        self.asset = asset
+        self.dt: Optional[datetime] = None
+        # Price -> level2 item
+        self._levels: Dict[float, Level2Item] = {}
+        # Sorted prices of all levels, of levels with bid volume and of levels with ask volume
+        self._prices = SortedList()
+        self._bids = SortedList()
+        self._asks = SortedList()
+
+    def update(self, dt: datetime, levels: Iterable[Tuple[float, Optional[float], Optional[float]]]) \
+            -> List[Level2Item]:
+        """
+        Apply new full snapshot
+        :param levels: (price, bid volume, ask volume) of each level, absent volume is None
+        :return: changed levels. Levels absent in the snapshot are returned with None volumes.
+        """
+        self.dt = dt
+        changes = []
+        prices = set()
+        for price, bid_vol, ask_vol in levels:
+            if bid_vol is None and ask_vol is None:
+                # Empty level is the same as absent one
+                continue
+            prices.add(price)
+            item = self._levels.get(price)
+            if item is None or item.bid_vol != bid_vol or item.ask_vol != ask_vol:
+                new_item = Level2Item(price, bid_vol, ask_vol)
+                self._set(item, new_item)
+                changes.append(new_item)
+        if len(self._levels) > len(prices):
+            # Some previous levels are not in the snapshot
+            for price in [price for price in self._levels if price not in prices]:
+                self._set(self._levels[price], Level2Item(price, None, None))
+                changes.append(Level2Item(price, None, None))
+        return changes
+
+    @property
+    def items(self) -> List[Level2Item]:
+        """
+        All levels sorted by price
+        """
+        return [self._levels[price] for price in self._prices]
+
+    @property
+    def best_bid(self) -> Optional[Level2Item]:
+        return self._levels[self._bids[-1]] if self._bids else None
+
+    @property
+    def best_ask(self) -> Optional[Level2Item]:
+        return self._levels[self._asks[0]] if self._asks else None
+
+    def top_bids(self, n: int) -> List[Level2Item]:
+        """
+        Up to n levels with bid volume, the best first
+        """
+        return [self._levels[price] for price in self._bids.islice(max(len(self._bids) - n, 0), reverse=True)]
+
+    def top_asks(self, n: int) -> List[Level2Item]:
+        """
+        Up to n levels with ask volume, the best first
+        """
+        return [self._levels[price] for price in self._asks.islice(0, n)]
+
+    def level2(self) -> Level2:
+        """
+        Current state as level2 event. Items are already sorted by price, no sorting is done.
+        """
+        return Level2(self.dt, self.asset, self.items)
+
+    def _set(self, item: Optional[Level2Item], new_item: Level2Item):
+        """
+        Replace level item, update sorted prices only where the level appears or disappears
+        """
+        price = new_item.price
+        old_bid = item is not None and item.bid_vol is not None
+        old_ask = item is not None and item.ask_vol is not None
+        new_bid, new_ask = new_item.bid_vol is not None, new_item.ask_vol is not None
+        for sorted_prices, old, new in ((self._bids, old_bid, new_bid), (self._asks, old_ask, new_ask)):
+            if new and not old:
+                sorted_prices.add(price)
+            elif old and not new:
+                sorted_prices.remove(price)
+        if not new_bid and not new_ask:
+            del self._levels[price]
+            self._prices.remove(price)
+        else:
+            if item is None:
+                self._prices.add(price)
+            self._levels[price] = new_item
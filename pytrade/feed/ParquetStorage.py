@@ -0,0 +1,102 @@
+import os
+import re
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import pandas as pd
+from pandas import DataFrame
+
+from feed.Storage import Storage
+
+
+class ParquetStorage(Storage):
+    """
+    Storage of market data in typed compressed parquet files. Requires pyarrow.
+    Each partition is a directory of parquet parts, each write adds a new part. When a partition gets
+    max_parts parts, and on close, the parts are compacted to one.
+    Reading pushes down columns and time range to parquet row groups.
+    """
+
+    extension = '.parquet'
+    _part_pattern = re.compile(r'^part-(?P<number>\d+)\.parquet$')
+
+    def __init__(self, data_dir: str = './data', compression: str = 'zstd', max_parts: int = 16):
+        """
+        :param max_parts: compact partition parts to one when their number reaches this
+        """
+        super().__init__(data_dir)
+        # Fail early if pyarrow is not installed
+        import pyarrow
+        self._compression = compression
+        self._max_parts = max_parts
+        # Partitions, written by this storage, to compact on close
+        self._written = set()
+
+    def _write_partition(self, df: DataFrame, path: str):
+        df = df.reset_index()
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df['ticker'] = df['ticker'].astype(str)
+        value_columns = [col for col in df.columns if col not in ('datetime', 'ticker')]
+        df[value_columns] = df[value_columns].astype('float64')
+        os.makedirs(path, exist_ok=True)
+        self._write_part(df, path)
+        self._written.add(path)
+        if len(self._parts_of(path)) >= self._max_parts:
+            self.compact(path)
+
+    def _write_part(self, df: DataFrame, path: str):
+        """
+        Write new part to partition directory. Parts are numbered in write order, so they are sorted by time.
+        """
+        numbers = [int(match['number']) for match in map(self._part_pattern.match, os.listdir(path)) if match]
+        part_path = os.path.join(path, 'part-%08d.parquet' % (max(numbers, default=0) + 1))
+        df.to_parquet(part_path, engine='pyarrow', compression=self._compression, index=False)
+
+    def compact(self, path: str):
+        """
+        Merge parts of partition directory to one part
+        """
+        parts = self._parts_of(path)
+        if len(parts) < 2:
+            return
+        self._logger.debug("Compacting %s parts of %s", len(parts), path)
+        df = pd.concat([pd.read_parquet(part, engine='pyarrow') for part in parts], ignore_index=True)
+        # Merged part is written before old parts are removed, so the data is not lost on failure
+        self._write_part(df.sort_values('datetime', kind='mergesort', ignore_index=True), path)
+        for part in parts:
+            os.remove(part)
+
+    def close(self):
+        for path in self._written:
+            self.compact(path)
+        self._written.clear()
+
+    def read_chunks(self, path: str, kind: str, chunk_rows: int = 100000) -> Iterator[DataFrame]:
+        import pyarrow.parquet as pq
+        columns = ['datetime', 'ticker'] + self.columns[kind]
+        for part in self._parts_of(path):
+            file = pq.ParquetFile(part)
+            # Older parts can miss some columns, they are read as nan
+            present = [column for column in columns if column in file.schema_arrow.names]
+            for batch in file.iter_batches(batch_size=chunk_rows, columns=present):
+                yield batch.to_pandas().reindex(columns=columns)
+
+    def _read_partition(self, path: str, kind: str, columns: List[str], start: Optional[datetime],
+                        end: Optional[datetime]) -> DataFrame:
+        import pyarrow.parquet as pq
+        # Missing columns, like last_change of quotes from Feed, are read as nan
+        names = set().union(*(pq.read_schema(part).names for part in self._parts_of(path)))
+        filters = []
+        if start is not None:
+            filters.append(('datetime', '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('datetime', '<=', pd.Timestamp(end)))
+        return pd.read_parquet(path, engine='pyarrow', columns=[column for column in columns if column in names],
+                               filters=filters or None).reindex(columns=columns)
+
+    @staticmethod
+    def _parts_of(path: str) -> List[str]:
+        """
+        Parquet parts of the partition directory in write order, or the partition itself if it's a file
+        """
+        return [os.path.join(path, part) for part in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
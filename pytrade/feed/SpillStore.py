@@ -0,0 +1,101 @@
+import itertools
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model.feed.Asset import Asset
+
+
+class SpillStore:
+    """
+    On-disk history of ticks, dropped from memory by feed retention. Ticks of one kind for all assets.
+    Dropped rows come in chunks, each chunk is saved by writer thread to times and values .npy files
+    and is read back memory mapped. Until saved, a chunk is served from memory, so there is no gap in history.
+    """
+
+    def __init__(self, spill_dir: str, kind: str):
+        """
+        :param spill_dir: parent directory. Own temporary directory is created inside and removed on close.
+        :param kind: candles, quotes or level2, used in directory name
+        """
+        self._logger = logging.getLogger(__name__)
+        os.makedirs(spill_dir, exist_ok=True)
+        self._dir = tempfile.mkdtemp(prefix=f"{kind}-", dir=spill_dir)
+        # Asset -> time sorted chunks of [times, values]
+        self._chunks: Dict[Asset, List[list]] = {}
+        self._chunk_numbers = itertools.count()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self.run_writer, name=f"spill-{kind}", daemon=True)
+        self._writer.start()
+
+    def spill(self, asset: Asset, times: np.ndarray, values: np.ndarray):
+        """
+        Add dropped rows of the asset. Arrays should not be changed after that.
+        """
+        if not len(times):
+            return
+        chunk = [times, values]
+        with self._lock:
+            self._chunks.setdefault(asset, []).append(chunk)
+        self._queue.put((asset, chunk, next(self._chunk_numbers)))
+
+    def read(self, asset: Asset, start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None) \
+            -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Times and values of rows inside [start, end], one pair per chunk. Arrays are not copied.
+        """
+        with self._lock:
+            chunks = [tuple(chunk) for chunk in self._chunks.get(asset, [])]
+        parts = []
+        for times, values in chunks:
+            if (start is not None and times[-1] < start) or (end is not None and times[0] > end):
+                continue
+            first = np.searchsorted(times, start, side='left') if start is not None else 0
+            last = np.searchsorted(times, end, side='right') if end is not None else len(times)
+            parts.append((times[first:last], values[first:last]))
+        return parts
+
+    def run_writer(self):
+        """
+        Save chunks to disk and replace them in memory by memory mapped files
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            asset, chunk, number = item
+            try:
+                path = os.path.join(self._dir, '%s_%d' % (str(asset).replace('/', '_'), number))
+                np.save(path + '.times.npy', chunk[0])
+                np.save(path + '.values.npy', chunk[1])
+                saved = [np.load(path + '.times.npy', mmap_mode='r'), np.load(path + '.values.npy', mmap_mode='r')]
+                with self._lock:
+                    chunk[:] = saved
+            except Exception as e:
+                # Chunk stays in memory
+                self._logger.exception("Spilling %s to %s failed: %s", asset, self._dir, e)
+            self._queue.task_done()
+
+    def flush(self):
+        """
+        Wait until all spilled chunks are saved
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Stop writer thread and remove spilled files
+        """
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._chunks.clear()
+        shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,130 @@
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pandas import DataFrame
+
+
+class Storage:
+    """
+    Base class for market data storage on disk.
+    Data is partitioned by ticker, kind (candles, quotes, level2) and day: <ticker>_<kind>_<yyyy-mm-dd><extension>
+    Descendants implement _write_partition and _read_partition for specific file format.
+    """
+
+    # Value columns of each kind of data. Datetime and ticker columns go first in each partition.
+    columns = {'candles': ['open', 'high', 'low', 'close', 'volume'],
+               'quotes': ['bid', 'ask', 'last', 'last_change'],
+               'level2': ['price', 'bid_vol', 'ask_vol']}
+    extension = ''
+
+    def __init__(self, data_dir: str = './data'):
+        self._logger = logging.getLogger(__name__)
+        self._data_dir = data_dir
+        self._name_pattern = re.compile(
+            f"^(?P<ticker>.+)_(?P<kind>{'|'.join(self.columns)})_(?P<day>\\d{{4}}-\\d{{2}}-\\d{{2}}){re.escape(self.extension)}$")
+
+    @staticmethod
+    def of(config) -> 'Storage':
+        """
+        Create storage by class name and data dir from config
+        """
+        from feed.CsvStorage import CsvStorage
+        from feed.ParquetStorage import ParquetStorage
+        storages = {cls.__name__: cls for cls in [CsvStorage, ParquetStorage]}
+        return storages[config.get("feed.storage", "CsvStorage")](config.get("feed.storage.dir", "data"))
+
+    def write(self, df: DataFrame, kind: str):
+        """
+        Append data of one ticker and one day to it's partition
+        :param df: Dataframe, all rows have the same day and ticker in (datetime, ticker) index
+        :param kind: candles, quotes or level2
+        """
+        dt, ticker = df.first_valid_index()
+        path = self.path_of(ticker, kind, dt.date())
+        self._logger.debug("Writing %s to %s", kind, os.path.abspath(path))
+        os.makedirs(self._data_dir, exist_ok=True)
+        self._write_partition(df, path)
+
+    def read(self, kind: str, tickers: Optional[List[str]] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, columns: Optional[List[str]] = None) -> DataFrame:
+        """
+        Read data of given kind with datetime, ticker and value columns, sorted by datetime
+        :param tickers: read these tickers only, like QJSIM/SBER. All tickers if None.
+        :param start: read data at or after this time only
+        :param end: read data at or before this time only
+        :param columns: value columns to read, all columns if None
+        """
+        columns = ['datetime', 'ticker'] + (columns or self.columns[kind])
+        frames = [self._read_partition(path, kind, columns, start, end)
+                  for path in self.paths_of(kind, tickers, start, end)]
+        if not frames:
+            return DataFrame(columns=columns)
+        df = pd.concat(frames, ignore_index=True)
+        if start is not None:
+            df = df[df['datetime'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['datetime'] <= pd.Timestamp(end)]
+        return df.sort_values('datetime', kind='mergesort', ignore_index=True)
+
+    def read_chunks(self, path: str, kind: str, chunk_rows: int = 100000) -> Iterator[DataFrame]:
+        """
+        Read one partition lazily, in frames of up to chunk_rows rows with datetime, ticker and value columns
+        """
+        yield self._read_partition(path, kind, ['datetime', 'ticker'] + self.columns[kind], None, None)
+
+    def partition_of(self, path: str) -> Optional[Tuple[str, str, str]]:
+        """
+        Ticker with / replaced by _, kind and yyyy-mm-dd day of partition path. None if it's not a partition.
+        """
+        match = self._name_pattern.match(os.path.basename(path.rstrip(os.sep)))
+        return (match['ticker'], match['kind'], match['day']) if match else None
+
+    def flush(self):
+        """
+        Push buffered writes to files
+        """
+
+    def close(self):
+        """
+        Flush and close open files
+        """
+
+    def path_of(self, ticker: str, kind: str, day: date) -> str:
+        """
+        Partition path of ticker, kind and day
+        """
+        file_name = '%s_%s_%s%s' % (ticker.replace('/', '_'), kind, day.strftime('%Y-%m-%d'), self.extension)
+        return os.path.join(self._data_dir, file_name)
+
+    def paths_of(self, kind: str, tickers: Optional[List[str]] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> List[str]:
+        """
+        Partitions of the kind, filtered by ticker and day, sorted by name
+        """
+        if not os.path.isdir(self._data_dir):
+            return []
+        tickers = {ticker.replace('/', '_') for ticker in tickers} if tickers else None
+        start_day = start.strftime('%Y-%m-%d') if start is not None else None
+        end_day = end.strftime('%Y-%m-%d') if end is not None else None
+        paths = []
+        for name in sorted(os.listdir(self._data_dir)):
+            match = self._name_pattern.match(name)
+            if not match or match['kind'] != kind:
+                continue
+            if tickers is not None and match['ticker'] not in tickers:
+                continue
+            if (start_day and match['day'] < start_day) or (end_day and match['day'] > end_day):
+                continue
+            paths.append(os.path.join(self._data_dir, name))
+        return paths
+
+    def _write_partition(self, df: DataFrame, path: str):
+        raise NotImplementedError
+
+    def _read_partition(self, path: str, kind: str, columns: List[str], start: Optional[datetime],
+                        end: Optional[datetime]) -> DataFrame:
+        raise NotImplementedError
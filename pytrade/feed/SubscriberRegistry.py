@@ -0,0 +1,79 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from model.feed.Asset import Asset
+
+
+class SubscriberRegistry:
+    """
+    Event subscribers, grouped by asset.
+    Callbacks are resolved at subscribe time into immutable tuples per event and asset,
+    so dispatching an event is a dict lookup and a loop over ready callbacks.
+    """
+
+    def __init__(self, events: Iterable[str]):
+        """
+        :param events: names of subscriber methods, for example on_quote, on_level2
+        """
+        self._events = tuple(events)
+        self._any_asset = Asset.any_asset()
+        # {asset: [subscriber]}
+        self._subscribers = defaultdict(list)
+        # {event: {asset: (callback,)}}, rebuilt on each subscribe
+        self._tables: Dict[str, Dict[Asset, Tuple]] = {event: {} for event in self._events}
+        # {event: (callback,)} of all subscribers of all assets
+        self._all: Dict[str, Tuple] = {event: () for event in self._events}
+
+    def subscribe(self, subscriber, asset: Asset = None):
+        """
+        Add subscriber for events of given asset, any asset by default
+        """
+        asset = asset or self._any_asset
+        if subscriber not in self._subscribers[asset]:
+            self._subscribers[asset].append(subscriber)
+        self._compile()
+
+    def callbacks(self, event: str, asset: Asset = None) -> Tuple:
+        """
+        Callbacks for event of the asset, including subscribers of any asset
+        """
+        table = self._tables[event]
+        callbacks = table.get(asset)
+        return callbacks if callbacks is not None else table.get(self._any_asset, ())
+
+    def all_callbacks(self, event: str) -> Tuple:
+        """
+        Callbacks for event from subscribers of all assets
+        """
+        return self._all[event]
+
+    def _compile(self):
+        """
+        Build dispatch tables for all events. Tables are replaced, not modified,
+        so dispatching from another thread sees either old or new table.
+        """
+        any_subscribers = self._subscribers.get(self._any_asset, [])
+        all_subscribers = [s for subscribers in self._subscribers.values() for s in subscribers]
+        for event in self._events:
+            table = {}
+            for asset, subscribers in self._subscribers.items():
+                if asset != self._any_asset:
+                    subscribers = subscribers + any_subscribers
+                table[asset] = self._resolve(event, subscribers)
+            self._tables[event] = table
+            self._all[event] = self._resolve(event, all_subscribers)
+
+    @staticmethod
+    def _resolve(event: str, subscribers: list) -> Tuple:
+        """
+        Bound event methods of unique subscribers who have them
+        """
+        callbacks, seen = [], set()
+        for subscriber in subscribers:
+            if id(subscriber) in seen:
+                continue
+            seen.add(id(subscriber))
+            callback = getattr(subscriber, event, None)
+            if callable(callback):
+                callbacks.append(callback)
+        return tuple(callbacks)
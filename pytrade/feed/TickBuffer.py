@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class TickBuffer:
+    """
+    Columnar in-memory buffer of ticks for one asset.
+    Times and values are kept in preallocated numpy arrays, so append is amortized O(1).
+    Rows older than retention window are dropped from the head.
+    Views returned by times, values and to_df() are not copied. They stay valid after further appends,
+    because the buffer never moves rows inside an array it has already exposed.
+    Upsert changes the last row in place, so views including it see the new values. Copy them to keep old ones.
+    Dropped rows stay in current arrays until they are reallocated, then they are passed to spill function.
+    """
+
+    def __init__(self, columns: List[str], retention: Optional[timedelta] = None, capacity: int = 1024,
+                 spill: Optional[Callable[[np.ndarray, np.ndarray], None]] = None):
+        """
+        :param columns: names of float value columns
+        :param retention: keep only rows not older than this interval from the last row. None to keep all.
+        :param capacity: initial number of preallocated rows
+        :param spill: function getting times and values of dropped rows, to save them somewhere
+        """
+        self.columns = list(columns)
+        self._spill = spill
+        self._retention = np.timedelta64(retention) if retention else None
+        self._times = np.empty(capacity, dtype='datetime64[ns]')
+        self._values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+        # Live rows are [head, tail)
+        self._head = 0
+        self._tail = 0
+        # Number of rows dropped before the start of current arrays
+        self._base = 0
+
+    def __len__(self):
+        return self._tail - self._head
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        View of live row times
+        """
+        return self._times[self._head:self._tail]
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        View of live row values, shape (rows, columns)
+        """
+        return self._values[self._head:self._tail]
+
+    @property
+    def dropped(self) -> (np.ndarray, np.ndarray):
+        """
+        Views of times and values of dropped rows, not passed to spill function yet
+        """
+        return self._times[:self._head], self._values[:self._head]
+
+    @property
+    def end(self) -> int:
+        """
+        Position after the last row. Positions count all rows ever appended, they don't change when rows are dropped.
+        """
+        return self._base + self._tail
+
+    def since(self, position: int) -> (np.ndarray, np.ndarray):
+        """
+        Views of times and values of live rows at or after the position
+        """
+        start = min(max(position - self._base, self._head), self._tail)
+        return self._times[start:self._tail], self._values[start:self._tail]
+
+    @property
+    def last_time(self) -> Optional[np.datetime64]:
+        return self._times[self._tail - 1] if self._tail > self._head else None
+
+    def append(self, dt: datetime, values: list):
+        """
+        Append one row
+        """
+        self._reserve(1)
+        self._times[self._tail] = np.datetime64(dt, 'ns')
+        self._values[self._tail] = values
+        self._tail += 1
+        self._trim()
+
+    def append_many(self, dt: datetime, rows):
+        """
+        Append several rows with the same time, for example all items of level2 snapshot
+        :param rows: 2d array-like, shape (n, columns)
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.columns))
+        n = len(rows)
+        if not n:
+            return
+        self._reserve(n)
+        self._times[self._tail:self._tail + n] = np.datetime64(dt, 'ns')
+        self._values[self._tail:self._tail + n] = rows
+        self._tail += n
+        self._trim()
+
+    def upsert(self, dt: datetime, values: list):
+        """
+        Replace the last row in place if it has the same time, otherwise append a new one.
+        Quik updates the current candle several times before it closes.
+        """
+        dt = np.datetime64(dt, 'ns')
+        if self._tail > self._head and self._times[self._tail - 1] == dt:
+            self._values[self._tail - 1] = values
+        else:
+            self.append(dt, values)
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Live rows as dataframe indexed by datetime. Values are not copied.
+        """
+        return self._df_of(self._head, self._tail)
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Live rows inside [start, end], found by binary search. Values are not copied.
+        """
+        times = self.times
+        first = np.searchsorted(times, np.datetime64(start, 'ns'), side='left') if start is not None else 0
+        last = np.searchsorted(times, np.datetime64(end, 'ns'), side='right') if end is not None else len(times)
+        return self._df_of(self._head + first, self._head + max(first, last))
+
+    def last_n(self, n: int) -> pd.DataFrame:
+        """
+        Last n live rows. Values are not copied.
+        """
+        return self._df_of(max(self._tail - n, self._head), self._tail)
+
+    def asof(self, dt: datetime) -> pd.DataFrame:
+        """
+        Rows with the last time at or before dt: one quote or candle, all items of level2 snapshot.
+        Empty if there are no rows before dt. Values are not copied.
+        """
+        times = self.times
+        last = np.searchsorted(times, np.datetime64(dt, 'ns'), side='right')
+        first = np.searchsorted(times, times[last - 1], side='left') if last else 0
+        return self._df_of(self._head + first, self._head + last)
+
+    def _df_of(self, first: int, last: int) -> pd.DataFrame:
+        """
+        Dataframe of rows [first, last) of current arrays, values are not copied
+        """
+        return pd.DataFrame(self._values[first:last], columns=self.columns,
+                            index=pd.DatetimeIndex(self._times[first:last], name='datetime'), copy=False)
+
+    def _reserve(self, n: int):
+        """
+        Make room for n more rows at the tail
+        """
+        capacity = len(self._times)
+        if self._tail + n <= capacity:
+            return
+        size = len(self)
+        # Reuse the same capacity if trimmed head freed enough space, grow twice otherwise
+        if size + n > capacity // 2:
+            capacity = max(capacity * 2, size + n)
+        # Always copy to new arrays: views given out earlier keep pointing to untouched data
+        times = np.empty(capacity, dtype=self._times.dtype)
+        values = np.empty((capacity, len(self.columns)), dtype=self._values.dtype)
+        times[:size] = self.times
+        values[:size] = self.values
+        if self._spill and self._head:
+            # Old arrays are not written anymore, dropped rows are passed without copying
+            self._spill(*self.dropped)
+        self._times, self._values = times, values
+        self._base += self._head
+        self._head, self._tail = 0, size
+
+    def _trim(self):
+        """
+        Drop rows out of retention window
+        """
+        if self._retention is None:
+            return
+        cutoff = self._times[self._tail - 1] - self._retention
+        if self._times[self._head] < cutoff:
+            self._head += int(np.searchsorted(self.times, cutoff, side='left'))
@@ -0,0 +1,126 @@
+import functools
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from feed.SpillStore import SpillStore
+from feed.TickBuffer import TickBuffer
+from model.feed.Asset import Asset
+
+
+class TickStore:
+    """
+    Ticks of one kind (candles, quotes or level2) for all assets. Keeps separate columnar buffer per asset.
+    If spill store is set, rows dropped by retention go there and history() reads them back.
+    """
+
+    def __init__(self, columns: List[str], retention: Optional[timedelta] = None, spill: Optional[SpillStore] = None):
+        self.columns = list(columns)
+        self._retention = retention
+        self._spill = spill
+        self._buffers: Dict[Asset, TickBuffer] = {}
+
+    def buffer(self, asset: Asset) -> TickBuffer:
+        """
+        Get or create the buffer of the asset
+        """
+        buffer = self._buffers.get(asset)
+        if buffer is None:
+            spill = functools.partial(self._spill.spill, asset) if self._spill else None
+            buffer = self._buffers[asset] = TickBuffer(self.columns, self._retention, spill=spill)
+        return buffer
+
+    @property
+    def assets(self) -> List[Asset]:
+        return list(self._buffers.keys())
+
+    def to_df(self, asset: Asset) -> pd.DataFrame:
+        """
+        Zero-copy dataframe of one asset, indexed by datetime
+        """
+        if asset not in self._buffers:
+            return self._empty_df()
+        return self._buffers[asset].to_df()
+
+    def window(self, asset: Asset, start: Optional[datetime] = None, end: Optional[datetime] = None) \
+            -> pd.DataFrame:
+        """
+        Dataframe of asset rows inside [start, end]. Zero-copy if they all are in memory,
+        rows dropped by retention are read back from spill store.
+        """
+        buffer = self._buffers.get(asset)
+        if buffer is None:
+            return self._empty_df()
+        # Some rows were dropped and the window starts at or before the first row in memory
+        if self._spill is not None and buffer.end > len(buffer) \
+                and (start is None or not len(buffer) or np.datetime64(start, 'ns') <= buffer.times[0]):
+            return self.history(asset, start, end)
+        return buffer.window(start, end)
+
+    def last_n(self, asset: Asset, n: int) -> pd.DataFrame:
+        """
+        Zero-copy dataframe of last n asset rows
+        """
+        return self._buffers[asset].last_n(n) if asset in self._buffers else self._empty_df()
+
+    def asof(self, asset: Asset, dt: datetime) -> pd.DataFrame:
+        """
+        Zero-copy dataframe of asset rows with the last time at or before dt
+        """
+        return self._buffers[asset].asof(dt) if asset in self._buffers else self._empty_df()
+
+    def _empty_df(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=self.columns, index=pd.DatetimeIndex([], name='datetime'), dtype=float)
+
+    def history(self, asset: Asset, start: Optional[datetime] = None, end: Optional[datetime] = None) \
+            -> pd.DataFrame:
+        """
+        Rows of the asset inside [start, end] from spill store and memory, indexed by datetime
+        """
+        start = np.datetime64(start, 'ns') if start is not None else None
+        end = np.datetime64(end, 'ns') if end is not None else None
+        parts = self._spill.read(asset, start, end) if self._spill else []
+        buffer = self._buffers.get(asset)
+        if buffer is not None:
+            for times, values in (buffer.dropped, (buffer.times, buffer.values)):
+                first = np.searchsorted(times, start, side='left') if start is not None else 0
+                last = np.searchsorted(times, end, side='right') if end is not None else len(times)
+                parts.append((times[first:last], values[first:last]))
+        if len(parts) == 1:
+            times, values = parts[0]
+        else:
+            times = np.concatenate([times for times, _ in parts]) if parts else np.empty(0, dtype='datetime64[ns]')
+            values = np.concatenate([values for _, values in parts]) if parts else np.empty((0, len(self.columns)))
+        return pd.DataFrame(values, columns=self.columns, index=pd.DatetimeIndex(times, name='datetime'), copy=False)
+
+    def close(self):
+        """
+        Close spill store, if any
+        """
+        if self._spill:
+            self._spill.close()
+
+    def to_multiindex_df(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         is_history: bool = False) -> pd.DataFrame:
+        """
+        All assets in one dataframe with (datetime, ticker) index, ordered by datetime
+        :param is_history: include rows from spill store and limit rows to [start, end]
+        """
+        if is_history:
+            frames = [self.history(asset, start, end) for asset in self._buffers]
+        else:
+            frames = [buffer.to_df() for buffer in self._buffers.values()]
+        tickers = [str(asset) for asset, frame in zip(self._buffers, frames) if len(frame)]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)],
+                                              names=['datetime', 'ticker'])
+            return pd.DataFrame(columns=self.columns, index=index, dtype=float)
+        if len(frames) == 1:
+            df = frames[0]
+            df.index = pd.MultiIndex.from_arrays([df.index, [tickers[0]] * len(df)], names=['datetime', 'ticker'])
+            return df
+        df = pd.concat(frames, keys=tickers, names=['ticker', 'datetime']).swaplevel()
+        return df.sort_index(level='datetime', sort_remaining=False, kind='mergesort')
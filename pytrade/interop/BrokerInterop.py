@@ -1,11 +1,15 @@
 import json
 import logging
 from threading import Thread
+from typing import Optional
+
 from pika import BlockingConnection, ConnectionParameters
 
 from broker.Broker import Broker
 from connector.quik.QueueName import QueueName
 from connector.quik.WebQuikBroker import WebQuikBroker
+from interop.RabbitPublisher import RabbitPublisher
+from interop.WireCodec import WireCodec
 from model.broker.Order import Order
 
 
@@ -16,27 +20,36 @@ class BrokerInterop:
     Todo: add different types of orders: stop, market ...
     """
 
-    def __init__(self, broker: Broker, rabbit_host: str):
+    def __init__(self, broker: Broker, rabbit_host: str, publisher: Optional[RabbitPublisher] = None,
+                 is_binary: bool = False):
+        """
+        :param publisher: shared rabbit publisher, own publisher to rabbit host if None
+        :param is_binary: also publish orders in binary frames
+        """
         self._logger = logging.getLogger(__name__)
         self._rabbit_host = rabbit_host
+        self._is_binary = is_binary
         self._broker = broker
         self._broker.subscribe_broker(self)
         self._broker_subscribers=[]
 
-        # Init rabbit mq
-        self._logger.info(f"Connecting to rabbit host {rabbit_host}")
-        self._rabbit_connection = BlockingConnection(ConnectionParameters(rabbit_host))
-        # self._rabbit_connection = pika.connection.Connection(pika.ConnectionParameters(rabbit_host))
-        self._rabbit_channel = self._rabbit_connection.channel()
+        # Broker events are sent to rabbit by publisher thread. They should not be lost, so publisher slows us down
+        # if rabbit is too slow, but not longer than block timeout: dead rabbit must not stall the reply lane.
+        # Then events are dropped and counted in publisher.dropped until rabbit takes them again.
+        self._publisher = publisher or RabbitPublisher.of({"interop.rabbit.host": rabbit_host})
         for q in [QueueName.TRADE_ACCOUNT,
                   QueueName.ORDERS,
                   QueueName.TRADES,
                   QueueName.MONEY_LIMITS,
                   QueueName.STOCK_LIMITS,
+                  QueueName.LIMIT,
                   QueueName.MSG_REPLY
                   ]:
-            self._logger.info(f"Declaring rabbit queue {q}")
-            self._rabbit_channel.queue_declare(queue=q, durable=True)
+            self._publisher.declare(q, RabbitPublisher.Policy.BLOCK)
+        if is_binary:
+            self._publisher.declare(QueueName.ORDERS_BIN, RabbitPublisher.Policy.BLOCK,
+                                    content_type=WireCodec.CONTENT_TYPE, merge=WireCodec.merge)
+        self._publisher.start()
 
         # Subscribe to buy/sell events in new thread because pika consumes synchronously only
         self._consumer_rabbit_connection = None
@@ -98,29 +111,31 @@ class BrokerInterop:
         # {"msgid":21022,"trdacc":"NL0011100043","firmid":"NC0011100000","classList":["QJSIM"],"mainMarginClasses":["QJSIM"],"limitsInLots":0,"limitKinds":["0","1","2"]}
         # Just push the message to rabbitmq
         self._logger.debug(f"On trade accounts. msg={msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.TRADE_ACCOUNT, body=str(msg))
+        self._publisher.publish(QueueName.TRADE_ACCOUNT, str(msg))
 
     def on_orders(self, order: Order):
         # Information about my orders
         self._logger.debug(f"Got orders from broker: {order}")
         msg = json.dumps(order.__dict__, default=str)
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.ORDERS, body=msg)
+        self._publisher.publish(QueueName.ORDERS, msg)
+        if self._is_binary:
+            self._publisher.publish(QueueName.ORDERS_BIN, WireCodec.frame([WireCodec.order(order)]))
 
     def on_trades(self, msg):
         self._logger.debug(f"On trades. msg={msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.TRADES, body=str(msg))
+        self._publisher.publish(QueueName.TRADES, str(msg))
 
     def on_money_limits(self, msg):
         self._logger.debug(f"On money limits. msg={msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.MONEY_LIMITS, body=str(msg))
+        self._publisher.publish(QueueName.MONEY_LIMITS, str(msg))
 
     def on_stock_limits(self, msg):
         self._logger.debug(f"On stock limits. msg={msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.STOCK_LIMITS, body=str(msg))
+        self._publisher.publish(QueueName.STOCK_LIMITS, str(msg))
 
     def on_limit_received(self, msg):
         self._logger.debug(f"Limit has received. msg={msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.LIMIT, body=str(msg))
+        self._publisher.publish(QueueName.LIMIT, str(msg))
 
     def subscribe_broker(self, subscriber):
         """
@@ -136,7 +151,7 @@ class BrokerInterop:
         ToDo: add order to history if successful
         """
         self._logger.debug(f"Got msg: {msg}")
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.MSG_REPLY, body=str(msg))
+        self._publisher.publish(QueueName.MSG_REPLY, str(msg))
 
     def on_heartbeat(self):
         """
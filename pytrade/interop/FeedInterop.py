@@ -1,10 +1,14 @@
 import logging
+from typing import Optional
 
-import pika
 from connector.quik.MsgId import MsgId
 from connector.quik.QueueName import QueueName
+from interop.RabbitPublisher import RabbitPublisher
+from interop.WireCodec import WireCodec
 from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
 from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
 
 
 class FeedInterop:
@@ -12,9 +16,14 @@ class FeedInterop:
     Get data from feed and publish it to rabbitmq for interop with external systems
     """
 
-    def __init__(self, feed, rabbit_host: str):
+    def __init__(self, feed, rabbit_host: str, publisher: Optional[RabbitPublisher] = None, is_binary: bool = False):
+        """
+        :param publisher: shared rabbit publisher, own publisher to rabbit host if None
+        :param is_binary: also publish candles, quotes and level2 in binary frames
+        """
         self._logger = logging.getLogger(__name__)
         self._feed = feed
+        self._is_binary = is_binary
 
         # Subscribe to feed
         self.callbacks = {
@@ -24,13 +33,15 @@ class FeedInterop:
         }
         self._feed.subscribe_feed(Asset.any_asset(), self)
 
-        # Init rabbitmq connection
-        self._logger.info(f"Connecting to rabbit host {rabbit_host}")
-        self._rabbit_connection = pika.BlockingConnection(pika.ConnectionParameters(rabbit_host))
-        self._rabbit_channel = self._rabbit_connection.channel()
-        for q in [QueueName.CANDLES]:
-            self._logger.info(f"Declaring rabbit queue {q}")
-            self._rabbit_channel.queue_declare(queue=q, durable=True)
+        # Messages are sent to rabbit by publisher thread
+        self._publisher = publisher or RabbitPublisher.of({"interop.rabbit.host": rabbit_host})
+        # Old candles are not interesting if rabbit is too slow
+        self._publisher.declare(QueueName.CANDLES, RabbitPublisher.Policy.DROP_OLD)
+        if is_binary:
+            # Waiting frames are merged to one batch frame when published
+            self._publisher.declare(QueueName.FEED_BIN, RabbitPublisher.Policy.DROP_OLD,
+                                    content_type=WireCodec.CONTENT_TYPE, merge=WireCodec.merge)
+        self._publisher.start()
 
     def on_candle(self, ohlcv: Ohlcv):
         """
@@ -39,9 +50,25 @@ class FeedInterop:
         10:02:00","o":22649,"c":22647,"h":22649,"l":22646,"v":1889}]}} :return:
         """
 
-        self._logger.debug(f'Got candle:  {ohlcv}')
+        self._logger.debug('Got candle:  %s', ohlcv)
         # ohlcv = {'d': str(dt), 'o': ohlcv, 'h': h, 'l': l_, 'c': c, 'v': asset}
         # self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.CANDLES, body=str(ohlcv))
         asset_ohlcv = {'asset': str(ohlcv.asset), 'dt': str(ohlcv.dt), 'o': ohlcv.o, 'h': ohlcv.h, 'l': ohlcv.l, 'c': ohlcv.c,
                        'v': ohlcv.v}
-        self._rabbit_channel.basic_publish(exchange='', routing_key=QueueName.CANDLES, body=str(asset_ohlcv))
+        self._publisher.publish(QueueName.CANDLES, str(asset_ohlcv))
+        if self._is_binary:
+            self._publisher.publish(QueueName.FEED_BIN, WireCodec.frame([WireCodec.candle(ohlcv)]))
+
+    def on_quote(self, quote: Quote):
+        """
+        Publish the quote in binary frame
+        """
+        if self._is_binary:
+            self._publisher.publish(QueueName.FEED_BIN, WireCodec.frame([WireCodec.quote(quote)]))
+
+    def on_level2(self, level2: Level2):
+        """
+        Publish full level2 snapshot in binary frame
+        """
+        if self._is_binary:
+            self._publisher.publish(QueueName.FEED_BIN, WireCodec.frame([WireCodec.level2(level2)]))
@@ -0,0 +1,48 @@
+import time
+from collections import defaultdict
+
+
+class MemoryRabbit:
+    """
+    In-process rabbit stand-in. Acts as connection factory and channel, keeps published messages in memory.
+    Can be made slow or down to check publisher behaviour.
+    """
+
+    def __init__(self, publish_seconds: float = 0):
+        """
+        :param publish_seconds: delay of each publish, emulates slow rabbit
+        """
+        self.publish_seconds = publish_seconds
+        self.is_down = False
+        self.is_confirms = False
+        self.connections = 0
+        # Queue name -> published bodies
+        self.queues = defaultdict(list)
+        # Queue name -> properties of the last published message
+        self.properties = {}
+
+    def channel(self) -> 'MemoryRabbit':
+        """
+        Connect and open channel
+        """
+        self._check_up()
+        self.connections += 1
+        return self
+
+    def queue_declare(self, queue: str, durable: bool = False, **kwargs):
+        self._check_up()
+        self.queues.setdefault(queue, [])
+
+    def confirm_delivery(self):
+        self.is_confirms = True
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties=None, mandatory=False):
+        self._check_up()
+        if self.publish_seconds:
+            time.sleep(self.publish_seconds)
+        self.queues[routing_key].append(body)
+        self.properties[routing_key] = properties
+
+    def _check_up(self):
+        if self.is_down:
+            raise ConnectionError("Memory rabbit is down")
@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from pika import BasicProperties, BlockingConnection, ConnectionParameters
+
+
+class RabbitPublisher:
+    """
+    Publishes messages to rabbit from own thread, so a slow or unreachable rabbit does not stall the caller.
+    Messages wait in bounded per queue buffers and are sent in batches, when batch size is reached
+    or flush interval is elapsed. Full buffer is handled by the queue's policy.
+    """
+
+    class Policy:
+        """
+        What to do with a new message when queue buffer is full
+        """
+        # Backpressure: wait for free space up to block timeout, drop the new message after that.
+        # Until the queue gets free space again, new messages are dropped without waiting.
+        BLOCK = "block"
+        # Keep old messages, drop the new one
+        DROP_NEW = "drop_new"
+        # Drop the oldest message, keep the new one
+        DROP_OLD = "drop_old"
+
+    def __init__(self, connect: Callable, maxsize: int = 10000, batch_size: int = 100, flush_seconds: float = 0.1,
+                 confirms: bool = False, block_seconds: float = 1.0, reconnect_seconds: float = 5.0):
+        """
+        :param connect: function returning new rabbit channel, called in publisher thread
+        :param maxsize: max number of waiting messages of each queue
+        :param batch_size: publish when this number of messages is waiting
+        :param flush_seconds: publish waiting messages at least once per this interval
+        :param confirms: wait for rabbit confirmations of published messages
+        :param block_seconds: max wait for free space in queue with block policy
+        :param reconnect_seconds: pause before reconnecting after rabbit failure
+        """
+        self._logger = logging.getLogger(__name__)
+        self._connect = connect
+        self._maxsize = maxsize
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._confirms = confirms
+        self._block_seconds = block_seconds
+        self._reconnect_seconds = reconnect_seconds
+
+        # Queue name -> waiting message bodies and policy
+        self._buffers: Dict[str, Deque] = {}
+        self._policies: Dict[str, str] = {}
+        # Queue name -> message properties and function merging a batch to one message
+        self._properties: Dict[str, Optional[BasicProperties]] = {}
+        self._merges: Dict[str, Optional[Callable[[list], bytes]]] = {}
+        self._pending = 0
+        # Queue name -> number of messages, taken from buffer and being published now. They hold their space
+        # until rabbit takes them, so a failing rabbit does not free space for new messages.
+        self._sending: Dict[str, int] = {}
+        self._has_messages = threading.Condition()
+        self._has_space = threading.Condition(self._has_messages)
+        self._channel = None
+        self._undeclared = set()
+        # Block policy queues, which timed out waiting for space and drop new messages without waiting
+        self._overflowing = set()
+        self._is_running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.published: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    @staticmethod
+    def of(config) -> 'RabbitPublisher':
+        """
+        Publisher to rabbit host from config
+        """
+        host = config["interop.rabbit.host"]
+        return RabbitPublisher(lambda: BlockingConnection(ConnectionParameters(host)).channel(),
+                               maxsize=int(config.get("interop.rabbit.queue_size", 10000)),
+                               batch_size=int(config.get("interop.rabbit.batch_size", 100)),
+                               flush_seconds=float(config.get("interop.rabbit.flush_seconds", 0.1)),
+                               confirms=bool(config.get("interop.rabbit.confirms", False)),
+                               block_seconds=float(config.get("interop.rabbit.block_seconds", 1.0)))
+
+    def declare(self, queue: str, policy: str = Policy.DROP_OLD, content_type: Optional[str] = None,
+                merge: Optional[Callable[[list], bytes]] = None):
+        """
+        Add a queue to publish to. Rabbit queue is declared when publisher connects.
+        :param content_type: content type header of the queue messages
+        :param merge: function making one message of a batch of messages, each message is sent alone if None
+        """
+        with self._has_messages:
+            if queue not in self._buffers:
+                self._buffers[queue] = deque()
+                self._sending[queue] = 0
+                self.published[queue] = self.dropped[queue] = 0
+            self._policies[queue] = policy
+            self._properties[queue] = BasicProperties(content_type=content_type) if content_type else None
+            self._merges[queue] = merge
+            # Rabbit queue is declared by publisher thread
+            self._undeclared.add(queue)
+
+    def publish(self, queue: str, body) -> bool:
+        """
+        Put message to publishing buffer, return immediately unless the queue is full and has block policy.
+        :return: False if the message is dropped
+        """
+        with self._has_messages:
+            buffer = self._buffers[queue]
+            if self._is_full(queue):
+                policy = self._policies[queue]
+                if policy == self.Policy.BLOCK and queue not in self._overflowing:
+                    self._has_space.wait_for(lambda: not self._is_full(queue), self._block_seconds)
+                if self._is_full(queue):
+                    if policy != self.Policy.DROP_OLD:
+                        self.dropped[queue] += 1
+                        if policy == self.Policy.BLOCK and queue not in self._overflowing:
+                            self._overflowing.add(queue)
+                            self._logger.error("Rabbit queue %s is full for %s seconds, dropping new messages "
+                                               "until it has space, %d lost in total",
+                                               queue, self._block_seconds, self.dropped[queue])
+                        return False
+                    if buffer:
+                        buffer.popleft()
+                        self.dropped[queue] += 1
+                        self._pending -= 1
+            elif queue in self._overflowing:
+                self._overflowing.discard(queue)
+                self._logger.warning("Rabbit queue %s has space again, %d lost in total", queue, self.dropped[queue])
+            buffer.append(body)
+            self._pending += 1
+            if self._pending >= self._batch_size:
+                self._has_messages.notify()
+        return True
+
+    def _is_full(self, queue: str) -> bool:
+        return len(self._buffers[queue]) + self._sending[queue] >= self._maxsize
+
+    def pending(self) -> int:
+        """
+        Number of messages waiting to be published
+        """
+        return self._pending
+
+    def start(self):
+        """
+        Start publisher thread
+        """
+        if self._is_running:
+            return
+        self._is_running = True
+        self._thread = threading.Thread(target=self.run, name="rabbit-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> int:
+        """
+        Publish waiting messages and stop publisher thread
+        :return: number of messages, not published to rabbit
+        """
+        with self._has_messages:
+            self._is_running = False
+            self._has_messages.notify()
+            # Release waiting publishers
+            self._has_space.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._has_messages:
+            unsent = {queue: len(buffer) for queue, buffer in self._buffers.items() if buffer}
+        if unsent:
+            self._logger.error("Rabbit publisher stopped with not published messages: %s", unsent)
+        return sum(unsent.values())
+
+    def run(self):
+        """
+        Publisher loop: wait for a batch or flush interval, publish all waiting messages
+        """
+        self._logger.info("Starting rabbit publisher")
+        while True:
+            with self._has_messages:
+                self._has_messages.wait_for(lambda: self._pending >= self._batch_size or not self._is_running,
+                                            self._flush_seconds)
+                is_last = not self._is_running
+            self.flush()
+            if is_last:
+                break
+        self._logger.info("Rabbit publisher stopped")
+
+    def flush(self):
+        """
+        Publish all waiting messages in publisher thread. Not sent messages go back to buffer if rabbit fails.
+        """
+        with self._has_messages:
+            buffers = list(self._buffers.items())
+        for queue, buffer in buffers:
+            # Messages, came during flush, wait for next one, so a busy queue does not hold others
+            remaining = len(buffer)
+            while remaining > 0:
+                # Take a batch under one lock, publish it without lock
+                with self._has_messages:
+                    batch = [buffer.popleft() for _ in range(min(len(buffer), remaining, self._batch_size))]
+                    self._pending -= len(batch)
+                    self._sending[queue] = len(batch)
+                if not batch:
+                    break
+                remaining -= len(batch)
+                sent = self._publish_batch(queue, batch)
+                with self._has_messages:
+                    self.published[queue] += sent
+                    self._sending[queue] = 0
+                    if sent < len(batch):
+                        buffer.extendleft(reversed(batch[sent:]))
+                        self._pending += len(batch) - sent
+                    if sent:
+                        self._has_space.notify_all()
+                if sent < len(batch):
+                    if self._is_running:
+                        time.sleep(self._reconnect_seconds)
+                    return
+
+    def _publish_batch(self, queue: str, batch: list) -> int:
+        """
+        Publish messages to rabbit queue, return number of published messages
+        """
+        sent = 0
+        properties, merge = self._properties[queue], self._merges[queue]
+        try:
+            channel = self._channel_of()
+            if merge:
+                channel.basic_publish(exchange='', routing_key=queue, body=merge(batch), properties=properties)
+                sent = len(batch)
+            else:
+                for body in batch:
+                    channel.basic_publish(exchange='', routing_key=queue, body=body, properties=properties)
+                    sent += 1
+        except Exception as e:
+            self._logger.error("Rabbit publishing to %s failed: %s", queue, e)
+            self._channel = None
+        return sent
+
+    def _channel_of(self):
+        """
+        Current rabbit channel, connect if not connected. Declare new queues.
+        """
+        if self._channel is None:
+            self._logger.info("Connecting to rabbit")
+            with self._has_messages:
+                self._undeclared = set(self._buffers)
+            self._channel = self._connect()
+            if self._confirms:
+                self._channel.confirm_delivery()
+        while self._undeclared:
+            queue = self._undeclared.pop()
+            self._logger.info(f"Declaring rabbit queue {queue}")
+            self._channel.queue_declare(queue=queue, durable=True)
+        return self._channel
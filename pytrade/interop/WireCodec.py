@@ -0,0 +1,154 @@
+import math
+import struct
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+from model.broker.Order import Order
+from model.feed.ArrayLevel2 import ArrayLevel2
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class WireCodec:
+    """
+    Compact binary encoding of feed and broker events for interop.
+    Frame: header with magic "PT", version and number of events, then events one by one.
+    Event: kind, ticker, time in microseconds since epoch, then kind specific fields. All numbers are little-endian,
+    absent float is nan, string is length prefixed utf-8.
+    Candle: open, high, low, close, volume. Quote: bid, ask, last, last change.
+    Level2: number of levels, then price, bid volume, ask volume of each level sorted by price.
+    Order: number, account, status, is sell, price, quantity, volume.
+    """
+    CONTENT_TYPE = "application/x-pytrade-v1"
+    VERSION = 1
+    MAGIC = b'PT'
+
+    CANDLE, QUOTE, LEVEL2, ORDER = 1, 2, 3, 4
+
+    _HEADER = struct.Struct('<2sBI')
+    _EVENT = struct.Struct('<BH')
+    _TIME = struct.Struct('<q')
+    _CANDLE = struct.Struct('<5d')
+    _QUOTE = struct.Struct('<4d')
+    _LEVELS = struct.Struct('<H')
+    _STR = struct.Struct('<H')
+    _ORDER = struct.Struct('<?ddd')
+    _EPOCH = datetime(1970, 1, 1)
+    _MICROSECOND = timedelta(microseconds=1)
+
+    @staticmethod
+    def frame(events: List[bytes]) -> bytes:
+        """
+        Batch frame of encoded events
+        """
+        return WireCodec._HEADER.pack(WireCodec.MAGIC, WireCodec.VERSION, len(events)) + b''.join(events)
+
+    @staticmethod
+    def merge(frames: List[bytes]) -> bytes:
+        """
+        One batch frame with events of all frames, events are not decoded
+        """
+        if len(frames) == 1:
+            return frames[0]
+        size = WireCodec._HEADER.size
+        count = sum(WireCodec._HEADER.unpack_from(frame)[2] for frame in frames)
+        return WireCodec._HEADER.pack(WireCodec.MAGIC, WireCodec.VERSION, count) + \
+               b''.join(frame[size:] for frame in frames)
+
+    @staticmethod
+    def candle(ohlcv: Ohlcv) -> bytes:
+        return WireCodec._head(WireCodec.CANDLE, ohlcv.asset, ohlcv.dt) + \
+               WireCodec._CANDLE.pack(*map(WireCodec._float, (ohlcv.o, ohlcv.h, ohlcv.l, ohlcv.c, ohlcv.v)))
+
+    @staticmethod
+    def quote(quote: Quote) -> bytes:
+        return WireCodec._head(WireCodec.QUOTE, quote.asset, quote.dt) + \
+               WireCodec._QUOTE.pack(*map(WireCodec._float, (quote.bid, quote.ask, quote.last, quote.last_change)))
+
+    @staticmethod
+    def level2(level2: Level2) -> bytes:
+        levels = level2.to_numpy()
+        return WireCodec._head(WireCodec.LEVEL2, level2.asset, level2.dt) + \
+               WireCodec._LEVELS.pack(len(levels)) + levels.astype('<f8', copy=False).tobytes()
+
+    @staticmethod
+    def order(order: Order) -> bytes:
+        return WireCodec._head(WireCodec.ORDER, Asset(order.class_code, order.sec_code), order.dt) + \
+               WireCodec._str(order.number) + WireCodec._str(order.account) + WireCodec._str(order.status) + \
+               WireCodec._ORDER.pack(bool(order.is_sell), WireCodec._float(order.price),
+                                     WireCodec._float(order.quantity), WireCodec._float(order.volume))
+
+    @staticmethod
+    def decode(frame: bytes) -> list:
+        """
+        Events of the frame: Ohlcv, Quote, Level2 and Order objects
+        """
+        magic, version, count = WireCodec._HEADER.unpack_from(frame)
+        if magic != WireCodec.MAGIC or version != WireCodec.VERSION:
+            raise ValueError(f"Not a {WireCodec.CONTENT_TYPE} frame: magic {magic}, version {version}")
+        pos = WireCodec._HEADER.size
+        events = []
+        for _ in range(count):
+            kind, size = WireCodec._EVENT.unpack_from(frame, pos)
+            pos += WireCodec._EVENT.size
+            asset = Asset.of(frame[pos:pos + size].decode())
+            pos += size
+            dt = WireCodec._EPOCH + WireCodec._TIME.unpack_from(frame, pos)[0] * WireCodec._MICROSECOND
+            pos += WireCodec._TIME.size
+            if kind == WireCodec.CANDLE:
+                values = map(WireCodec._optional, WireCodec._CANDLE.unpack_from(frame, pos))
+                events.append(Ohlcv(dt, asset, *values))
+                pos += WireCodec._CANDLE.size
+            elif kind == WireCodec.QUOTE:
+                values = map(WireCodec._optional, WireCodec._QUOTE.unpack_from(frame, pos))
+                events.append(Quote(dt, asset, *values))
+                pos += WireCodec._QUOTE.size
+            elif kind == WireCodec.LEVEL2:
+                levels = WireCodec._LEVELS.unpack_from(frame, pos)[0]
+                pos += WireCodec._LEVELS.size
+                price, bid_vol, ask_vol = np.frombuffer(frame, '<f8', levels * 3, pos).reshape(-1, 3).T.copy()
+                events.append(ArrayLevel2(dt, asset, price, bid_vol, ask_vol))
+                pos += levels * 24
+            elif kind == WireCodec.ORDER:
+                (number, account, status), pos = WireCodec._strs(frame, pos, 3)
+                is_sell, price, quantity, volume = WireCodec._ORDER.unpack_from(frame, pos)
+                pos += WireCodec._ORDER.size
+                events.append(Order(number, dt, asset.class_code, asset.sec_code, is_sell, account,
+                                    WireCodec._optional(price), None if math.isnan(quantity) else int(quantity),
+                                    WireCodec._optional(volume), status))
+            else:
+                raise ValueError(f"Unknown event kind {kind}")
+        return events
+
+    @staticmethod
+    def _head(kind: int, asset: Asset, dt: datetime) -> bytes:
+        ticker = str(asset).encode()
+        micros = (dt.replace(tzinfo=None) - WireCodec._EPOCH) // WireCodec._MICROSECOND
+        return WireCodec._EVENT.pack(kind, len(ticker)) + ticker + WireCodec._TIME.pack(micros)
+
+    @staticmethod
+    def _str(value) -> bytes:
+        encoded = str(value).encode() if value is not None else b''
+        return WireCodec._STR.pack(len(encoded)) + encoded
+
+    @staticmethod
+    def _strs(frame: bytes, pos: int, n: int) -> (list, int):
+        values = []
+        for _ in range(n):
+            size = WireCodec._STR.unpack_from(frame, pos)[0]
+            pos += WireCodec._STR.size
+            values.append(frame[pos:pos + size].decode())
+            pos += size
+        return values, pos
+
+    @staticmethod
+    def _float(value) -> float:
+        return float('nan') if value is None else float(value)
+
+    @staticmethod
+    def _optional(value: float):
+        return None if math.isnan(value) else value
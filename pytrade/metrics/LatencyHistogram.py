@@ -0,0 +1,84 @@
+from typing import List
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in nanoseconds with 8 buckets per power of two, about 12% resolution.
+    Recording is a few integer operations without locks: rare lost updates from concurrent threads are accepted
+    for low overhead on the hot path.
+    """
+    # Values below 2^SUB_BITS go to their own buckets, larger ones by top SUB_BITS bits
+    SUB_BITS = 4
+    BUCKETS = 8 * 64
+
+    __slots__ = ('name', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts: List[int] = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        """
+        Add one duration
+        """
+        if ns < 16:
+            index = max(ns, 0)
+        else:
+            shift = ns.bit_length() - self.SUB_BITS
+            index = (shift << 3) + (ns >> shift)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """
+        Upper bound of q-th percentile in nanoseconds, 0 <= q <= 100
+        """
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    @staticmethod
+    def upper_bound(index: int) -> int:
+        """
+        Largest duration of the bucket
+        """
+        if index < 16:
+            return index
+        shift = (index >> 3) - 1
+        return ((index - (shift << 3) + 1) << shift) - 1
+
+    def snapshot(self) -> dict:
+        """
+        Count, mean, p50, p99 and max in microseconds
+        """
+        return {'count': self.count,
+                'mean_us': round(self.total / self.count / 1000, 1) if self.count else 0.0,
+                'p50_us': round(self.percentile(50) / 1000, 1),
+                'p99_us': round(self.percentile(99) / 1000, 1),
+                'max_us': round(self.max / 1000, 1)}
+
+    def reset(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = self.total = self.max = 0
+
+
+class NullHistogram(LatencyHistogram):
+    """
+    Histogram of disabled metrics, records nothing
+    """
+    __slots__ = ()
+
+    def record(self, ns: int):
+        pass
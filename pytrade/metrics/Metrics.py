@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+from metrics.LatencyHistogram import LatencyHistogram, NullHistogram
+from metrics.Tracer import Tracer
+
+
+class Metrics:
+    """
+    Runtime metrics of the live pipeline: latency histograms of pipeline stages, message counts by msgid
+    and gauges like queue depths. Snapshots are taken periodically, logged and served as json on http pull endpoint.
+    Stages of web quik pipeline: socket receive to lane dequeue, json decode, quik message parse, feed store,
+    strategy callbacks, broker send, and tick to order: from socket receive of the frame to sending the order,
+    caused by it.
+    """
+
+    class Stage:
+        QUEUE = "queue"
+        DECODE = "decode"
+        PARSE = "parse"
+        FEED_STORE = "feed_store"
+        STRATEGY = "strategy"
+        BROKER_SEND = "broker_send"
+        TICK_TO_ORDER = "tick_to_order"
+
+    def __init__(self, is_enabled: bool = True, log_seconds: float = 0, http_port: int = 0):
+        """
+        :param is_enabled: record anything or not
+        :param log_seconds: interval of snapshots to log, 0 to not log
+        :param http_port: local port of json snapshot endpoint, 0 to not serve
+        """
+        self._logger = logging.getLogger(__name__)
+        self.is_enabled = is_enabled
+        self._log_seconds = log_seconds
+        self._http_port = http_port
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        # Message rates of the last snapshot interval
+        self._last_counts: Dict[str, int] = {}
+        self._last_time = time.monotonic()
+        self._rates: Dict[str, float] = {}
+        self._http_server = None
+        # Orders, linked to events which caused them
+        self.tracer = Tracer(self.histogram(Metrics.Stage.TICK_TO_ORDER))
+
+    @staticmethod
+    def of(config) -> 'Metrics':
+        """
+        Metrics with snapshot interval and endpoint port from config
+        """
+        return Metrics(bool(config.get("metrics.enabled", True)),
+                       float(config.get("metrics.log.seconds", 0) or 0),
+                       int(config.get("metrics.http.port", 0) or 0))
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        """
+        Histogram of the stage to record durations to. Hot paths keep it to avoid lookups.
+        """
+        if not self.is_enabled:
+            return NullHistogram(stage)
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = LatencyHistogram(stage)
+        return histogram
+
+    def count(self, msgid):
+        """
+        Count received message of given msgid
+        """
+        if self.is_enabled:
+            self._counts[msgid] += 1
+
+    def gauge(self, name: str, func: Callable[[], float]):
+        """
+        Register current value function, like queue size, called on snapshot
+        """
+        self._gauges[name] = func
+
+    def snapshot(self) -> dict:
+        """
+        Stage latencies, message counts and rates of the last interval, gauge values
+        """
+        return {'stages': {name: histogram.snapshot() for name, histogram in self._histograms.items()},
+                'msgids': {str(msgid): {'count': count, 'rate': self._rates.get(msgid, 0.0)}
+                           for msgid, count in list(self._counts.items())},
+                'gauges': {name: func() for name, func in self._gauges.items()}}
+
+    def tick(self) -> dict:
+        """
+        Update message rates since previous tick and take a snapshot
+        """
+        now = time.monotonic()
+        counts = dict(self._counts)
+        seconds = now - self._last_time
+        if seconds > 0:
+            self._rates = {msgid: round((count - self._last_counts.get(msgid, 0)) / seconds, 1)
+                           for msgid, count in counts.items()}
+        self._last_counts, self._last_time = counts, now
+        return self.snapshot()
+
+    def start(self):
+        """
+        Start periodical snapshots logging and http endpoint, if configured
+        """
+        if not self.is_enabled:
+            return
+        if self._log_seconds:
+            threading.Thread(target=self._log_loop, name="metrics-log", daemon=True).start()
+        if self._http_port:
+            self._http_server = ThreadingHTTPServer(("127.0.0.1", self._http_port), self._handler_class())
+            threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+            self._logger.info("Serving metrics on http port %s", self._http_server.server_port)
+
+    def stop(self):
+        if self._http_server:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    def _log_loop(self):
+        while True:
+            time.sleep(self._log_seconds)
+            self._logger.info("Metrics: %s", json.dumps(self.tick()))
+
+    def _handler_class(self):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(metrics.snapshot() if metrics._log_seconds else metrics.tick()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
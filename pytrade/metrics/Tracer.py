@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from metrics.LatencyHistogram import LatencyHistogram
+
+
+class Tracer:
+    """
+    Tick to order tracing. Live feed events carry received, monotonic perf_counter_ns of their socket frame.
+    The event being dispatched to subscribers is the cause of orders, sent from subscriber callbacks
+    in the same thread. Each sent order gets a trace record, tick to order durations go to the histogram.
+    """
+
+    @dataclass
+    class Record:
+        """
+        Sent order and the event, which caused it
+        """
+        transid: int
+        ticker: str
+        is_buy: bool
+        price: float
+        quantity: int
+        # Cause event type, time and monotonic receive time of its frame. None if not sent from event callback.
+        cause: Optional[str]
+        cause_dt: Optional[datetime]
+        received_ns: Optional[int]
+        sent_ns: int
+
+        @property
+        def tick_to_order_us(self) -> Optional[float]:
+            return (self.sent_ns - self.received_ns) / 1000 if self.received_ns is not None else None
+
+    def __init__(self, histogram: Optional[LatencyHistogram] = None, max_records: int = 10000):
+        """
+        :param histogram: histogram of tick to order durations
+        :param max_records: number of last order records to keep
+        """
+        self._logger = logging.getLogger(__name__)
+        self.histogram = histogram or LatencyHistogram("tick_to_order")
+        self.records = deque(maxlen=max_records)
+        self._local = threading.local()
+
+    @property
+    def cause(self):
+        """
+        Event being dispatched in current thread
+        """
+        return getattr(self._local, 'cause', None)
+
+    @cause.setter
+    def cause(self, event):
+        self._local.cause = event
+
+    def on_order(self, transid: int, ticker: str, is_buy: bool, price: float, quantity: int) -> 'Tracer.Record':
+        """
+        Link just sent order to current cause event
+        """
+        sent = time.perf_counter_ns()
+        cause = self.cause
+        received = getattr(cause, 'received', None)
+        record = Tracer.Record(transid, ticker, is_buy, price, quantity,
+                               type(cause).__name__ if cause is not None else None, getattr(cause, 'dt', None),
+                               received, sent)
+        self.records.append(record)
+        if received is not None:
+            self.histogram.record(sent - received)
+            self._logger.info("Order %s sent %.1f us after the frame of %s %s", transid, record.tick_to_order_us,
+                              record.cause, record.cause_dt)
+        return record
+
+    def summary(self) -> dict:
+        """
+        Tick to order percentiles in microseconds
+        """
+        return {'orders': len(self.records), **self.histogram.snapshot(),
+                'p90_us': round(self.histogram.percentile(90) / 1000, 1)}
+
+    def last(self, n: int = 100) -> List['Tracer.Record']:
+        return list(self.records)[-n:]
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class Trade:
+    """
+    Execution of an order or its part
+    """
+    number: str
+    order_number: str
+    dt: datetime
+    class_code: str
+    sec_code: str
+    is_sell: bool
+    account: str
+    price: float
+    quantity: int
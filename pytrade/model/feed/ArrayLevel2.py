@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+
+
+class ArrayLevel2(Level2):
+    """
+    Level2 kept in contiguous price, bid volume and ask volume arrays sorted by price. Absent volume is nan.
+    Level2Item objects are created only when items are iterated.
+    """
+    __slots__ = ('price', 'bid_vol', 'ask_vol')
+
+    def __init__(self, dt: datetime, asset: Asset, price: np.ndarray, bid_vol: np.ndarray, ask_vol: np.ndarray):
+        """
+        :param price, bid_vol, ask_vol: float arrays sorted by price
+        """
+        self.dt = dt
+        self.asset = asset
+        self.price = price
+        self.bid_vol = bid_vol
+        self.ask_vol = ask_vol
+
+    @staticmethod
+    def of(dt: datetime, asset: Asset, items: List[Level2Item]):
+        return ArrayLevel2.of_rows(dt, asset, np.array([(item.price, item.bid_vol, item.ask_vol) for item in items],
+                                                       dtype=np.float64).reshape(-1, 3))
+
+    @staticmethod
+    def of_rows(dt: datetime, asset: Asset, rows: np.ndarray):
+        """
+        Level2 of price, bid volume, ask volume rows in any order
+        """
+        price, bid_vol, ask_vol = np.ascontiguousarray(rows[np.argsort(rows[:, 0], kind='mergesort')].T)
+        return ArrayLevel2(dt, asset, price, bid_vol, ask_vol)
+
+    @property
+    def items(self) -> List[Level2Item]:
+        """
+        Level2 items sorted by price, absent volume is None. Items are created on each call.
+        """
+        return [Level2Item(price, None if bid_vol != bid_vol else bid_vol, None if ask_vol != ask_vol else ask_vol)
+                for price, bid_vol, ask_vol in zip(self.price.tolist(), self.bid_vol.tolist(), self.ask_vol.tolist())]
+
+    def to_numpy(self) -> np.ndarray:
+        return np.column_stack((self.price, self.bid_vol, self.ask_vol))
@@ -1,23 +1,44 @@
-from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Iterable, List, Optional
 
+import numpy as np
 from sortedcontainers import SortedList
 
 from model.feed.Asset import Asset
 from model.feed.Level2Item import Level2Item
 
 
-@dataclass
 class Level2:
     """
     All level2 quotes at the moment
     """
-    dt: datetime
-    asset: Asset
-    # Level 2 items price: bid or ask, sorted by price
-    items: List[Level2Item] = SortedList(key=lambda item: item.price)
+    # received is set by live feed only: monotonic perf_counter_ns of the socket frame. None for events of other feeds
+    __slots__ = ('received', 'dt', 'asset', 'items')
+
+    def __init__(self, dt: datetime, asset: Asset, items: Optional[Iterable[Level2Item]] = None):
+        """
+        :param items: level2 items sorted by price. New empty sorted list if None.
+        """
+        self.received = None
+        self.dt = dt
+        self.asset = asset
+        # Level 2 items price: bid or ask, sorted by price
+        self.items: List[Level2Item] = items if items is not None else SortedList(key=lambda item: item.price)
 
     @staticmethod
-    def of(dt: datetime, asset: str, items: List[Level2Item]):
+    def of(dt: datetime, asset: Asset, items: List[Level2Item]):
         return Level2(dt, asset, SortedList(items, key=lambda item: item.price))
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Price, bid volume, ask volume rows, absent volume is nan
+        """
+        return np.array([(item.price, item.bid_vol, item.ask_vol) for item in self.items], dtype=np.float64)\
+            .reshape(-1, 3)
+
+    def __eq__(self, other):
+        return isinstance(other, Level2) and (self.dt, self.asset, list(self.items)) == \
+               (other.dt, other.asset, list(other.items))
+
+    def __repr__(self):
+        return f"Level2(dt={self.dt!r}, asset={self.asset!r}, items={list(self.items)!r})"
@@ -3,6 +3,11 @@ from dataclasses import dataclass
 
 @dataclass
 class Level2Item:
+    """
+    Price level of level2 with bid and ask volumes, absent volume is None
+    """
+    __slots__ = ('price', 'bid_vol', 'ask_vol')
+
     price: float
     bid_vol: float
     ask_vol: float
@@ -9,6 +9,10 @@ class Ohlcv:
     """
     Candle open, high, low, close, volume with datetime
     """
+    # received is set by live feed only: monotonic perf_counter_ns of the socket frame, not a dataclass field.
+    # None for events of other feeds
+    __slots__ = ('received', 'dt', 'asset', 'o', 'h', 'l', 'c', 'v')
+
     dt: datetime
     asset: Asset
     o: float
@@ -16,3 +20,6 @@ class Ohlcv:
     l: float
     c: float
     v: float
+
+    def __post_init__(self):
+        self.received = None
@@ -9,9 +9,16 @@ class Quote:
     """
     Quote with dt,asset,bid,ask,last,last change
     """
+    # received is set by live feed only: monotonic perf_counter_ns of the socket frame, not a dataclass field.
+    # None for events of other feeds
+    __slots__ = ('received', 'dt', 'asset', 'bid', 'ask', 'last', 'last_change')
+
     dt: datetime
     asset: Asset
     bid: float
     ask: float
     last: float
     last_change: float
+
+    def __post_init__(self):
+        self.received = None
@@ -10,6 +10,7 @@ from model.feed.Asset import Asset
 from model.feed.Level2 import Level2
 from model.feed.Ohlcv import Ohlcv
 from model.feed.Quote import Quote
+from strategy.features.IncrementalLevel2Features import IncrementalLevel2Features
 from strategy.features.Level2Features import Level2Features
 from strategy.features.PriceFeatures import PriceFeatures
 from strategy.features.TargetFeatures import TargetFeatures
@@ -19,7 +20,8 @@ pd.options.display.width = 0
 
 class PeriodicalLearnStrategy:
     """
-    Strategy based on periodical additional learning
+    Strategy based on periodical additional learning.
+    Learn state is used by feed callbacks only, they come one by one from the feed thread, so it's not locked.
     """
 
     def __init__(self, feed: Feed, broker: Broker, config):
@@ -29,10 +31,14 @@ class PeriodicalLearnStrategy:
         self.asset = Asset(config['trade.asset.sec_class'], config['trade.asset.sec_code'])
         # self._last_big_learn_time = datetime.min
         self._last_learn_time = None
-        # todo:: parameterise
-        self._interval_big_learn = timedelta(seconds=10)
-        self._interval_small_learn = timedelta(hours=2)
+        self._interval_big_learn = timedelta(seconds=float(config.get('strategy.learn.big.seconds', 10)))
+        self._interval_small_learn = timedelta(minutes=float(config.get('strategy.learn.small.minutes', 120)))
+        # Periodical learn takes only last quotes from feed memory
+        self._learn_window = timedelta(minutes=float(config.get('strategy.learn.window.minutes', 120)))
+        self._buckets = int(config.get('strategy.level2.buckets', 20))
         self._csv_connector = CsvFeedConnector(config)
+        # Level2 features are calculated when new level2 arrives, not on each learn. Only the learn window is kept.
+        self._level2_features = IncrementalLevel2Features(buckets=self._buckets, retention=self._learn_window)
         self._feed.subscribe_feed(self.asset, self)
         self._logger.info(f"Strategy initialized with initial learn interval {self._interval_big_learn},"
                           f" additional learn interval ${self._interval_small_learn}")
@@ -41,11 +47,10 @@ class PeriodicalLearnStrategy:
         _, quotes, level2 = self._csv_connector.read_csvs()
         quotes.set_index(["ticker"], append=True,inplace=True)
         level2.set_index(["ticker"], append=True,inplace=True)
-        self.learn_on(quotes, level2)
+        self.learn_on(quotes, Level2Features().level2_buckets(level2, buckets=self._buckets))
 
-    def learn_on(self, quotes: pd.DataFrame, level2: pd.DataFrame):
+    def learn_on(self, quotes: pd.DataFrame, level2_features: pd.DataFrame):
         self._logger.info("Starting feature engineering")
-        level2_features = Level2Features().level2_buckets(level2)
         target_features = TargetFeatures().min_max_future(quotes, 5, 'min')
         price_features = PriceFeatures().prices(quotes)
         features = pd.merge_asof(price_features, level2_features, left_on="datetime", right_on="datetime",
@@ -53,15 +58,19 @@ class PeriodicalLearnStrategy:
         self._logger.info("Completed feature engineering")
         return features, target_features
 
-    def periodical_learn(self):
+    def periodical_learn(self, dt: datetime):
         """
-        Learn on last data we have
+        Learn on quotes of the last learn window up to dt
         """
         self._logger.info("Starting periodical learn")
-        self.learn_on(self._feed.quotes, self._feed.level2)
+        # Quotes of the window only. Zero-copy if retention keeps the window in memory, read back from spill otherwise.
+        quotes = self._feed.window(self.asset, dt - self._learn_window, dt)
+        quotes.index = pd.MultiIndex.from_arrays([quotes.index, [str(self.asset)] * len(quotes)],
+                                                 names=['datetime', 'ticker'])
+        self.learn_on(quotes, self._level2_features.features)
 
         # Set last learning time to the last quote time
-        self._last_learn_time = self._feed.quotes.index[-1][0]
+        self._last_learn_time = quotes.index[-1][0] if len(quotes) else dt
         self._logger.info(f"Completed periodical learn, last time: {self._last_learn_time}")
 
     def run(self):
@@ -73,25 +82,25 @@ class PeriodicalLearnStrategy:
         Receive a new candle event from feed. self.feed.candles dataframe contains all candles including this one.
         """
         # Skip if too early for a new processing cycle
-        self._logger.debug(f"Got new candle ohlcv={ohlcv}")
+        self._logger.debug("Got new candle ohlcv=%s", ohlcv)
 
     def on_heartbeat(self):
-        self._logger.debug(f"Got heartbeat")
+        self._logger.debug("Got heartbeat")
         return
 
     def on_quote(self, quote: Quote):
         """
         Got a new quote. self.feed.quotes contains all quotes including this one
         """
-        self._logger.debug(f"Got new quote: {quote}")
+        self._logger.debug("Got new quote: %s", quote)
         if not self._last_learn_time:
             self._last_learn_time = quote.dt
         if (quote.dt - self._last_learn_time) >= self._interval_big_learn:
-            self.periodical_learn()
+            self.periodical_learn(quote.dt)
 
     def on_level2(self, level2: Level2):
         """
         Got new level2 data. self.feed.level2 contains all level2 records including this one
         """
-        self._logger.debug(f"Got new level2: {level2}")
-        return
+        self._logger.debug("Got new level2: %s", level2)
+        self._level2_features.on_level2(level2)
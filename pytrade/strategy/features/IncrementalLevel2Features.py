@@ -0,0 +1,71 @@
+from collections import deque
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sortedcontainers import SortedList
+
+from feed.TickBuffer import TickBuffer
+from model.feed.Level2 import Level2
+from strategy.features.Level2Features import Level2Features
+
+
+class IncrementalLevel2Features:
+    """
+    Level2 bucket features, calculated for each new level2 snapshot when it arrives.
+    Level2 size is a running median of snapshot price ranges inside retention interval, unless fixed size is given.
+    """
+
+    def __init__(self, l2size: float = 0, buckets: int = 20, retention: Optional[timedelta] = None):
+        """
+        :param l2size: fixed max-min price of level2, 0 to estimate it from received snapshots
+        :param buckets: split level2 snapshots to this number of items, calculate volume inside each bucket
+        :param retention: keep features and price ranges for this last interval only. None to keep all.
+        """
+        self._l2size = l2size
+        self._buckets = buckets
+        self._retention = retention
+        # Price ranges of snapshots inside retention interval for running median, and their times to expire them
+        self._ranges = SortedList()
+        self._range_times = deque()
+        self._features = TickBuffer(Level2Features.bucket_columns(buckets), retention)
+
+    @property
+    def l2size(self) -> float:
+        if self._l2size or not self._ranges:
+            return self._l2size
+        n = len(self._ranges)
+        return (self._ranges[(n - 1) // 2] + self._ranges[n // 2]) / 2
+
+    @property
+    def features(self) -> pd.DataFrame:
+        """
+        Bucket features of all processed snapshots, indexed by datetime. Values are not copied.
+        """
+        return self._features.to_df()
+
+    def on_level2(self, level2: Level2):
+        """
+        Calculate buckets of new level2 snapshot and append them to features
+        """
+        items = level2.to_numpy()
+        if not len(items):
+            return
+        price = items[:, 0]
+        self._add_range(level2.dt, price.max() - price.min())
+        buckets = Level2Features.snapshot_buckets(price, items[:, 1], items[:, 2], self.l2size, self._buckets)
+        if buckets is not None:
+            self._features.append(level2.dt, buckets)
+
+    def _add_range(self, dt, price_range: float):
+        """
+        Add snapshot price range, remove ranges older than retention
+        """
+        self._ranges.add(price_range)
+        self._range_times.append((dt, price_range))
+        if self._retention is None:
+            return
+        start = dt - self._retention
+        while self._range_times[0][0] < start:
+            self._ranges.remove(self._range_times.popleft()[1])
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 import pandas as pd
 import numpy as np
 
@@ -15,66 +17,133 @@ class Level2Features:
         level2: DataFrame with level2 tick columns: datetime, price, bid_vol, ask_vol
         level2 price and volume for each time
         """
+        # Sort items by time, each time is a level2 snapshot
+        dt = level2['datetime'].values
+        order = np.argsort(dt, kind='mergesort')
+        dt = dt[order]
+        bid_vol = level2['bid_vol'].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        ask_vol = level2['ask_vol'].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        starts, snapshot = self._snapshots(dt)
+
         # Assign bucket number for each level2 item
-        level2.set_index("datetime")
-        level2 = self.assign_bucket(level2, l2size, buckets)
+        bucket = self._buckets_of(level2['price'].to_numpy(dtype=np.float64)[order], bid_vol, ask_vol, starts,
+                                  snapshot, l2size, buckets)
 
-        # Pivot buckets to feature columns: bucket_1, bucket_2 etc. with summary bucket's volume as value.
-        maxbucket = buckets // 2 - 1
+        # Summary volume and number of items of each snapshot x bucket cell in one pass
+        # Bid volumes go to negative buckets, ask volumes to positive ones
         minbucket = -buckets // 2
-        askfeatures = self.pivot_buckets(level2, 'ask_vol', 0, maxbucket)
-        bidfeatures = self.pivot_buckets(level2, 'bid_vol', minbucket, -1)
+        valid = ~np.isnan(bucket)
+        if not valid.any():
+            # No snapshot has both asks and bids
+            return pd.DataFrame(columns=self.bucket_columns(buckets), index=pd.DatetimeIndex([], name='datetime'),
+                                dtype=float)
+        cell = snapshot[valid] * buckets + (bucket[valid].astype(int) - minbucket)
+        vol = np.nan_to_num(np.where(bucket[valid] >= 0, ask_vol[valid], bid_vol[valid]))
+        size = len(starts) * buckets
+        volumes = np.bincount(cell, weights=vol, minlength=size).astype(float).reshape(-1, buckets)
+        counts = np.bincount(cell, minlength=size).reshape(-1, buckets)
 
-        # Ask + bid buckets
-        level2features = bidfeatures.merge(askfeatures, on='datetime')
-        return level2features
+        # Empty bucket is nan if this bucket is filled in other snapshots, 0 if it's always empty
+        volumes[(counts == 0) & (counts.sum(axis=0) > 0)] = np.nan
+
+        # Only snapshots with both ask and bid buckets
+        nbid = -minbucket
+        keep = (counts[:, :nbid].sum(axis=1) > 0) & (counts[:, nbid:].sum(axis=1) > 0)
+        return pd.DataFrame(volumes[keep], index=pd.DatetimeIndex(dt[starts][keep], name='datetime'),
+                            columns=self.bucket_columns(buckets))
 
     def assign_bucket(self, level2: pd.DataFrame, l2size: int = 0, buckets: int = 20) -> pd.DataFrame:
         """
-        To each level2 item set it's bucket number.
+        To each level2 item set it's bucket number, min ask, max bid and middle price of it's snapshot.
         l2size: max-min price across all level2 snapshots
         buckets: split level2 snapshots to this number of items, calculate volume inside each bucket
         """
-        # Calc middle price between ask and bid
         level2 = level2.set_index("datetime")
-        askmin = level2[level2['ask_vol'].notna()].groupby('datetime')['price'].min().reset_index().set_index(
-            "datetime")
-        level2['price_min'] = askmin['price']
-        bidmax = level2[level2['bid_vol'].notna()].groupby('datetime')['price'].max().reset_index().set_index(
-            "datetime")
-        level2['price_max'] = bidmax['price']
-        level2['price_middle'] = (askmin['price'] + bidmax['price']) / 2
-
-        # Assign a bucket number to each level2 item
+        dt = level2.index.values
+        order = np.argsort(dt, kind='mergesort')
+        starts, snapshot = self._snapshots(dt[order])
+        price = level2['price'].to_numpy(dtype=np.float64)[order]
+        bid_vol = level2['bid_vol'].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        ask_vol = level2['ask_vol'].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        askmin, bidmax = self._spreads_of(price, bid_vol, ask_vol, starts)
+        for column, values in (('price_min', askmin[snapshot]), ('price_max', bidmax[snapshot]),
+                               ('price_middle', ((askmin + bidmax) / 2)[snapshot]),
+                               ('bucket', self._buckets_of(price, bid_vol, ask_vol, starts, snapshot, l2size,
+                                                           buckets))):
+            unsorted = np.empty(len(level2))
+            unsorted[order] = values
+            level2[column] = unsorted
+        return level2
+
+    @staticmethod
+    def _snapshots(dt: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Start position of each snapshot and snapshot number of each item in sorted datetime array
+        """
+        changed = np.empty(len(dt), dtype=bool)
+        changed[:1] = True
+        changed[1:] = dt[1:] != dt[:-1]
+        return np.flatnonzero(changed), np.cumsum(changed) - 1
+
+    @staticmethod
+    def _buckets_of(price: np.ndarray, bid_vol: np.ndarray, ask_vol: np.ndarray, starts: np.ndarray,
+                    snapshot: np.ndarray, l2size: float, buckets: int) -> np.ndarray:
+        """
+        Bucket number of each item of time sorted level2, nan if snapshot has no asks or no bids
+        """
+        if not len(price):
+            return np.empty(0)
+        # Middle price between min ask and max bid of each snapshot
+        askmin, bidmax = Level2Features._spreads_of(price, bid_vol, ask_vol, starts)
+        price_middle = (askmin + bidmax) / 2
+
         # scalar level2 size and bucket size
         if not l2size:
-            l2size = level2.groupby('datetime')['price'].agg(np.ptp).reset_index()['price'].median()
-        # 10 ask steps + 10 bid steps
-        # buckets = 20
+            l2size = np.median(np.maximum.reduceat(price, starts) - np.minimum.reduceat(price, starts))
         bucketsize = l2size / buckets
 
         # If price is too out, set maximum possible bucket
-        level2['bucket'] = (level2['price'] - level2['price_middle']) // bucketsize
-        maxbucket = buckets // 2 - 1
-        minbucket = -buckets // 2
-        level2['bucket'] = level2['bucket'].clip(upper=maxbucket, lower=minbucket)
-        return level2
+        with np.errstate(invalid='ignore'):
+            bucket = (price - price_middle[snapshot]) // bucketsize
+        return np.clip(bucket, -buckets // 2, buckets // 2 - 1)
+
+    @staticmethod
+    def _spreads_of(price: np.ndarray, bid_vol: np.ndarray, ask_vol: np.ndarray, starts: np.ndarray) \
+            -> (np.ndarray, np.ndarray):
+        """
+        Min ask and max bid price of each snapshot, nan if the snapshot has no asks or no bids
+        """
+        if not len(price):
+            return np.empty(0), np.empty(0)
+        askmin = np.minimum.reduceat(np.where(np.isnan(ask_vol), np.inf, price), starts)
+        bidmax = np.maximum.reduceat(np.where(np.isnan(bid_vol), -np.inf, price), starts)
+        askmin[np.isinf(askmin)] = np.nan
+        bidmax[np.isinf(bidmax)] = np.nan
+        return askmin, bidmax
 
-    def pivot_buckets(self, level2: pd.DataFrame, vol_col_name: str, minbucket: int, maxbucket: int) -> pd.DataFrame:
+    @staticmethod
+    def bucket_columns(buckets: int = 20) -> List[str]:
         """
-        Pivot dataframe to make bucket columns with volume values
+        Feature column names: bid buckets, then ask buckets
         """
-        # Calculate volume inside each group
-        grouped = level2[level2['bucket'].between(minbucket, maxbucket)].groupby(['datetime', 'bucket'])[
-            vol_col_name].sum().reset_index(level=1)
-
-        grouped['bucket'] = grouped['bucket'].astype(int)
-        features = grouped.reset_index().pivot_table(index='datetime', columns='bucket', values=vol_col_name)
-        # Add absent buckets (rare case)
-        for col in range(minbucket, maxbucket + 1):
-            if col not in features.columns:
-                features[col] = 0
-        features = features[sorted(features)]
-
-        features.columns = ['l2_bucket_' + str(col) for col in features.columns]
-        return features
+        return ['l2_bucket_' + str(bucket) for bucket in range(-buckets // 2, buckets // 2)]
+
+    @staticmethod
+    def snapshot_buckets(price: np.ndarray, bid_vol: np.ndarray, ask_vol: np.ndarray, l2size: float,
+                         buckets: int = 20) -> Optional[np.ndarray]:
+        """
+        Summary volumes inside each bucket of one level2 snapshot. Bid buckets go first, then ask ones.
+        Returns None if the snapshot has no bids or no asks.
+        price, bid_vol, ask_vol: arrays of level2 items, absent volume is nan
+        """
+        has_ask, has_bid = ~np.isnan(ask_vol), ~np.isnan(bid_vol)
+        if not has_ask.any() or not has_bid.any():
+            return None
+        price_middle = (price[has_ask].min() + price[has_bid].max()) / 2
+        minbucket = -buckets // 2
+        maxbucket = buckets // 2 - 1
+        bucket = np.clip((price - price_middle) // (l2size / buckets), minbucket, maxbucket).astype(int) - minbucket
+        # Bid volumes of negative buckets, ask volumes of positive ones
+        bid = np.bincount(bucket, weights=np.nan_to_num(bid_vol), minlength=buckets)[:-minbucket]
+        ask = np.bincount(bucket, weights=np.nan_to_num(ask_vol), minlength=buckets)[-minbucket:]
+        return np.concatenate([bid, ask])
@@ -1,5 +1,9 @@
+import inspect
+from typing import List, Optional, Tuple
+
 import pandas as pd
 import numpy as np
+from pandas.api.indexers import BaseIndexer
 
 
 class TargetFeatures:
@@ -7,17 +11,51 @@ class TargetFeatures:
     Target features engineering
     """
 
+    class FutureWindow(BaseIndexer):
+        """
+        Rolling window from current row inclusive to precalculated end row exclusive.
+        Lets pandas run it's deque based rolling min/max forward in time without reversing the data.
+        """
+
+        # Pandas checks that the signature is the same as BaseIndexer's one of its version, step is there since 1.5
+        if 'step' in inspect.signature(BaseIndexer.get_window_bounds).parameters:
+            def get_window_bounds(self, num_values: int = 0, min_periods: Optional[int] = None,
+                                  center: Optional[bool] = None, closed: Optional[str] = None,
+                                  step: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+                return np.arange(num_values, dtype=np.int64), self.end
+        else:
+            def get_window_bounds(self, num_values: int = 0, min_periods: Optional[int] = None,
+                                  center: Optional[bool] = None,
+                                  closed: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+                return np.arange(num_values, dtype=np.int64), self.end
+
     def min_max_future(self, df: pd.DataFrame, periods: int, freq: str) -> pd.DataFrame:
         """
         Add target features: min and max price during future window
         :param freq : time unit for future window
         :param periods: duration of future window in given time units
         """
-        # Trick to implement forward rolling window for timeseries with unequal intervals:
-        # reverse, apply rolling, then reverse back
         windowspec = f'{periods} {freq}'
-        #df2 = df.reset_index(level='ticker', drop=True)
-        df2 = df.reset_index(level='ticker', drop=True)[['ask', 'bid']].sort_index(ascending=False).rolling(windowspec, min_periods=0).agg(
-            {'ask': 'max', 'bid': 'min'}, closed='right')
-        df2[['fut_ask_max', 'fut_bid_min']] = df2[['ask', 'bid']]
-        return df2.sort_index()
+        df2 = self.min_max_futures(df, [windowspec])
+        return df2.rename(columns={f'fut_ask_max_{windowspec}': 'fut_ask_max',
+                                   f'fut_bid_min_{windowspec}': 'fut_bid_min'})
+
+    def min_max_futures(self, df: pd.DataFrame, windows: List[str]) -> pd.DataFrame:
+        """
+        Target features for several future windows in one call: max ask and min bid from current time inclusive
+        to current time + window exclusive. Columns are named fut_ask_max_<window>, fut_bid_min_<window>
+        :param df: quotes with ask and bid columns, indexed by datetime and ticker
+        :param windows: future window durations like "5 min", "1h"
+        """
+        df2 = df.reset_index(level='ticker', drop=True)[['ask', 'bid']]
+        if not df2.index.is_monotonic_increasing:
+            df2 = df2.sort_index(kind='mergesort')
+        times = df2.index.values
+        features = {}
+        for window in windows:
+            # Two pointers: window end is the first time >= current time + window
+            end = np.searchsorted(times, times + pd.Timedelta(window).to_timedelta64(), side='left').astype(np.int64)
+            indexer = self.FutureWindow(end=end)
+            features[f'fut_ask_max_{window}'] = df2['ask'].rolling(indexer, min_periods=0).max().values
+            features[f'fut_bid_min_{window}'] = df2['bid'].rolling(indexer, min_periods=0).min().values
+        return pd.concat([df2, pd.DataFrame(features, index=df2.index)], axis=1)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from pytrade.backtest.Backtest import Backtest
+from model.feed.Asset import Asset
+
+
+class BuyAndSellStrategy:
+    """
+    Buys on the first quote and sells on the third one
+    """
+
+    def __init__(self, feed, broker, config):
+        self.asset = Asset(config['trade.asset.sec_class'], config['trade.asset.sec_code'])
+        self._broker = broker
+        self.quotes = 0
+        self.heartbeats = 0
+        self.orders = []
+        feed.subscribe_feed(self.asset, self)
+        broker.subscribe_broker(self)
+
+    def on_quote(self, quote):
+        self.quotes += 1
+        if self.quotes == 1:
+            self._broker.buy(self.asset.class_code, self.asset.sec_code, quote.ask, 2)
+        elif self.quotes == 3:
+            self._broker.sell(self.asset.class_code, self.asset.sec_code, quote.bid, 2)
+
+    def on_heartbeat(self):
+        self.heartbeats += 1
+
+    def on_orders(self, order):
+        self.orders.append(order)
+
+
+class TestBacktest(TestCase):
+    config = {'trade.asset.sec_class': 'QJSIM', 'trade.asset.sec_code': 'SBER',
+              'backtest.cash': 1000, 'backtest.heartbeat.seconds': 1}
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = {f"feed.csv.{kind}": os.path.join(tmpdir, f"{kind}.csv")
+                     for kind in ['candles', 'quotes', 'level2']}
+            with open(paths['feed.csv.candles'], 'w') as f:
+                f.write("2021-11-14 10:00:00,QJSIM/SBER,10,10,10,10,5\n")
+            with open(paths['feed.csv.quotes'], 'w') as f:
+                f.write("2021-11-14 10:00:00.1,QJSIM/SBER,9,10,10,0\n"
+                        "2021-11-14 10:00:01,QJSIM/SBER,11,12,12,0\n"
+                        "2021-11-14 10:00:02,QJSIM/SBER,14,15,15,0\n"
+                        "2021-11-14 10:00:03,QJSIM/SBER,13,14,14,0\n")
+            with open(paths['feed.csv.level2'], 'w') as f:
+                f.write("2021-11-14 10:00:00.1,QJSIM/SBER,9,1,\n"
+                        "2021-11-14 10:00:00.1,QJSIM/SBER,10,,1\n")
+            backtest = Backtest({**self.config, **paths, 'feed.storage.dir': tmpdir},
+                                strategy_class=BuyAndSellStrategy)
+
+            result = backtest.run()
+
+        # Bought 2 by ask 10, sold 2 by bid 14
+        self.assertEqual([(False, 10, 2), (True, 14, 2)],
+                         list(result.trades[['is_sell', 'price', 'quantity']].itertuples(index=False, name=None)))
+        self.assertEqual(1008, backtest.cash)
+        self.assertEqual(0, backtest.positions[backtest.asset])
+        self.assertEqual(8, result.pnl)
+        # Active and filled state of each order
+        self.assertEqual([1, 3, 1, 3], [order.status for order in backtest.strategy.orders])
+        # Candle, 4 quotes, level2
+        self.assertEqual(6, result.events)
+        # Each heartbeat comes from feed and from broker
+        self.assertEqual(6, backtest.strategy.heartbeats)
+        # First event, 3 heartbeats with the time of the last event before them, the end
+        self.assertEqual(5, len(result.equity))
+        self.assertEqual([1000, 1000 - 20 + 2 * 9.5, 1000 - 20 + 2 * 11.5, 1008, 1008],
+                         result.equity['equity'].tolist())
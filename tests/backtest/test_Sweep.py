@@ -0,0 +1,74 @@
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase
+
+import pandas as pd
+
+from pytrade.backtest.Sweep import Sweep
+from model.feed.Asset import Asset
+
+
+class BuyAndSellStrategy:
+    """
+    Buys configured quantity on the first quote of the day and sells it on the last one
+    """
+
+    def __init__(self, feed, broker, config):
+        self.asset = Asset(config['trade.asset.sec_class'], config['trade.asset.sec_code'])
+        self._broker = broker
+        self._quantity = config['test.quantity']
+        self._quotes = 0
+        feed.subscribe_feed(self.asset, self)
+
+    def on_quote(self, quote):
+        self._quotes += 1
+        if self._quotes == 1:
+            self._broker.buy(self.asset.class_code, self.asset.sec_code, quote.ask, self._quantity)
+        elif self._quotes == 2:
+            self._broker.sell(self.asset.class_code, self.asset.sec_code, quote.bid, self._quantity)
+
+
+class TestSweep(TestCase):
+    config = {'trade.asset.sec_class': 'QJSIM', 'trade.asset.sec_code': 'SBER', 'backtest.cash': 1000}
+
+    def test_combinations(self):
+        self.assertEqual([{'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'}, {'a': 2, 'b': 'x'}, {'a': 2, 'b': 'y'}],
+                         Sweep.combinations({'a': [1, 2], 'b': ['x', 'y']}))
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = {f"feed.csv.{kind}": os.path.join(tmpdir, f"{kind}.csv")
+                     for kind in ['candles', 'quotes', 'level2']}
+            with open(paths['feed.csv.candles'], 'w') as f:
+                f.write("2021-11-14 10:00:00,QJSIM/SBER,10,10,10,10,5\n")
+            with open(paths['feed.csv.quotes'], 'w') as f:
+                # Price goes up on the first day, down on the second one
+                f.write("2021-11-14 10:00:00,QJSIM/SBER,9,10,10,0\n"
+                        "2021-11-14 10:00:01,QJSIM/SBER,12,13,13,0\n"
+                        "2021-11-15 10:00:00,QJSIM/SBER,9,10,10,0\n"
+                        "2021-11-15 10:00:01,QJSIM/SBER,8,9,9,0\n")
+            with open(paths['feed.csv.level2'], 'w') as f:
+                f.write("2021-11-15 10:00:00,QJSIM/SBER,9,1,\n")
+            sweep = Sweep({**self.config, **paths, 'feed.storage.dir': tmpdir}, {'test.quantity': [1, 2]},
+                          strategy_class=BuyAndSellStrategy, processes=2)
+
+            table = sweep.run()
+
+        self.assertEqual([date(2021, 11, 14)] * 2 + [date(2021, 11, 15)] * 2, table['day'].tolist())
+        self.assertEqual([1, 2, 1, 2], table['test.quantity'].tolist())
+        self.assertEqual([2, 4, -2, -4], table['pnl'].tolist())
+        self.assertEqual([2, 2, 2, 2], table['trades'].tolist())
+
+    def test_walk_forward(self):
+        table = pd.DataFrame({'day': [1, 1, 2, 2, 3, 3, 4, 4],
+                              'param': ['a', 'b'] * 4,
+                              'pnl': [1, 0, 1, 0, -1, 5, 0, 1]})
+
+        wf = Sweep.walk_forward(table, ['param'], 2)
+
+        # Day 3: a is the best on days 1, 2. Day 4: b is the best on days 2, 3.
+        self.assertEqual([3, 4], wf['day'].tolist())
+        self.assertEqual(['a', 'b'], wf['param'].tolist())
+        self.assertEqual([1, 2.5], wf['train_pnl'].tolist())
+        self.assertEqual([-1, 1], wf['test_pnl'].tolist())
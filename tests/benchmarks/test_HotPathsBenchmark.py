@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from benchmarks.SyntheticDay import SyntheticDay
+from benchmarks.bench_HotPaths import HotPathsBenchmark
+
+
+class TestHotPathsBenchmark(TestCase):
+    def test_synthetic_day(self):
+        day = SyntheticDay(scale=0.01, depth=5)
+        quotes, level2 = day.quotes(), day.level2()
+        self.assertEqual(1000, len(quotes))
+        self.assertEqual(520, len(day.candles()))
+        self.assertEqual(10 * len(day.level2_times), len(level2))
+        self.assertTrue(quotes.index.is_monotonic_increasing)
+        self.assertTrue((quotes['bid'] < quotes['ask']).all())
+        # Deterministic by seed
+        self.assertTrue(quotes.equals(SyntheticDay(scale=0.01, depth=5).quotes()))
+        self.assertEqual(len(day.level2_times), len(day.quik_level2()))
+
+    def test_run(self):
+        results = HotPathsBenchmark(scale=0.002).run(repeat=1)
+        self.assertEqual(set(HotPathsBenchmark(scale=0.002).cases), set(results))
+        self.assertTrue(all(value > 0 for value in results.values()))
+
+    def test_compare(self):
+        comparison = HotPathsBenchmark.compare({'a': 60, 'b': 80, 'c': 10}, {'a': 100, 'b': 100}, threshold=0.3)
+        self.assertEqual((60, 100, 0.6, True), comparison['a'])
+        self.assertEqual((80, 100, 0.8, False), comparison['b'])
+        self.assertEqual((10, None, None, False), comparison['c'])
+
+    def test_compare_relative_to_reference(self):
+        # Twice slower machine, b is slower than reference by 40%
+        comparison = HotPathsBenchmark.compare({'reference': 50, 'a': 50, 'b': 30},
+                                               {'reference': 100, 'a': 100, 'b': 100}, threshold=0.3)
+        self.assertEqual((50, 100, 1.0, False), comparison['a'])
+        self.assertEqual((30, 100, 0.6, True), comparison['b'])
+        self.assertFalse(comparison['reference'][3])
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import websocket
+
+from benchmarks.WebQuikStandIn import WebQuikStandIn
+
+
+class TestWebQuikStandIn(TestCase):
+    def setUp(self):
+        frames = [b'{"msgid":21011,"dataResult":{"QJSIM\\u00a6SBER":{"bid":1,"offer":2}}}',
+                  b'{"msgid":21016,"graph":{"QJSIM\\u00a6SBER\\u00a60":[]}}']
+        self.stand_in = WebQuikStandIn(WebQuikStandIn.timed(frames, rate=100), speed=0).start()
+        self.socket = websocket.create_connection(self.stand_in.url, timeout=5)
+
+    def tearDown(self):
+        self.socket.close()
+        self.stand_in.stop()
+
+    def recv_msgid(self) -> int:
+        return json.loads(self.socket.recv())['msgid']
+
+    def test_session_and_replay(self):
+        self.socket.send('{"msgid":10000,"login":"user","password":"passwd"}')
+        self.assertEqual([20006, 20008], [self.recv_msgid(), self.recv_msgid()])
+        self.socket.send('{"msgid":10008}')
+        # Pings in between are answered by the client socket
+        self.assertEqual([20000, 21011, 21016], [self.recv_msgid() for _ in range(3)])
+        self.assertTrue(self.stand_in.is_replayed.wait(5))
+        report = self.stand_in.report()
+        self.assertEqual(2, report['frames'])
+        self.assertGreaterEqual(report['send_lag_max_ms'], 0)
+
+    def test_order_reply(self):
+        self.socket.send('{"msgid":12000,"transid":7,"ccode":"QJSIM","scode":"SBER","sell":0,"quantity":2,'
+                         '"account":"acc1","price":100}')
+        reply, order = json.loads(self.socket.recv()), json.loads(self.socket.recv())
+        self.assertEqual((21009, 7, 3), (reply['msgid'], reply['request'], reply['status']))
+        self.assertEqual((21001, 'SBER', 2, 200, 1), (order['msgid'], order['scode'], order['qty'], order['volume'],
+                                                      order['status']))
+
+    def test_read_frames(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = os.path.join(data_dir, 'frames.txt')
+            with open(path, 'wb') as f:
+                f.write(b'{"msgid":21011}\n0.5\t{"msgid":21014}\n\n{"msgid":21016}\n')
+            frames = WebQuikStandIn.read_frames(path, rate=10)
+        self.assertEqual([(0.0, b'{"msgid":21011}'), (0.5, b'{"msgid":21014}'), (0.6, b'{"msgid":21016}')], frames)
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from pytrade.connector.quik.AssetCache import AssetCache
+from pytrade.model.feed.Asset import Asset
+
+
+class TestAssetCache(TestCase):
+    def test_asset_of(self):
+        cache = AssetCache()
+        self.assertEqual(Asset("QJSIM", "SBER"), cache.asset_of("QJSIM¦SBER¦0"))
+        self.assertEqual(Asset(None, "SBER"), cache.asset_of("SBER"))
+        self.assertIsNone(cache.asset_of(""))
+        self.assertIsNone(cache.asset_of(None))
+
+    def test_asset_of_shares_instance(self):
+        cache = AssetCache()
+        self.assertIs(cache.asset_of("QJSIM¦SBER¦0"), cache.asset_of("QJSIM¦SBER"))
+
+    def test_intern_first_instance_is_shared(self):
+        cache = AssetCache()
+        asset = Asset("QJSIM", "SBER")
+        self.assertIs(asset, cache.intern(asset))
+        self.assertIs(asset, cache.intern(Asset("QJSIM", "SBER")))
+        self.assertIs(asset, cache.asset_of("QJSIM¦SBER¦0"))
+
+    def test_oldest_evicted(self):
+        cache = AssetCache(maxsize=2)
+        first = cache.asset_of("QJSIM¦SBER")
+        cache.asset_of("QJSIM¦GAZP")
+        cache.asset_of("QJSIM¦LKOH")
+
+        second = cache.asset_of("QJSIM¦SBER")
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_pinned_not_evicted(self):
+        cache = AssetCache(maxsize=2)
+        subscribed = cache.pin(Asset("QJSIM", "SBER"))
+        self.assertIs(subscribed, cache.asset_of("QJSIM¦SBER¦0"))
+        for sec_code in ["GAZP", "LKOH", "MOEX", "VTBR"]:
+            cache.asset_of(f"QJSIM¦{sec_code}")
+
+        self.assertIs(subscribed, cache.asset_of("QJSIM¦SBER¦0"))
+        self.assertIs(subscribed, cache.intern(Asset("QJSIM", "SBER")))
@@ -0,0 +1,23 @@
+import json
+from unittest import TestCase
+
+from pytrade.connector.quik.JsonDecoder import JsonDecoder
+
+
+class TestJsonDecoder(TestCase):
+    raw_msg = '{"msgid":21014,"quotes":{"QJSIM¦SBER":{"lines":{"22806":{"b":234,"s":0}}}}}'.encode()
+
+    def test_default_backend_is_the_fastest_available(self):
+        self.assertEqual(JsonDecoder.available()[0], JsonDecoder().backend)
+
+    def test_standard_json_is_always_available(self):
+        self.assertIn('json', JsonDecoder.available())
+
+    def test_backends_decode_bytes_the_same(self):
+        expected = json.loads(self.raw_msg.decode())
+        for backend in JsonDecoder.available():
+            self.assertEqual(expected, JsonDecoder(backend).decode(self.raw_msg), backend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            JsonDecoder('yaml')
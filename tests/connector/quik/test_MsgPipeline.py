@@ -0,0 +1,74 @@
+import threading
+from unittest import TestCase
+
+from pytrade.connector.quik.MsgPipeline import MsgPipeline
+
+
+class TestMsgPipeline(TestCase):
+    def test_msgid_of(self):
+        self.assertEqual('21014', MsgPipeline.msgid_of(b'{"msgid":21014,"quotes":{}}'))
+        self.assertEqual('21014', MsgPipeline.msgid_of('{"msgid": 21014, "quotes":{}}'))
+        self.assertEqual('heartbeat', MsgPipeline.msgid_of(b'{"msgid": "heartbeat"}'))
+        self.assertEqual('21009', MsgPipeline.msgid_of(b'{"request":1,' + b' ' * 100 + b'"msgid":21009}'))
+        self.assertIsNone(MsgPipeline.msgid_of(b'{}'))
+
+    def test_lane_keeps_order(self):
+        received = []
+        done = threading.Event()
+
+        def on_message(msg, _):
+            received.append(msg['n'])
+            if len(received) == 100:
+                done.set()
+
+        pipeline = MsgPipeline(on_message, lanes={'feed': [21014]}, default_lane='main', decoders=4)
+        for n in range(100):
+            pipeline.put(b'{"msgid":21014,"n":%d}' % n)
+        pipeline.run()
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual(list(range(100)), received)
+
+    def test_reply_lane_is_not_blocked_by_feed(self):
+        feed_release = threading.Event()
+        reply_received = threading.Event()
+
+        def on_message(msg, _):
+            if msg['msgid'] == 21014:
+                # Slow feed consumer
+                feed_release.wait(5)
+            else:
+                reply_received.set()
+
+        pipeline = MsgPipeline(on_message, lanes={'reply': [22000], 'feed': [21014]}, default_lane='main')
+        pipeline.put(b'{"msgid":21014}')
+        pipeline.put(b'{"msgid":22000}')
+        pipeline.run()
+
+        self.assertTrue(reply_received.wait(5))
+        feed_release.set()
+
+    def test_decode_error_does_not_stop_lane(self):
+        received = threading.Event()
+        pipeline = MsgPipeline(lambda msg, _: received.set(), lanes={}, default_lane='main')
+        pipeline.put(b'{"msgid":1, broken')
+        pipeline.put(b'{"msgid":1}')
+        pipeline.run()
+
+        self.assertTrue(received.wait(5))
+
+    def test_received_stamp(self):
+        received = []
+        done = threading.Event()
+
+        def on_message(msg, received_ns):
+            received.append((msg, received_ns))
+            done.set()
+
+        pipeline = MsgPipeline(on_message, lanes={}, default_lane='main')
+        pipeline.put(b'{"msgid":21011}', 12345)
+        pipeline.run()
+
+        self.assertTrue(done.wait(5))
+        # Receive time goes beside the message, not inside it
+        self.assertEqual([({'msgid': 21011}, 12345)], received)
@@ -1,11 +1,15 @@
+import os
+import tempfile
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 from pytrade.connector.CsvFeedConnector import CsvFeedConnector
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from model.feed.Asset import Asset
+from pytrade.feed.CsvStorage import CsvStorage
 
 
 class TestCsvFeedConnector(TestCase):
@@ -29,6 +33,18 @@ class TestCsvFeedConnector(TestCase):
         self.assertEqual([item.bid_vol for item in level2.items], [2, 22])
         self.assertEqual([item.ask_vol for item in level2.items], [3, 33])
 
+    def test_read_storage_keeps_tickers_of_same_time(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = CsvStorage(data_dir)
+            dt = datetime.fromisoformat("2021-12-07 10:00")
+            for ticker in ['QJSIM/SBER', 'QJSIM/GAZP', 'QJSIM/SBER']:
+                storage.write(pd.DataFrame([{'datetime': dt, 'ticker': ticker, 'bid': 1, 'ask': 2, 'last': 3}])
+                              .set_index(['datetime', 'ticker']), 'quotes')
+            storage.flush()
+            _, quotes, _ = CsvFeedConnector({}, storage=storage).read_storage()
+
+        self.assertEqual(['QJSIM/GAZP', 'QJSIM/SBER'], sorted(quotes['ticker']))
+
     def test__quote_of(self):
         # Set input
         dt = datetime.now()
@@ -57,3 +73,65 @@ class TestCsvFeedConnector(TestCase):
         self.assertEqual(candle.l, data['low'])
         self.assertEqual(candle.c, data['close'])
         self.assertEqual(candle.v, data['volume'])
+
+    def test__merge_events(self):
+        quotes = np.array(['2021-11-14T10:00:00', '2021-11-14T10:00:02'], dtype='datetime64[ns]')
+        candles = np.array(['2021-11-14T10:00:01'], dtype='datetime64[ns]')
+        level2 = np.array(['2021-11-14T10:00:00', '2021-11-14T10:00:03'], dtype='datetime64[ns]')
+
+        sources, positions = CsvFeedConnector._merge_events(quotes, candles, level2)
+
+        # Quote goes before level2 with the same time
+        self.assertEqual([0, 2, 1, 0, 2], sources.tolist())
+        self.assertEqual([0, 0, 0, 1, 1], positions.tolist())
+
+    def test__group_offsets(self):
+        dt = np.array(['2021-11-14T10:00', '2021-11-14T10:00', '2021-11-14T10:00', '2021-11-14T10:01'],
+                      dtype='datetime64[ns]')
+        tickers = np.array(['a/b', 'a/b', 'a/c', 'a/c'], dtype=object)
+
+        offsets = CsvFeedConnector._group_offsets(dt, tickers)
+
+        self.assertEqual([0, 2, 3, 4], offsets.tolist())
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Set input
+            candles_path, quotes_path, level2_path = [os.path.join(tmpdir, f"{kind}.csv")
+                                                      for kind in ['candles', 'quotes', 'level2']]
+            with open(candles_path, 'w') as f:
+                f.write("2021-11-14 10:00:01,stock1/ticker1,1,2,3,4,5\n")
+            with open(quotes_path, 'w') as f:
+                f.write("2021-11-14 10:00:00,stock1/ticker1,1,2,3,4\n"
+                        "2021-11-14 10:00:02,stock1/ticker1,1,2,3,4\n")
+            with open(level2_path, 'w') as f:
+                f.write("2021-11-14 10:00:00,stock1/ticker1,1,2,\n"
+                        "2021-11-14 10:00:00,stock1/ticker1,3,,4\n"
+                        "2021-11-14 10:00:03,stock1/ticker1,1,2,\n")
+            connector = CsvFeedConnector({}, candles_path, quotes_path, level2_path)
+            events = []
+            subscriber = type('Subscriber', (), {'on_quote': lambda s, quote: events.append(('quote', quote.dt)),
+                                                 'on_candle': lambda s, candle: events.append(('candle', candle.dt)),
+                                                 'on_level2': lambda s, level2: events.append(
+                                                     ('level2', level2.dt, len(level2.items)))})()
+            connector.subscribe_feed(Asset.any_asset(), subscriber)
+
+            # Process
+            connector.run()
+
+        # Assert
+        self.assertEqual([('quote', pd.Timestamp('2021-11-14 10:00:00')),
+                          ('level2', pd.Timestamp('2021-11-14 10:00:00'), 2),
+                          ('candle', pd.Timestamp('2021-11-14 10:00:01')),
+                          ('quote', pd.Timestamp('2021-11-14 10:00:02')),
+                          ('level2', pd.Timestamp('2021-11-14 10:00:03'), 1)], events)
+
+    def test__heartbeats_of(self):
+        times = np.array(['2021-11-14T10:00:00', '2021-11-14T10:00:00.5', '2021-11-14T10:00:01',
+                          '2021-11-14T10:00:05', '2021-11-14T10:00:05.1'], dtype='datetime64[ns]')
+
+        heartbeats = CsvFeedConnector._heartbeats_of(times, timedelta(seconds=1))
+
+        # Heartbeat before the first event of each next second
+        self.assertEqual([False, False, True, True, False], heartbeats.tolist())
+        self.assertFalse(CsvFeedConnector._heartbeats_of(times, None).any())
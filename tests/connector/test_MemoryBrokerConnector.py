@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import numpy as np
+
+from pytrade.connector.MemoryBrokerConnector import MemoryBrokerConnector
+from model.feed.ArrayLevel2 import ArrayLevel2
+from model.feed.Asset import Asset
+from model.feed.Quote import Quote
+
+
+class Subscriber:
+    def __init__(self):
+        self.orders, self.trades = [], []
+
+    def on_orders(self, order):
+        self.orders.append(order)
+
+    def on_trades(self, trade):
+        self.trades.append(trade)
+
+
+class TestMemoryBrokerConnector(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+    dt = datetime(2021, 12, 8, 10)
+    nan = float('nan')
+
+    def broker_of(self, **config):
+        broker = MemoryBrokerConnector(config)
+        subscriber = Subscriber()
+        broker.subscribe_broker(subscriber)
+        return broker, subscriber
+
+    def level2(self, seconds, rows):
+        return ArrayLevel2.of_rows(self.dt + timedelta(seconds=seconds), self.asset, np.array(rows, dtype=float))
+
+    def fills(self, subscriber):
+        return [(trade.order_number, trade.price, trade.quantity) for trade in subscriber.trades]
+
+    def test_buy_takes_depth_and_rests(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2], [11, self.nan, 2], [12, self.nan, 5]]))
+
+        order = broker.buy('QJSIM', 'SBER', 11, 5)
+
+        # Ask levels 10 and 11 are taken, the rest waits at 11
+        self.assertEqual([(order.number, 10, 2), (order.number, 11, 2)], self.fills(subscriber))
+        self.assertEqual(MemoryBrokerConnector.ACTIVE, broker.orders[order.number].status)
+        # Taken volume is not available to the next order until new level2
+        broker.buy('QJSIM', 'SBER', 11, 1)
+        self.assertEqual(2, len(subscriber.trades))
+
+        # Market trades through 11
+        broker.on_quote(Quote(self.dt + timedelta(seconds=1), self.asset, 11, 11, 11, 0))
+        self.assertEqual((order.number, 11, 1), self.fills(subscriber)[2])
+        self.assertEqual(MemoryBrokerConnector.FILLED, broker.orders[order.number].status)
+
+    def test_queue_position(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        order = broker.buy('QJSIM', 'SBER', 9, 3)
+
+        # 2 of 5 ahead are gone, the order is not filled yet
+        broker.on_level2(self.level2(1, [[9, 3, self.nan], [10, self.nan, 2]]))
+        self.assertEqual([], subscriber.trades)
+        # The level is gone, the best bid is lower now
+        broker.on_level2(self.level2(2, [[8, 1, self.nan], [10, self.nan, 2]]))
+        self.assertEqual([(order.number, 9, 3)], self.fills(subscriber))
+
+    def test_queue_factor(self):
+        broker, subscriber = self.broker_of(**{"broker.memory.queue.factor": 0})
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        first = broker.buy('QJSIM', 'SBER', 9, 3)
+        second = broker.buy('QJSIM', 'SBER', 9, 3)
+
+        # Orders are at the front, decrease of the level is traded with them in time order
+        broker.on_level2(self.level2(1, [[9, 1, self.nan], [10, self.nan, 2]]))
+        self.assertEqual([(first.number, 9, 3), (second.number, 9, 1)], self.fills(subscriber))
+
+    def test_cancel_keeps_queue_of_next_order(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        first = broker.buy('QJSIM', 'SBER', 9, 3)
+        broker.on_level2(self.level2(1, [[9, 7, self.nan], [10, self.nan, 2]]))
+        second = broker.buy('QJSIM', 'SBER', 9, 3)
+        broker.cancel(first.number)
+
+        # 7 ahead of the second order, 6 of them are gone
+        broker.on_level2(self.level2(2, [[9, 1, self.nan], [10, self.nan, 2]]))
+        self.assertEqual([], subscriber.trades)
+        # The level is gone, the best bid is lower now
+        broker.on_level2(self.level2(3, [[8, 1, self.nan], [10, self.nan, 2]]))
+        self.assertEqual([(second.number, 9, 3)], self.fills(subscriber))
+        self.assertEqual(MemoryBrokerConnector.CANCELLED, broker.orders[first.number].status)
+
+    def test_level_gone(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        order = broker.sell('QJSIM', 'SBER', 10, 3)
+
+        # Ask level 10 disappeared and the best ask is 11 now
+        broker.on_level2(self.level2(1, [[9, 5, self.nan], [11, self.nan, 2]]))
+
+        self.assertEqual([(order.number, 10, 3)], self.fills(subscriber))
+
+    def test_latency(self):
+        broker, subscriber = self.broker_of(**{"broker.memory.latency.ms": 100})
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        order = broker.buy('QJSIM', 'SBER', 10, 1)
+        self.assertEqual([], subscriber.orders)
+
+        # The order arrives after the ask is gone
+        broker.on_level2(self.level2(0.05, [[9, 5, self.nan], [11, self.nan, 2]]))
+        broker.on_level2(self.level2(0.2, [[9, 5, self.nan], [11, self.nan, 2]]))
+
+        self.assertEqual([], subscriber.trades)
+        self.assertEqual(self.dt + timedelta(seconds=0.1), subscriber.orders[0].dt)
+        self.assertEqual(MemoryBrokerConnector.ACTIVE, broker.orders[order.number].status)
+
+    def test_cancel(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        order = broker.buy('QJSIM', 'SBER', 9, 1)
+
+        broker.cancel(order.number)
+        broker.on_quote(Quote(self.dt + timedelta(seconds=1), self.asset, 8, 8, 8, 0))
+
+        self.assertEqual([], subscriber.trades)
+        self.assertEqual(MemoryBrokerConnector.CANCELLED, broker.orders[order.number].status)
+
+    def test_fill_by_newer_quote(self):
+        broker, subscriber = self.broker_of()
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        broker.on_quote(Quote(self.dt + timedelta(seconds=1), self.asset, 11, 12, 12, 0))
+
+        order = broker.sell('QJSIM', 'SBER', 11, 7)
+
+        # Level2 is older than the quote, the quote price is used
+        self.assertEqual([(order.number, 11, 7)], self.fills(subscriber))
+
+    def test_cancel_on_the_way(self):
+        broker, subscriber = self.broker_of(**{"broker.memory.latency.ms": 100})
+        broker.on_level2(self.level2(0, [[9, 5, self.nan], [10, self.nan, 2]]))
+        order = broker.buy('QJSIM', 'SBER', 10, 1)
+
+        broker.cancel(order.number)
+        broker.on_level2(self.level2(1, [[9, 5, self.nan], [10, self.nan, 2]]))
+
+        self.assertEqual([], subscriber.trades)
+        self.assertEqual([MemoryBrokerConnector.CANCELLED], [order.status for order in subscriber.orders])
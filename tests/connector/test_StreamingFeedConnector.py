@@ -0,0 +1,82 @@
+import tempfile
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from unittest import TestCase, skipUnless
+from unittest.mock import Mock
+
+import pandas as pd
+
+from pytrade.connector.StreamingFeedConnector import StreamingFeedConnector
+from pytrade.feed.CsvStorage import CsvStorage
+from pytrade.feed.ParquetStorage import ParquetStorage
+from model.feed.Asset import Asset
+
+
+class TestStreamingFeedConnector(TestCase):
+    class Recorder:
+        def __init__(self):
+            self.events = []
+
+        def on_quote(self, quote):
+            self.events.append(('quote', quote.dt, str(quote.asset), quote.bid))
+
+        def on_candle(self, candle):
+            self.events.append(('candle', candle.dt, str(candle.asset), candle.c))
+
+        def on_level2(self, level2):
+            self.events.append(('level2', level2.dt, str(level2.asset), level2.price.tolist()))
+
+        def on_heartbeat(self):
+            self.events.append(('heartbeat',))
+
+    @staticmethod
+    def write(storage, ticker: str, day: str):
+        times = [datetime.fromisoformat(f"{day} 10:00:0{second}") for second in range(4)]
+        storage.write(pd.DataFrame([{'datetime': dt, 'ticker': ticker, 'bid': i, 'ask': i + 1, 'last': i,
+                                     'last_change': 0} for i, dt in enumerate(times)])
+                      .set_index(['datetime', 'ticker']), 'quotes')
+        storage.write(pd.DataFrame([{'datetime': times[1], 'ticker': ticker, 'open': 1, 'high': 2, 'low': 0,
+                                     'close': 1, 'volume': 10}]).set_index(['datetime', 'ticker']), 'candles')
+        storage.write(pd.DataFrame([{'datetime': dt, 'ticker': ticker, 'price': price, 'bid_vol': 1, 'ask_vol': 0}
+                                    for dt in times[2:] for price in [3, 1, 2]])
+                      .set_index(['datetime', 'ticker']), 'level2')
+        storage.flush()
+
+    def assert_streamed(self, storage_class):
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = storage_class(data_dir)
+            for day in ['2021-12-07', '2021-12-08']:
+                self.write(storage, 'QJSIM/SBER', day)
+                self.write(storage, 'QJSIM/GAZP', day)
+            self.write(storage, 'QJSIM/LKOH', '2021-12-07')
+            # Chunks smaller than level2 snapshot make streams split snapshots and carry rows over
+            connector = StreamingFeedConnector({}, paths=data_dir, chunk_rows=2, storage=storage,
+                                               heartbeat_interval=timedelta(days=1))
+            recorder = self.Recorder()
+            connector.subscribe_feed(Asset('QJSIM', 'SBER'), recorder)
+            connector.subscribe_feed(Asset('QJSIM', 'GAZP'), recorder)
+            connector.run()
+
+        events = [event for event in recorder.events if event[0] != 'heartbeat']
+        self.assertEqual(1, len(recorder.events) - len(events))
+        self.assertEqual(2 * 2 * (4 + 1 + 2), len(events))
+        self.assertEqual(sorted(event[1] for event in events), [event[1] for event in events])
+        self.assertEqual({'QJSIM/SBER', 'QJSIM/GAZP'}, {event[2] for event in events})
+        # Quotes go before candles of the same time, snapshots are whole and sorted by price
+        second = [event[0] for event in events if event[1] == datetime.fromisoformat('2021-12-07 10:00:01')]
+        self.assertEqual(['quote', 'quote', 'candle', 'candle'], second)
+        self.assertTrue(all(event[3] == [1, 2, 3] for event in events if event[0] == 'level2'))
+        # Heartbeat at the start of the second day
+        self.assertEqual(('heartbeat',), recorder.events[len(recorder.events) // 2])
+
+    def test_run_csv(self):
+        self.assert_streamed(CsvStorage)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_run_parquet(self):
+        self.assert_streamed(ParquetStorage)
+
+    def test_partitions_any_asset(self):
+        connector = StreamingFeedConnector({}, paths='nonexistent', storage=CsvStorage('nonexistent'))
+        connector.subscribe_feed(Asset.any_asset(), Mock())
+        self.assertEqual({}, connector.partitions())
@@ -0,0 +1,82 @@
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import numpy as np
+
+from pytrade.feed.Feed import Feed
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+from model.feed.Quote import Quote
+
+
+class FeedAdapter:
+    def subscribe_feed(self, asset, subscriber):
+        pass
+
+
+class TestFeed(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+    dt = datetime(2021, 12, 8, 10)
+
+    def feed_of_quotes(self, n: int) -> Feed:
+        feed = Feed(FeedAdapter())
+        for i in range(n):
+            feed.on_quote(Quote(self.dt + timedelta(seconds=i), self.asset, i, i + 1, i, 0))
+        return feed
+
+    def test_window(self):
+        feed = self.feed_of_quotes(10)
+
+        window = feed.window(self.asset, self.dt + timedelta(seconds=2), self.dt + timedelta(seconds=4))
+
+        self.assertEqual([2, 3, 4], window['bid'].tolist())
+        self.assertTrue(np.shares_memory(window.values, feed.quotes_store.buffer(self.asset).values))
+        self.assertEqual(10, len(feed.window(self.asset)))
+        self.assertTrue(feed.window(self.asset, self.dt + timedelta(seconds=4), self.dt).empty)
+        self.assertTrue(feed.window(Asset('QJSIM', 'GAZP')).empty)
+
+    def test_window_reads_spilled_rows(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            feed = Feed(FeedAdapter(), retention=timedelta(seconds=10), spill_dir=spill_dir)
+            for i in range(3000):
+                feed.on_quote(Quote(self.dt + timedelta(seconds=i), self.asset, i, i + 1, i, 0))
+
+            window = feed.window(self.asset, self.dt + timedelta(seconds=100), self.dt + timedelta(seconds=2999))
+            recent = feed.window(self.asset, self.dt + timedelta(seconds=2995))
+            feed.close()
+
+        self.assertEqual(list(range(100, 3000)), window['bid'].tolist())
+        self.assertEqual(list(range(2995, 3000)), recent['bid'].tolist())
+
+    def test_last_n(self):
+        feed = self.feed_of_quotes(10)
+        self.assertEqual([7, 8, 9], feed.last_n(self.asset, 3)['bid'].tolist())
+        self.assertEqual(10, len(feed.last_n(self.asset, 20)))
+
+    def test_asof(self):
+        feed = self.feed_of_quotes(10)
+        self.assertEqual([3], feed.asof(self.asset, self.dt + timedelta(seconds=3, milliseconds=500))['bid'].tolist())
+        self.assertEqual([0], feed.asof(self.asset, self.dt)['bid'].tolist())
+        self.assertTrue(feed.asof(self.asset, self.dt - timedelta(seconds=1)).empty)
+
+    def test_level2(self):
+        feed = Feed(FeedAdapter())
+        feed.on_level2(Level2.of(self.dt, self.asset, [Level2Item(1, 1, None), Level2Item(2, None, 1)]))
+
+        level2 = feed.level2
+
+        self.assertEqual(['datetime', 'ticker'], level2.index.names)
+        self.assertEqual([1, 2], level2['price'].tolist())
+        self.assertTrue(np.shares_memory(level2.values, feed.level2_store.buffer(self.asset).values))
+
+    def test_asof_level2_snapshot(self):
+        feed = Feed(FeedAdapter())
+        for i in range(3):
+            feed.on_level2(Level2.of(self.dt + timedelta(seconds=i), self.asset,
+                                     [Level2Item(i, 1, None), Level2Item(i + 1, None, 1)]))
+
+        snapshot = feed.asof(self.asset, self.dt + timedelta(seconds=1, milliseconds=500), kind='level2')
+
+        self.assertEqual([1, 2], snapshot['price'].tolist())
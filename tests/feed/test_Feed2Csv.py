@@ -0,0 +1,77 @@
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pytrade.feed.CsvStorage import CsvStorage
+from pytrade.feed.Feed import Feed
+from pytrade.feed.Feed2Csv import Feed2Csv
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class FeedAdapter:
+    def subscribe_feed(self, asset, subscriber):
+        pass
+
+
+class TestFeed2Csv(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+
+    def test_writes_new_rows_by_day(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            feed = Feed(FeedAdapter())
+            storage = CsvStorage(data_dir)
+            feed2csv = Feed2Csv(feed, storage=storage, write_interval=timedelta(0))
+            dt = datetime(2021, 12, 7, 23, 59)
+            for i in range(4):
+                feed.on_quote(Quote(dt + timedelta(minutes=i), self.asset, i, i + 1, i + 2, 0))
+            feed.on_level2(Level2.of(dt, self.asset, [Level2Item(1, 2, None), Level2Item(3, None, 4)]))
+            feed2csv.close()
+
+            quotes = storage.read('quotes')
+            level2 = storage.read('level2')
+            paths = storage.paths_of('quotes')
+
+        self.assertEqual([0, 1, 2, 3], quotes['bid'].tolist())
+        self.assertEqual(['QJSIM/SBER'] * 4, quotes['ticker'].tolist())
+        self.assertEqual(2, len(paths))
+        self.assertEqual([1, 3], level2['price'].tolist())
+
+    def test_each_row_is_written_once(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            feed = Feed(FeedAdapter())
+            storage = CsvStorage(data_dir)
+            feed2csv = Feed2Csv(feed, storage=storage, write_interval=timedelta(hours=1))
+            dt = datetime(2021, 12, 7, 10)
+            feed.on_quote(Quote(dt, self.asset, 1, 2, 3, 0))
+            feed2csv.write()
+            feed.on_quote(Quote(dt + timedelta(seconds=1), self.asset, 4, 5, 6, 0))
+            feed2csv.write()
+            feed2csv.close()
+
+            quotes = storage.read('quotes')
+
+        self.assertEqual([1, 4], quotes['bid'].tolist())
+
+    def test_writes_last_update_of_candle(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            feed = Feed(FeedAdapter())
+            storage = CsvStorage(data_dir)
+            feed2csv = Feed2Csv(feed, storage=storage, write_interval=timedelta(hours=1))
+            dt = datetime(2021, 12, 7, 10)
+            feed.on_candle(Ohlcv(dt, self.asset, 1, 2, 1, 2, 10))
+            feed2csv.write()
+            # Current candle is updated after write
+            feed.on_candle(Ohlcv(dt, self.asset, 1, 3, 1, 3, 20))
+            feed.on_candle(Ohlcv(dt + timedelta(minutes=1), self.asset, 3, 3, 3, 3, 1))
+            feed2csv.write()
+            feed.on_candle(Ohlcv(dt + timedelta(minutes=1), self.asset, 3, 4, 3, 4, 5))
+            feed2csv.close()
+
+            candles = storage.read('candles')
+
+        self.assertEqual([3, 4], candles['close'].tolist())
+        self.assertEqual([20, 5], candles['volume'].tolist())
@@ -0,0 +1,55 @@
+from datetime import datetime
+from unittest import TestCase
+
+from pytrade.feed.OrderBook import OrderBook
+from model.feed.Asset import Asset
+
+
+class TestOrderBook(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+
+    def test_update_first_snapshot(self):
+        book = OrderBook(self.asset)
+        changes = book.update(datetime(2021, 11, 7, 10), [(101, None, 5), (99, 3, None), (100, 4, None)])
+
+        self.assertEqual([99, 100, 101], sorted(item.price for item in changes))
+        self.assertEqual([99, 100, 101], [item.price for item in book.items])
+        self.assertEqual(100, book.best_bid.price)
+        self.assertEqual(101, book.best_ask.price)
+
+    def test_update_returns_changed_levels_only(self):
+        book = OrderBook(self.asset)
+        book.update(datetime(2021, 11, 7, 10), [(99, 3, None), (100, 4, None), (101, None, 5), (102, None, 6)])
+        unchanged = book.items[0]
+
+        changes = book.update(datetime(2021, 11, 7, 10, 1), [(99, 3, None), (100, 7, None), (102, None, 6)])
+
+        self.assertEqual([(100, 7, None), (101, None, None)],
+                         [(item.price, item.bid_vol, item.ask_vol) for item in changes])
+        self.assertIs(unchanged, book.items[0])
+        self.assertEqual([99, 100, 102], [item.price for item in book.items])
+        self.assertEqual(102, book.best_ask.price)
+
+    def test_level_changes_side(self):
+        book = OrderBook(self.asset)
+        book.update(datetime(2021, 11, 7, 10), [(99, 3, None), (100, 4, None), (101, None, 5)])
+        book.update(datetime(2021, 11, 7, 10, 1), [(99, 3, None), (100, None, 2), (101, None, 5)])
+
+        self.assertEqual(99, book.best_bid.price)
+        self.assertEqual(100, book.best_ask.price)
+
+    def test_top(self):
+        book = OrderBook(self.asset)
+        book.update(datetime(2021, 11, 7, 10), [(98, 1, None), (99, 2, None), (100, 3, None),
+                                                (101, None, 4), (102, None, 5)])
+
+        self.assertEqual([100, 99], [item.price for item in book.top_bids(2)])
+        self.assertEqual([101, 102], [item.price for item in book.top_asks(5)])
+        self.assertEqual([], book.top_bids(0))
+
+    def test_empty(self):
+        book = OrderBook(self.asset)
+        self.assertEqual([], book.update(datetime(2021, 11, 7, 10), [(100, None, None)]))
+        self.assertIsNone(book.best_bid)
+        self.assertIsNone(book.best_ask)
+        self.assertEqual([], book.level2().items)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import numpy as np
+
+from pytrade.feed.SpillStore import SpillStore
+from pytrade.feed.TickStore import TickStore
+from model.feed.Asset import Asset
+
+
+class TestSpillStore(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+    dt = datetime(2021, 12, 8, 7)
+
+    def fill(self, store: TickStore, n: int):
+        for i in range(n):
+            store.buffer(self.asset).append(self.dt + timedelta(seconds=i), [i])
+
+    def test_history_across_memory_and_disk(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            spill = SpillStore(spill_dir, 'quotes')
+            store = TickStore(['bid'], retention=timedelta(seconds=10), spill=spill)
+            self.fill(store, 5000)
+            spill.flush()
+
+            self.assertLessEqual(len(store.buffer(self.asset)), 11)
+            self.assertTrue(os.listdir(spill_dir))
+            self.assertEqual(list(range(5000)), store.history(self.asset)['bid'].tolist())
+            window = store.history(self.asset, self.dt + timedelta(seconds=100), self.dt + timedelta(seconds=4995))
+            self.assertEqual(list(range(100, 4996)), window['bid'].tolist())
+            spill.close()
+
+    def test_history_before_saved(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            spill = SpillStore(spill_dir, 'quotes')
+            spill.spill(self.asset, np.array([self.dt], dtype='datetime64[ns]'), np.array([[1.0]]))
+
+            parts = spill.read(self.asset)
+            spill.close()
+
+        self.assertEqual(1, len(parts))
+        self.assertEqual([[1.0]], parts[0][1].tolist())
+
+    def test_close_removes_files(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            spill = SpillStore(spill_dir, 'quotes')
+            store = TickStore(['bid'], retention=timedelta(seconds=10), spill=spill)
+            self.fill(store, 3000)
+            store.close()
+
+            self.assertEqual([], os.listdir(spill_dir))
@@ -0,0 +1,115 @@
+import os
+import tempfile
+from datetime import datetime
+from importlib.util import find_spec
+from unittest import TestCase, skipUnless
+
+import pandas as pd
+
+from pytrade.feed.CsvStorage import CsvStorage
+from pytrade.feed.ParquetStorage import ParquetStorage
+
+
+class TestStorage(TestCase):
+    @staticmethod
+    def quotes(ticker: str, times: list) -> pd.DataFrame:
+        return pd.DataFrame([{'datetime': datetime.fromisoformat(dt), 'ticker': ticker, 'bid': i, 'ask': i + 1,
+                              'last': i + 2} for i, dt in enumerate(times)]).set_index(['datetime', 'ticker'])
+
+    def assert_read_filtered(self, storage_class):
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = storage_class(data_dir)
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 10:00:00', '2021-12-07 11:00:00']), 'quotes')
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-08 10:00:00', '2021-12-08 11:00:00']), 'quotes')
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-08 12:00:00']), 'quotes')
+            storage.write(self.quotes('QJSIM/GAZP', ['2021-12-08 10:30:00']), 'quotes')
+
+            df = storage.read('quotes', tickers=['QJSIM/SBER'], start=datetime.fromisoformat('2021-12-08 11:00:00'),
+                              columns=['bid'])
+
+        self.assertEqual(['datetime', 'ticker', 'bid'], df.columns.tolist())
+        self.assertEqual([datetime.fromisoformat('2021-12-08 11:00:00'), datetime.fromisoformat('2021-12-08 12:00:00')],
+                         df['datetime'].tolist())
+        self.assertEqual(['QJSIM/SBER', 'QJSIM/SBER'], df['ticker'].tolist())
+        self.assertEqual([1, 0], df['bid'].tolist())
+
+    def test_csv_read_filtered(self):
+        self.assert_read_filtered(CsvStorage)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_read_filtered(self):
+        self.assert_read_filtered(ParquetStorage)
+
+    def assert_read_one_quote(self, storage_class):
+        # Feed stores quotes without last_change
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = storage_class(data_dir)
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 10:00:00']), 'quotes')
+            storage.flush()
+            df = storage.read('quotes')
+
+        self.assertEqual(['datetime', 'ticker', 'bid', 'ask', 'last', 'last_change'], df.columns.tolist())
+        self.assertEqual([0, 1, 2], df[['bid', 'ask', 'last']].iloc[0].tolist())
+        self.assertTrue(df['last_change'].isna().all())
+
+    def test_csv_read_one_quote(self):
+        self.assert_read_one_quote(CsvStorage)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_read_one_quote(self):
+        self.assert_read_one_quote(ParquetStorage)
+
+    def test_paths_of(self):
+        storage = CsvStorage('./data')
+        storage_paths = storage.paths_of('quotes', start=datetime.fromisoformat('2021-11-07 00:00:00'))
+        self.assertEqual([], storage_paths)
+
+    def test_read_empty(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            df = CsvStorage(data_dir).read('level2')
+        self.assertTrue(df.empty)
+        self.assertEqual(['datetime', 'ticker', 'price', 'bid_vol', 'ask_vol'], df.columns.tolist())
+
+    def assert_read_chunks(self, storage_class):
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = storage_class(data_dir)
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 10:00:00', '2021-12-07 11:00:00',
+                                                     '2021-12-07 12:00:00']), 'quotes')
+            storage.flush()
+            path = storage.path_of('QJSIM/SBER', 'quotes', datetime.fromisoformat('2021-12-07').date())
+            chunks = list(storage.read_chunks(path, 'quotes', chunk_rows=2))
+            partition = storage.partition_of(path)
+
+        self.assertEqual([2, 1], [len(chunk) for chunk in chunks])
+        self.assertEqual(['datetime', 'ticker', 'bid', 'ask', 'last', 'last_change'], chunks[0].columns.tolist())
+        self.assertEqual([0, 1, 2], pd.concat(chunks)['bid'].tolist())
+        self.assertEqual(('QJSIM_SBER', 'quotes', '2021-12-07'), partition)
+
+    def test_csv_read_chunks(self):
+        self.assert_read_chunks(CsvStorage)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_read_chunks(self):
+        self.assert_read_chunks(ParquetStorage)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_keeps_writes_of_same_time(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = ParquetStorage(data_dir, max_parts=3)
+            path = storage.path_of('QJSIM/SBER', 'quotes', datetime.fromisoformat('2021-12-07').date())
+            for _ in range(2):
+                storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 10:00:00']), 'quotes')
+            self.assertEqual(2, len(os.listdir(path)))
+
+            # Third part compacts the partition, close compacts the rest
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 10:00:00', '2021-12-07 11:00:00']), 'quotes')
+            self.assertEqual(1, len(os.listdir(path)))
+            storage.write(self.quotes('QJSIM/SBER', ['2021-12-07 12:00:00']), 'quotes')
+            storage.close()
+            parts = os.listdir(path)
+            df = storage.read('quotes')
+
+        self.assertEqual(1, len(parts))
+        self.assertEqual(['2021-12-07 10:00:00'] * 3 + ['2021-12-07 11:00:00', '2021-12-07 12:00:00'],
+                         df['datetime'].astype(str).tolist())
+        self.assertEqual([0, 0, 0, 1, 0], df['bid'].tolist())
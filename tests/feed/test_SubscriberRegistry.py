@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from pytrade.feed.SubscriberRegistry import SubscriberRegistry
+from model.feed.Asset import Asset
+
+
+class QuoteSubscriber:
+    def on_quote(self, quote):
+        pass
+
+
+class HeartbeatSubscriber:
+    def on_heartbeat(self):
+        pass
+
+
+class TestSubscriberRegistry(TestCase):
+    def test_callbacks_of_asset_include_any_asset(self):
+        registry = SubscriberRegistry(['on_quote', 'on_heartbeat'])
+        asset_subscriber, any_subscriber = QuoteSubscriber(), QuoteSubscriber()
+        registry.subscribe(asset_subscriber, Asset('QJSIM', 'SBER'))
+        registry.subscribe(any_subscriber)
+
+        callbacks = registry.callbacks('on_quote', Asset('QJSIM', 'SBER'))
+
+        self.assertEqual((asset_subscriber.on_quote, any_subscriber.on_quote), callbacks)
+
+    def test_callbacks_of_unknown_asset_are_any_asset(self):
+        registry = SubscriberRegistry(['on_quote'])
+        any_subscriber = QuoteSubscriber()
+        registry.subscribe(QuoteSubscriber(), Asset('QJSIM', 'SBER'))
+        registry.subscribe(any_subscriber)
+
+        self.assertEqual((any_subscriber.on_quote,), registry.callbacks('on_quote', Asset('QJSIM', 'GAZP')))
+
+    def test_callbacks_skip_subscribers_without_method(self):
+        registry = SubscriberRegistry(['on_quote', 'on_heartbeat'])
+        registry.subscribe(HeartbeatSubscriber(), Asset('QJSIM', 'SBER'))
+
+        self.assertEqual((), registry.callbacks('on_quote', Asset('QJSIM', 'SBER')))
+
+    def test_all_callbacks_are_unique(self):
+        registry = SubscriberRegistry(['on_heartbeat'])
+        subscriber = HeartbeatSubscriber()
+        registry.subscribe(subscriber, Asset('QJSIM', 'SBER'))
+        registry.subscribe(subscriber, Asset('QJSIM', 'GAZP'))
+        registry.subscribe(subscriber)
+
+        self.assertEqual((subscriber.on_heartbeat,), registry.all_callbacks('on_heartbeat'))
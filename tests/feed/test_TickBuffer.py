@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import numpy as np
+
+from pytrade.feed.TickBuffer import TickBuffer
+
+
+class TestTickBuffer(TestCase):
+    def test_append_grows(self):
+        buffer = TickBuffer(['bid', 'ask'], capacity=2)
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        for i in range(10):
+            buffer.append(dt + timedelta(seconds=i), [i, i + 1])
+
+        self.assertEqual(10, len(buffer))
+        self.assertEqual(list(range(10)), buffer.values[:, 0].tolist())
+        self.assertEqual(np.datetime64(dt + timedelta(seconds=9)), buffer.last_time)
+
+    def test_append_many(self):
+        buffer = TickBuffer(['price', 'bid_vol', 'ask_vol'])
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        buffer.append_many(dt, [[1, 2, None], [3, None, 4]])
+
+        df = buffer.to_df()
+        self.assertEqual([1, 3], df['price'].tolist())
+        self.assertTrue(np.isnan(df['bid_vol'].iloc[1]))
+        self.assertEqual([dt, dt], df.index.tolist())
+
+    def test_upsert_same_time_replaces_last(self):
+        buffer = TickBuffer(['close'])
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        buffer.upsert(dt, [1])
+        buffer.upsert(dt, [2])
+        buffer.upsert(dt + timedelta(minutes=1), [3])
+
+        self.assertEqual([2, 3], buffer.values[:, 0].tolist())
+
+    def test_retention_drops_old(self):
+        buffer = TickBuffer(['bid'], retention=timedelta(minutes=1), capacity=4)
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        for i in range(100):
+            buffer.append(dt + timedelta(seconds=i), [i])
+
+        # Last 61 seconds are kept, including the right bound
+        self.assertEqual(list(range(39, 100)), buffer.values[:, 0].tolist())
+
+    def test_view_is_stable_after_appends(self):
+        buffer = TickBuffer(['bid'], retention=timedelta(seconds=2), capacity=4)
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        for i in range(3):
+            buffer.append(dt + timedelta(seconds=i), [i])
+        df = buffer.to_df()
+        for i in range(3, 50):
+            buffer.append(dt + timedelta(seconds=i), [i])
+
+        self.assertEqual([0, 1, 2], df['bid'].tolist())
+
+    def test_since_keeps_positions_after_drop(self):
+        buffer = TickBuffer(['bid'], retention=timedelta(seconds=10), capacity=4)
+        dt = datetime.fromisoformat('2021-12-08 07:00:00')
+        for i in range(50):
+            buffer.append(dt + timedelta(seconds=i), [i])
+
+        self.assertEqual(50, buffer.end)
+        times, values = buffer.since(45)
+        self.assertEqual([45, 46, 47, 48, 49], values[:, 0].tolist())
+        self.assertEqual(np.datetime64(dt + timedelta(seconds=45)), times[0])
+        # Dropped rows are not returned
+        self.assertEqual(list(range(39, 50)), buffer.since(0)[1][:, 0].tolist())
+        self.assertEqual(0, len(buffer.since(50)[0]))
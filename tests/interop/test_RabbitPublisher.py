@@ -0,0 +1,140 @@
+import time
+from unittest import TestCase
+
+from pytrade.interop.MemoryRabbit import MemoryRabbit
+from pytrade.interop.RabbitPublisher import RabbitPublisher
+
+
+class TestRabbitPublisher(TestCase):
+    def test_publish_does_not_wait_for_rabbit(self):
+        rabbit = MemoryRabbit(publish_seconds=0.01)
+        publisher = RabbitPublisher(rabbit.channel, batch_size=10, flush_seconds=0.01)
+        publisher.declare('q1')
+        publisher.start()
+
+        start = time.monotonic()
+        for i in range(100):
+            publisher.publish('q1', i)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        publisher.stop()
+        self.assertEqual(list(range(100)), rabbit.queues['q1'])
+        self.assertEqual(100, publisher.published['q1'])
+        self.assertEqual(0, publisher.pending())
+
+    def test_flush(self):
+        rabbit = MemoryRabbit()
+        publisher = RabbitPublisher(rabbit.channel, confirms=True)
+        publisher.declare('q1')
+        publisher.declare('q2')
+        publisher.publish('q1', 'a')
+        publisher.publish('q2', 'b')
+        publisher.publish('q1', 'c')
+
+        publisher.flush()
+
+        self.assertEqual({'q1': ['a', 'c'], 'q2': ['b']}, rabbit.queues)
+        self.assertTrue(rabbit.is_confirms)
+
+    def test_drop_old(self):
+        publisher = RabbitPublisher(MemoryRabbit().channel, maxsize=2)
+        publisher.declare('q1', RabbitPublisher.Policy.DROP_OLD)
+
+        self.assertTrue(all(publisher.publish('q1', i) for i in range(3)))
+
+        self.assertEqual(1, publisher.dropped['q1'])
+        self.assertEqual(2, publisher.pending())
+
+    def test_drop_new(self):
+        rabbit = MemoryRabbit()
+        publisher = RabbitPublisher(rabbit.channel, maxsize=2)
+        publisher.declare('q1', RabbitPublisher.Policy.DROP_NEW)
+
+        self.assertEqual([True, True, False], [publisher.publish('q1', i) for i in range(3)])
+        publisher.flush()
+        self.assertEqual([0, 1], rabbit.queues['q1'])
+
+    def test_block_waits_then_drops(self):
+        publisher = RabbitPublisher(MemoryRabbit().channel, maxsize=1, block_seconds=0.05)
+        publisher.declare('q1', RabbitPublisher.Policy.BLOCK)
+        publisher.publish('q1', 1)
+
+        start = time.monotonic()
+        self.assertFalse(publisher.publish('q1', 2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(1, publisher.dropped['q1'])
+
+    def test_block_waits_until_published(self):
+        rabbit = MemoryRabbit()
+        publisher = RabbitPublisher(rabbit.channel, maxsize=1, flush_seconds=0.01, block_seconds=1)
+        publisher.declare('q1', RabbitPublisher.Policy.BLOCK)
+        publisher.start()
+
+        self.assertTrue(all(publisher.publish('q1', i) for i in range(5)))
+        publisher.stop()
+        self.assertEqual(list(range(5)), rabbit.queues['q1'])
+        self.assertEqual(0, publisher.dropped['q1'])
+
+    def test_block_does_not_stall_on_dead_rabbit(self):
+        rabbit = MemoryRabbit()
+        rabbit.is_down = True
+        publisher = RabbitPublisher(rabbit.channel, maxsize=2, flush_seconds=0.01, block_seconds=0.05,
+                                    reconnect_seconds=0.01)
+        publisher.declare('q1', RabbitPublisher.Policy.BLOCK)
+        publisher.start()
+
+        # Only the first publish to full queue waits for block timeout, others are dropped at once
+        start = time.monotonic()
+        published = [publisher.publish('q1', i) for i in range(100)]
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual([True, True] + [False] * 98, published)
+        self.assertEqual(98, publisher.dropped['q1'])
+
+        # Rabbit is up again, the queue takes new messages
+        rabbit.is_down = False
+        while publisher.pending():
+            time.sleep(0.01)
+        self.assertTrue(publisher.publish('q1', 100))
+        publisher.stop()
+        self.assertEqual([0, 1, 100], rabbit.queues['q1'])
+        self.assertEqual(98, publisher.dropped['q1'])
+
+    def test_stop_returns_not_published(self):
+        rabbit = MemoryRabbit()
+        rabbit.is_down = True
+        publisher = RabbitPublisher(rabbit.channel, flush_seconds=0.01, reconnect_seconds=0.01)
+        publisher.declare('q1')
+        publisher.start()
+        publisher.publish('q1', 1)
+        publisher.publish('q1', 2)
+
+        self.assertEqual(2, publisher.stop())
+        self.assertEqual(2, publisher.pending())
+
+    def test_keeps_messages_while_rabbit_is_down(self):
+        rabbit = MemoryRabbit()
+        rabbit.is_down = True
+        publisher = RabbitPublisher(rabbit.channel, flush_seconds=0.01, reconnect_seconds=0.01)
+        publisher.declare('q1')
+        publisher.start()
+        publisher.publish('q1', 1)
+        publisher.publish('q1', 2)
+        time.sleep(0.05)
+        self.assertEqual(2, publisher.pending())
+
+        rabbit.is_down = False
+        publisher.stop()
+        self.assertEqual([1, 2], rabbit.queues['q1'])
+
+    def test_merge_batch(self):
+        rabbit = MemoryRabbit()
+        publisher = RabbitPublisher(rabbit.channel)
+        publisher.declare('q1', content_type='text/plain', merge=lambda batch: ','.join(batch))
+        publisher.publish('q1', 'a')
+        publisher.publish('q1', 'b')
+
+        publisher.flush()
+
+        self.assertEqual(['a,b'], rabbit.queues['q1'])
+        self.assertEqual('text/plain', rabbit.properties['q1'].content_type)
+        self.assertEqual(2, publisher.published['q1'])
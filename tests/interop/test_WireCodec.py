@@ -0,0 +1,49 @@
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+
+from interop.WireCodec import WireCodec
+from model.broker.Order import Order
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class TestWireCodec(TestCase):
+    dt = datetime(2021, 11, 7, 10, 2, 3, 456789)
+    asset = Asset('QJSIM', 'SBER')
+
+    def test_candle(self):
+        candle = Ohlcv(self.dt, self.asset, 1.5, 2, 0.5, 1, 100)
+        self.assertEqual([candle], WireCodec.decode(WireCodec.frame([WireCodec.candle(candle)])))
+
+    def test_quote_with_absent_values(self):
+        quote = Quote(self.dt, self.asset, 1, 2, None, None)
+        self.assertEqual([quote], WireCodec.decode(WireCodec.frame([WireCodec.quote(quote)])))
+
+    def test_level2(self):
+        level2 = Level2.of(self.dt, self.asset, [Level2Item(101, None, 5), Level2Item(100, 4, None)])
+
+        decoded = WireCodec.decode(WireCodec.frame([WireCodec.level2(level2)]))[0]
+
+        self.assertEqual((self.dt, self.asset), (decoded.dt, decoded.asset))
+        self.assertEqual(level2.items, decoded.items)
+        np.testing.assert_array_equal([100, 101], decoded.price)
+
+    def test_order(self):
+        order = Order('123', self.dt, 'QJSIM', 'SBER', True, 'NL0011100043', 250.5, 10, 2505, 'active')
+        self.assertEqual([order], WireCodec.decode(WireCodec.frame([WireCodec.order(order)])))
+
+    def test_merge(self):
+        candle = Ohlcv(self.dt, self.asset, 1, 2, 0.5, 1.5, 100)
+        quote = Quote(self.dt, self.asset, 1, 2, 1.5, 0.1)
+        frames = [WireCodec.frame([WireCodec.candle(candle)]), WireCodec.frame([WireCodec.quote(quote)])]
+
+        self.assertEqual([candle, quote], WireCodec.decode(WireCodec.merge(frames)))
+
+    def test_not_a_frame(self):
+        with self.assertRaises(ValueError):
+            WireCodec.decode(b'{"msgid": 21014}')
@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from pytrade.metrics.LatencyHistogram import LatencyHistogram, NullHistogram
+
+
+class TestLatencyHistogram(TestCase):
+    def test_percentile(self):
+        histogram = LatencyHistogram('stage')
+        for ns in range(1, 1001):
+            histogram.record(ns * 1000)
+        # Bucket bounds are within 1/8 of the value
+        self.assertAlmostEqual(500_000, histogram.percentile(50), delta=500_000 / 8)
+        self.assertAlmostEqual(990_000, histogram.percentile(99), delta=990_000 / 8)
+        self.assertEqual(1_000_000, histogram.percentile(100))
+        self.assertEqual({'count': 1000, 'mean_us': 500.5, 'max_us': 1000.0},
+                         {key: value for key, value in histogram.snapshot().items() if key in ('count', 'mean_us', 'max_us')})
+
+    def test_upper_bound(self):
+        for ns in [0, 1, 15, 16, 17, 31, 32, 1000, 123456789, 2 ** 40]:
+            histogram = LatencyHistogram('stage')
+            histogram.record(ns)
+            index = next(i for i, count in enumerate(histogram.counts) if count)
+            self.assertLessEqual(ns, LatencyHistogram.upper_bound(index))
+            self.assertGreater(ns, LatencyHistogram.upper_bound(index - 1) if index else -1)
+
+    def test_empty(self):
+        self.assertEqual(0, LatencyHistogram('stage').percentile(99))
+        histogram = NullHistogram('stage')
+        histogram.record(100)
+        self.assertEqual(0, histogram.count)
@@ -0,0 +1,57 @@
+import json
+import socket
+import threading
+import urllib.request
+from unittest import TestCase
+
+from pytrade.connector.quik.MsgPipeline import MsgPipeline
+from pytrade.metrics.Metrics import Metrics
+
+
+class TestMetrics(TestCase):
+    @staticmethod
+    def free_port() -> int:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    def test_pipeline_metrics(self):
+        metrics = Metrics()
+        done = threading.Event()
+        received = []
+
+        def on_message(msg, _):
+            received.append(msg)
+            if len(received) == 10:
+                done.set()
+
+        pipeline = MsgPipeline(on_message, lanes={'feed': [21014]}, default_lane='main', metrics=metrics)
+        for n in range(10):
+            pipeline.put(b'{"msgid":%d}' % (21014 if n % 2 else 21009))
+        pipeline.run()
+        self.assertTrue(done.wait(5))
+
+        snapshot = metrics.tick()
+        self.assertEqual(10, snapshot['stages'][Metrics.Stage.QUEUE]['count'])
+        self.assertEqual(10, snapshot['stages'][Metrics.Stage.DECODE]['count'])
+        self.assertEqual({'21014': 5, '21009': 5}, {msgid: value['count'] for msgid, value in snapshot['msgids'].items()})
+        self.assertGreater(snapshot['msgids']['21014']['rate'], 0)
+        self.assertEqual({'queue.feed': 0, 'queue.main': 0}, snapshot['gauges'])
+
+    def test_disabled(self):
+        metrics = Metrics(is_enabled=False)
+        metrics.histogram(Metrics.Stage.PARSE).record(100)
+        metrics.count(21014)
+        self.assertEqual({'stages': {}, 'msgids': {}, 'gauges': {}}, metrics.snapshot())
+
+    def test_http(self):
+        metrics = Metrics(http_port=self.free_port())
+        metrics.histogram(Metrics.Stage.PARSE).record(2000)
+        metrics.start()
+        try:
+            port = metrics._http_port
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                snapshot = json.loads(response.read())
+        finally:
+            metrics.stop()
+        self.assertEqual(1, snapshot['stages'][Metrics.Stage.PARSE]['count'])
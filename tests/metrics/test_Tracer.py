@@ -0,0 +1,38 @@
+import threading
+import time
+from datetime import datetime
+from unittest import TestCase
+
+from pytrade.metrics.Tracer import Tracer
+from model.feed.Asset import Asset
+from model.feed.Quote import Quote
+
+
+class TestTracer(TestCase):
+    def test_on_order_links_cause(self):
+        tracer = Tracer()
+        quote = Quote(datetime(2021, 11, 8, 10), Asset('QJSIM', 'SBER'), 1, 2, 1, 0)
+        quote.received = time.perf_counter_ns()
+        tracer.cause = quote
+        record = tracer.on_order(7, 'QJSIM/SBER', True, 1, 2)
+
+        self.assertEqual(('Quote', datetime(2021, 11, 8, 10), quote.received),
+                         (record.cause, record.cause_dt, record.received_ns))
+        self.assertGreaterEqual(record.tick_to_order_us, 0)
+        self.assertEqual(1, tracer.histogram.count)
+        self.assertEqual(1, tracer.summary()['orders'])
+        # Received time is not a dataclass field
+        self.assertEqual(Quote(datetime(2021, 11, 8, 10), Asset('QJSIM', 'SBER'), 1, 2, 1, 0), quote)
+
+    def test_cause_is_per_thread(self):
+        tracer = Tracer()
+        tracer.cause = Quote(datetime.now(), Asset('QJSIM', 'SBER'), 1, 2, 1, 0)
+        records = []
+        thread = threading.Thread(target=lambda: records.append(tracer.on_order(1, 'QJSIM/SBER', False, 1, 1)))
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(records[0].cause)
+        self.assertIsNone(records[0].tick_to_order_us)
+        self.assertEqual(0, tracer.histogram.count)
+        self.assertEqual(records, tracer.last())
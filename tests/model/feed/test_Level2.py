@@ -0,0 +1,49 @@
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+
+from model.feed.ArrayLevel2 import ArrayLevel2
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+
+
+class TestLevel2(TestCase):
+    dt = datetime(2021, 11, 7, 10)
+    asset = Asset('QJSIM', 'SBER')
+    items = [Level2Item(101, None, 5), Level2Item(99, 3, None), Level2Item(100, 4, None)]
+
+    def test_received_is_none_if_not_stamped(self):
+        self.assertIsNone(Level2.of(self.dt, self.asset, self.items).received)
+
+    def test_default_items_are_not_shared(self):
+        level2 = Level2(self.dt, self.asset)
+        level2.items.add(Level2Item(1, 2, None))
+        self.assertEqual([], list(Level2(self.dt, self.asset).items))
+
+    def test_of_sorts_items(self):
+        self.assertEqual([99, 100, 101], [item.price for item in Level2.of(self.dt, self.asset, self.items).items])
+
+    def test_to_numpy(self):
+        np.testing.assert_array_equal([[99, 3, np.nan], [100, 4, np.nan], [101, np.nan, 5]],
+                                      Level2.of(self.dt, self.asset, self.items).to_numpy())
+        self.assertEqual((0, 3), Level2(self.dt, self.asset).to_numpy().shape)
+
+    def test_array_level2_of(self):
+        level2 = ArrayLevel2.of(self.dt, self.asset, self.items)
+
+        self.assertIsInstance(level2, Level2)
+        self.assertEqual(Level2.of(self.dt, self.asset, self.items).items, level2.items)
+        np.testing.assert_array_equal([99, 100, 101], level2.price)
+        self.assertTrue(level2.price.flags['C_CONTIGUOUS'])
+
+    def test_array_level2_to_numpy(self):
+        level2 = ArrayLevel2.of(self.dt, self.asset, self.items)
+        np.testing.assert_array_equal(Level2.of(self.dt, self.asset, self.items).to_numpy(), level2.to_numpy())
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Level2Item(1, 2, 3).extra = 1
+        with self.assertRaises(AttributeError):
+            Level2(self.dt, self.asset).extra = 1
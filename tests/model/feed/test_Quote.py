@@ -0,0 +1,17 @@
+from datetime import datetime
+from unittest import TestCase
+
+from model.feed.Asset import Asset
+from model.feed.Ohlcv import Ohlcv
+from model.feed.Quote import Quote
+
+
+class TestQuote(TestCase):
+    def test_received_is_none_if_not_stamped(self):
+        dt, asset = datetime(2021, 11, 7, 10), Asset('QJSIM', 'SBER')
+        quote = Quote(dt, asset, 1, 2, 3, 0)
+        candle = Ohlcv(dt, asset, 1, 2, 3, 4, 5)
+
+        self.assertIsNone(quote.received)
+        self.assertIsNone(candle.received)
+        self.assertEqual(Quote(dt, asset, 1, 2, 3, 0), quote)
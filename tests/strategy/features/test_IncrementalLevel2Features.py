@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pytrade.strategy.features.IncrementalLevel2Features import IncrementalLevel2Features
+from model.feed.Asset import Asset
+from model.feed.Level2 import Level2
+from model.feed.Level2Item import Level2Item
+
+
+class TestIncrementalLevel2Features(TestCase):
+    def test_on_level2__equal_buckets(self):
+        # Each bucket has one item
+        dt = datetime.fromisoformat('2021-11-26 17:39:00')
+        items = [Level2Item(i, None, 1) for i in range(10, 20)] + [Level2Item(i, 1, None) for i in range(0, 10)]
+        features = IncrementalLevel2Features()
+
+        features.on_level2(Level2.of(dt, Asset('QJSIM', 'SBER'), items))
+
+        self.assertEqual([[1.0] * 20], features.features.values.tolist())
+        self.assertEqual([dt], features.features.index.tolist())
+        self.assertEqual('l2_bucket_-10', features.features.columns[0])
+        self.assertEqual('l2_bucket_9', features.features.columns[-1])
+
+    def test_on_level2__absent_levels(self):
+        dt = datetime.fromisoformat('2021-11-26 17:39:00')
+        items = [Level2Item(0.9, None, 1), Level2Item(0.9, None, 1), Level2Item(-0.9, 1, None),
+                 Level2Item(-0.9, 1, None)]
+        features = IncrementalLevel2Features(l2size=20, buckets=20)
+
+        features.on_level2(Level2.of(dt, Asset('QJSIM', 'SBER'), items))
+
+        self.assertEqual([[0, 0, 0, 0, 0, 0, 0, 0, 0, 2.0, 2.0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
+                         features.features.values.tolist())
+
+    def test_on_level2__running_l2size(self):
+        asset = Asset('QJSIM', 'SBER')
+        features = IncrementalLevel2Features()
+        for i, size in enumerate([10, 30, 20]):
+            items = [Level2Item(0, 1, None), Level2Item(size, None, 1)]
+            features.on_level2(Level2.of(datetime(2021, 11, 26, 17, 39, i), asset, items))
+
+        # Median of snapshot price ranges
+        self.assertEqual(20, features.l2size)
+        self.assertEqual(3, len(features.features))
+
+    def test_on_level2__running_l2size_of_retention(self):
+        asset = Asset('QJSIM', 'SBER')
+        features = IncrementalLevel2Features(retention=timedelta(seconds=1))
+        for i, size in enumerate([10, 30, 20]):
+            items = [Level2Item(0, 1, None), Level2Item(size, None, 1)]
+            features.on_level2(Level2.of(datetime(2021, 11, 26, 17, 39, i), asset, items))
+
+        # The first range is out of retention
+        self.assertEqual(25, features.l2size)
+
+    def test_on_level2__no_bids(self):
+        features = IncrementalLevel2Features()
+
+        features.on_level2(Level2.of(datetime(2021, 11, 26, 17, 39), Asset('QJSIM', 'SBER'),
+                                     [Level2Item(1, None, 1), Level2Item(2, None, 1)]))
+
+        self.assertTrue(features.features.empty)
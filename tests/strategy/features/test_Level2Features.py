@@ -1,6 +1,7 @@
 from datetime import datetime
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 from pytrade.strategy.features.Level2Features import Level2Features
@@ -45,3 +46,50 @@ class TestLevel2Features(TestCase):
              'l2_bucket_2', 'l2_bucket_3', 'l2_bucket_4', 'l2_bucket_5',
              'l2_bucket_6', 'l2_bucket_7', 'l2_bucket_8', 'l2_bucket_9'],
             features.columns.tolist())
+
+    def test_level2_features__several_snapshots(self):
+        # Snapshots are not sorted, the second one has no bids and is skipped
+        dt1, dt2, dt3 = [datetime.fromisoformat(f'2021-11-26 17:39:0{i}') for i in range(3)]
+        data = pd.DataFrame([
+            {'datetime': dt3, 'price': 1, 'ask_vol': 3, 'bid_vol': None},
+            {'datetime': dt3, 'price': -1, 'ask_vol': None, 'bid_vol': 4},
+            {'datetime': dt1, 'price': 1, 'ask_vol': 1, 'bid_vol': None},
+            {'datetime': dt1, 'price': 9, 'ask_vol': 1, 'bid_vol': None},
+            {'datetime': dt1, 'price': -1, 'ask_vol': None, 'bid_vol': 2},
+            {'datetime': dt2, 'price': 1, 'ask_vol': 5, 'bid_vol': None},
+        ])
+
+        features = Level2Features().level2_buckets(data, l2size=20, buckets=20)
+
+        self.assertEqual([dt1, dt3], features.index.tolist())
+        self.assertEqual([2, 4], features['l2_bucket_-1'].tolist())
+        self.assertEqual([1, 3], features['l2_bucket_1'].tolist())
+        # Bucket filled in other snapshot is nan, bucket which is always empty is 0
+        self.assertEqual(1, features['l2_bucket_9'].iloc[0])
+        self.assertTrue(np.isnan(features['l2_bucket_9'].iloc[1]))
+        self.assertEqual([0, 0], features['l2_bucket_5'].tolist())
+
+    def test_level2_features__one_sided(self):
+        # No snapshot has both asks and bids
+        dt = datetime.fromisoformat('2021-11-26 17:39:00')
+        data = pd.DataFrame([{'datetime': dt, 'price': 1, 'ask_vol': 1, 'bid_vol': None},
+                             {'datetime': dt, 'price': 2, 'ask_vol': 2, 'bid_vol': None}])
+
+        features = Level2Features().level2_buckets(data, l2size=20, buckets=20)
+
+        self.assertTrue(features.empty)
+        self.assertEqual(Level2Features.bucket_columns(20), features.columns.tolist())
+
+    def test_assign_bucket(self):
+        dt1, dt2 = datetime.fromisoformat('2021-11-26 17:39:01'), datetime.fromisoformat('2021-11-26 17:39:00')
+        data = pd.DataFrame([{'datetime': dt1, 'price': 3, 'ask_vol': 1, 'bid_vol': None},
+                             {'datetime': dt1, 'price': 1, 'ask_vol': None, 'bid_vol': 1},
+                             {'datetime': dt2, 'price': 5, 'ask_vol': 1, 'bid_vol': None}])
+
+        level2 = Level2Features().assign_bucket(data, l2size=20, buckets=20)
+
+        self.assertEqual([3, 3, 5], level2['price_min'].tolist())
+        self.assertEqual([1, 1], level2['price_max'].tolist()[:2])
+        self.assertEqual([2, 2], level2['price_middle'].tolist()[:2])
+        self.assertEqual([1, -1], level2['bucket'].tolist()[:2])
+        self.assertTrue(np.isnan(level2['bucket'].iloc[2]))
@@ -50,3 +50,21 @@ class TestTargetFeatures(TestCase):
 
         self.assertEqual([1, 1, 2, 2, 4, 3, 4, 3], withminmax['fut_bid_min'].values.tolist())
         self.assertEqual([10, 10, 8, 8, 6, 7, 6, 7], withminmax['fut_ask_max'].values.tolist())
+
+    def test_min_max_futures__several_windows(self):
+        quotes = pd.DataFrame([
+            {'datetime': datetime.fromisoformat('2021-11-26 17:00:00'), 'ticker': 'asset1', 'bid': 4, 'ask': 6},
+            {'datetime': datetime.fromisoformat('2021-11-26 17:00:30'), 'ticker': 'asset1', 'bid': 1, 'ask': 10},
+            {'datetime': datetime.fromisoformat('2021-11-26 17:01:00'), 'ticker': 'asset1', 'bid': 3, 'ask': 7},
+            {'datetime': datetime.fromisoformat('2021-11-26 17:02:00'), 'ticker': 'asset1', 'bid': 2, 'ask': 8}
+        ]).set_index(['datetime', 'ticker'])
+
+        withminmax = TargetFeatures().min_max_futures(quotes, ['30s', '2min'])
+
+        # Window end is exclusive
+        self.assertEqual([4, 1, 3, 2], withminmax['fut_bid_min_30s'].values.tolist())
+        self.assertEqual([6, 10, 7, 8], withminmax['fut_ask_max_30s'].values.tolist())
+        self.assertEqual([1, 1, 2, 2], withminmax['fut_bid_min_2min'].values.tolist())
+        self.assertEqual([10, 10, 8, 8], withminmax['fut_ask_max_2min'].values.tolist())
+        # Original prices are kept
+        self.assertEqual([4, 1, 3, 2], withminmax['bid'].values.tolist())
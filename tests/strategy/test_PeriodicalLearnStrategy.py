@@ -0,0 +1,37 @@
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pytrade.feed.Feed import Feed
+from pytrade.strategy.PeriodicalLearnStrategy import PeriodicalLearnStrategy
+from model.feed.Asset import Asset
+from model.feed.Quote import Quote
+
+
+class FeedAdapter:
+    def subscribe_feed(self, asset, subscriber):
+        pass
+
+
+class TestPeriodicalLearnStrategy(TestCase):
+    asset = Asset('QJSIM', 'SBER')
+    dt = datetime(2021, 12, 8, 10)
+
+    def test_learns_on_window_longer_than_retention(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            feed = Feed(FeedAdapter(), retention=timedelta(minutes=1), spill_dir=spill_dir)
+            strategy = PeriodicalLearnStrategy(feed, None, {'trade.asset.sec_class': 'QJSIM',
+                                                            'trade.asset.sec_code': 'SBER',
+                                                            'strategy.learn.big.seconds': 3600,
+                                                            'strategy.learn.window.minutes': 10})
+            learned = []
+            strategy.learn_on = lambda quotes, level2_features: learned.append(quotes)
+            for i in range(1200):
+                feed.on_quote(Quote(self.dt + timedelta(seconds=i), self.asset, i, i + 1, i, 0))
+
+            strategy.periodical_learn(self.dt + timedelta(seconds=1199))
+            feed.close()
+
+        # 10 minutes of quotes, 9 of them are not in memory
+        self.assertEqual(list(range(599, 1200)), learned[0]['bid'].tolist())
+        self.assertEqual(['QJSIM/SBER'], learned[0].index.get_level_values('ticker').unique().tolist())